@@ -0,0 +1,84 @@
+"""
+bench/auto_format.py — Regression check for AUTO format prediction (core/analysis.py).
+
+Compresses a few synthetic images through _compress_worker with the AUTO
+format and checks that each gets the expected format, and photos do not grow:
+grayscale photos must stay JPEG (every L-mode image has ≤256 colours, which
+once sent them to lossless PNG at several times their size), screenshots
+and palette images must become PNG.
+
+    python -m bench.auto_format [--scale 1.0]
+
+Prints one JSON line per case; the exit code is 1 if any case fails.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from bench.corpus  import _photo, _screenshot
+from core.imaging import OUTPUT_EXTENSIONS, _compress_worker, compress_options
+
+_FORMAT_OF = {ext: fmt for fmt, ext in OUTPUT_EXTENSIONS.items()}
+
+
+def _cases(rng: np.random.Generator, w: int, h: int):
+    """(name, image, source format, save kwargs, expected AUTO format)."""
+    photo = Image.fromarray(_photo(rng, w, h))
+    shot  = _screenshot(rng, w, h, alpha=False)
+    # Real grayscale photos carry more sensor noise than the synthetic ones
+    noisy = np.asarray(photo.convert("L"), dtype=np.int16) + rng.normal(0, 6, (h, w)).astype(np.int16)
+    return [
+        ("gray_photo_jpeg",  photo.convert("L"), "JPEG", {"quality": 92}, "JPEG"),
+        ("gray_noisy_jpeg",  Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8)), "JPEG", {"quality": 92}, "JPEG"),
+        ("gray_photo_png",   photo.convert("L"), "PNG",  {},              "JPEG"),
+        ("rgb_photo_jpeg",   photo,              "JPEG", {"quality": 92}, "JPEG"),
+        ("screenshot_png",   shot,               "PNG",  {},              "PNG"),
+        ("gray_screenshot",  shot.convert("L"),  "PNG",  {},              "PNG"),
+        ("palette_png",      shot.convert("P", palette=Image.ADAPTIVE, colors=64), "PNG", {}, "PNG"),
+    ]
+
+
+def run(scale: float, workdir: str) -> list[dict]:
+    rng = np.random.default_rng(7)
+    w, h = max(64, int(2000 * scale)), max(48, int(1500 * scale))
+    options = compress_options("AUTO", 85, 6, preserve_exif=True, to_bytes=True)
+    results = []
+    for name, img, fmt, kwargs, expected in _cases(rng, w, h):
+        buf = io.BytesIO()
+        img.save(buf, fmt, **kwargs)
+        path = os.path.join(workdir, f"{name}.{fmt.lower()}")
+        with open(path, "wb") as f:
+            f.write(buf.getvalue())
+        _, ok, out_path, err, data, _ = _compress_worker(path, os.path.join(workdir, name + "_C"), options, max_retries=1)
+        got = _FORMAT_OF.get(os.path.splitext(out_path)[1].lstrip(".")) if ok else None
+        row = {
+            "case": name, "expected": expected, "got": got,
+            "source_bytes": len(buf.getvalue()), "output_bytes": len(data) if data else None,
+            "error": err or None,
+        }
+        # A photo must come out smaller; graphics are only checked for the format
+        row["ok"] = ok and got == expected and (expected != "JPEG" or len(data) <= row["source_bytes"])
+        results.append(row)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.auto_format", description="Check AUTO format prediction.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every image edge (0.25 for a quick check)")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.scale, tmp)
+    for row in results:
+        print(json.dumps(row))
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+bench/compress.py — Compression throughput benchmark.
+
+Generates (or reuses) the synthetic corpus from bench.corpus and compresses
+it once per combination of engine, worker count and settings, measuring:
+
+    images_per_s, mb_per_s   — source images / MB per wall-clock second
+    ttfr_s                   — time to first result, from start of the run
+    peak_rss_mb              — peak RSS of this process plus all its children
+    failed                   — files that did not compress (the corpus has corrupt ones;
+                               their retries and back-off are timed, as in the app)
+
+Engines:
+    inline   — _compress_worker called in this process, no pool (baseline)
+    pool     — CompressionJob with a WorkerPool, as the app runs it (spawn included)
+    daemon   — core.daemon.CompressionService with its pool already warm
+
+    python -m bench.compress [--workers 1,2,4] [--engines pool,inline]
+                             [--settings jpeg85,webp80] [--scale 0.5] [--trials 3]
+                             [--out results.json] [--record]
+
+Every case is repeated --trials times; the JSON result (stdout and --out)
+holds each trial plus mean / 95 % confidence interval per metric. --record
+appends it to the history file for `python -m bench.history compare`.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+from bench.corpus     import generate
+from bench.history    import DEFAULT_HISTORY, machine, record, summarize_trials
+from core.daemon      import CompressionService
+from core.imaging     import VALID_IMAGE_EXTENSIONS, _compress_worker, compress_options
+from core.layout      import OutputLayout
+from core.pipeline    import CompressionJob
+
+ENGINES = ("inline", "pool", "daemon")
+
+# name → CompressionJob keyword arguments
+SETTINGS = {
+    "jpeg85":        {"output_format": "JPEG", "jpeg_quality": 85},
+    "jpeg85-direct": {"output_format": "JPEG", "jpeg_quality": 85, "read_ahead_mb": 0},
+    "webp80":        {"output_format": "WEBP", "jpeg_quality": 80},
+    "png":           {"output_format": "PNG"},
+    "auto":          {"output_format": "AUTO"},
+}
+
+# metric → which direction is better (see bench.history.compare)
+METRICS = {
+    "images_per_s": "higher",
+    "mb_per_s":     "higher",
+    "ttfr_s":       "lower",
+    "peak_rss_mb":  "lower",
+}
+
+# How often the RSS sampler looks at the process tree
+_RSS_INTERVAL = 0.02
+
+
+class PeakRss:
+    """Samples the RSS of this process (and its children) on a thread; keeps the peak."""
+
+    def __init__(self, interval: float = _RSS_INTERVAL, children: bool = True):
+        self.interval = interval
+        self.children = children
+        self.peak     = 0
+        self._stop    = threading.Event()
+        self._proc    = psutil.Process()
+        self._thread  = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _sample(self):
+        total = 0
+        procs = [self._proc] + (self._proc.children(recursive=True) if self.children else [])
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass   # exited between listing and sampling
+        self.peak = max(self.peak, total)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+
+def _options(setting: dict) -> dict:
+    return compress_options(
+        setting.get("output_format", "JPEG"),
+        setting.get("jpeg_quality", 85),
+        setting.get("png_compression", 6),
+        preserve_exif=True,
+    )
+
+
+def _corpus_files(corpus: str) -> list[str]:
+    return sorted(
+        os.path.join(corpus, f) for f in os.listdir(corpus)
+        if os.path.splitext(f)[1].lower() in VALID_IMAGE_EXTENSIONS
+    )
+
+
+def _run_inline(corpus: str, out: str, workers: int, setting: dict, mark_first):
+    layout, options = OutputLayout(corpus, out), _options(setting)
+    failed = 0
+    for path in _corpus_files(corpus):
+        _, ok, *_ = _compress_worker(path, layout.plan(path), options)
+        mark_first()
+        failed += not ok
+    return failed
+
+
+def _run_pool(corpus: str, out: str, workers: int, setting: dict, mark_first):
+    failed = 0
+    job = CompressionJob(corpus, out, workers=workers, **setting)
+    for kind, *payload in job.events():
+        if kind == "file_done":
+            mark_first()
+            failed += not payload[1]
+    return failed
+
+
+def _run_daemon(corpus: str, out: str, workers: int, setting: dict, mark_first, service: CompressionService):
+    layout, options = OutputLayout(corpus, out), _options(setting)
+    futures = [service.submit((p, layout.plan(p), options)) for p in _corpus_files(corpus)]
+    failed = 0
+    for future in concurrent.futures.as_completed(futures):
+        mark_first()
+        failed += not future.result()[1]
+    return failed
+
+
+def run_case(engine: str, workers: int, setting_name: str, corpus: str, manifest: dict) -> dict:
+    """Compress the corpus once; returns the metrics of that run."""
+    setting = SETTINGS[setting_name]
+    out = tempfile.mkdtemp(prefix="raidcloud-bench-out-")
+    service = None
+    if engine == "daemon":
+        service = CompressionService(workers)
+        service.start()   # warm-up is the daemon's point; it is not timed
+
+    first = []
+    started = 0.0
+
+    def mark_first():
+        if not first:
+            first.append(time.perf_counter() - started)
+
+    try:
+        with PeakRss() as rss:
+            started = time.perf_counter()
+            if engine == "inline":
+                failed = _run_inline(corpus, out, workers, setting, mark_first)
+            elif engine == "pool":
+                failed = _run_pool(corpus, out, workers, setting, mark_first)
+            else:
+                failed = _run_daemon(corpus, out, workers, setting, mark_first, service)
+            seconds = time.perf_counter() - started
+    finally:
+        if service:
+            service.close()
+        shutil.rmtree(out, ignore_errors=True)
+
+    images = len(manifest["files"])
+    mb     = manifest["total_bytes"] / 2**20
+    return {
+        "engine":       engine,
+        "workers":      workers,
+        "setting":      setting_name,
+        "images":       images,
+        "failed":       failed,
+        "seconds":      round(seconds, 4),
+        "images_per_s": round(images / seconds, 3),
+        "mb_per_s":     round(mb / seconds, 3),
+        "ttfr_s":       round(first[0], 4) if first else None,
+        "peak_rss_mb":  round(rss.peak / 2**20, 1),
+    }
+
+
+def cases(engines, workers, settings) -> list[tuple[str, int, str]]:
+    """The run matrix; the inline engine only runs single-worker."""
+    return [
+        (engine, 1 if engine == "inline" else n, setting)
+        for engine in engines
+        for n in (workers if engine != "inline" else (1,))
+        for setting in settings
+    ]
+
+
+def _csv(text: str) -> list[str]:
+    return [t.strip() for t in text.split(",") if t.strip()]
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "raidcloud-bench-corpus"),
+                        help="corpus directory, generated when missing or stale")
+    parser.add_argument("--count", type=int, default=48, help="corpus size in files (default: 48)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=0.5, help="corpus image scale (default: 0.5)")
+    parser.add_argument("--trials", type=int, default=3, help="repetitions of every case (default: 3)")
+    parser.add_argument("--out", help="also write the results JSON here")
+    parser.add_argument("--record", action="store_true", help="append the run to the benchmark history")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help=f"history file (default: {DEFAULT_HISTORY})")
+
+
+def run(matrix: list[tuple[str, int, str]], corpus: str, manifest: dict, trials: int) -> dict:
+    """Every case `trials` times, rounds interleaved so slow drift hits all cases alike."""
+    results = {case: [] for case in matrix}
+    for trial in range(trials):
+        for engine, workers, setting in matrix:
+            m = run_case(engine, workers, setting, corpus, manifest)
+            results[(engine, workers, setting)].append({k: m[k] for k in METRICS} | {"failed": m["failed"]})
+            print(f"[{trial + 1}/{trials}] {engine:<7} x{workers:<2} {setting:<14} {m['images_per_s']:7.2f} img/s "
+                  f"{m['mb_per_s']:7.2f} MB/s  first {m['ttfr_s']} s  peak {m['peak_rss_mb']} MB",
+                  file=sys.stderr, flush=True)
+    return {
+        "suite":   "compress",
+        "params":  {"corpus": manifest["params"], "images": len(manifest["files"]), "trials": trials},
+        "metrics": METRICS,
+        "cases": [
+            {
+                "key":     {"engine": engine, "workers": workers, "setting": setting},
+                "trials":  ts,
+                "summary": summarize_trials(ts, METRICS),
+            }
+            for (engine, workers, setting), ts in results.items()
+        ],
+    }
+
+
+def finish(result: dict, args):
+    """Print / save / record a suite result as the command line asked."""
+    if args.record:
+        result = record(result, args.history)
+    else:
+        result = {"machine": machine(), **result}
+    text = json.dumps(result, indent=1)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.compress", description="Benchmark compression throughput.")
+    add_arguments(parser)
+    parser.add_argument("--engines", default="pool,inline", help=f"comma-separated, from {', '.join(ENGINES)}")
+    parser.add_argument("--workers", default="1,2,4", help="worker counts to try (default: 1,2,4)")
+    parser.add_argument("--settings", default="jpeg85,webp80", help=f"comma-separated, from {', '.join(SETTINGS)}")
+    args = parser.parse_args(argv)
+
+    engines  = _csv(args.engines)
+    settings = _csv(args.settings)
+    for name in engines:
+        if name not in ENGINES:
+            parser.error(f"unknown engine {name!r}")
+    for name in settings:
+        if name not in SETTINGS:
+            parser.error(f"unknown setting {name!r}")
+
+    manifest = generate(args.corpus, args.count, args.seed, args.scale)
+    matrix = cases(engines, [int(n) for n in _csv(args.workers)], settings)
+    finish(run(matrix, args.corpus, manifest, max(1, args.trials)), args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    multiprocessing.set_start_method("spawn", force=True)
+    main()
@@ -0,0 +1,179 @@
+"""
+bench/corpus.py — Deterministic synthetic image corpus for the benchmarks.
+
+The same seed and parameters always give the same files (for a given
+Pillow build): photo-like JPEGs with EXIF, RGB / RGBA PNGs with flat
+"screenshot" areas, 8- and 16-bit TIFFs, and a few corrupt files (random
+bytes, truncated JPEGs, empty files) in a small / medium / large mix.
+
+    python -m bench.corpus DIR [--count 48] [--seed 1] [--scale 1.0]
+
+A manifest.json records the parameters; generate() reuses a directory whose
+manifest matches instead of rebuilding it.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from bench.highbit import write_tiff16
+
+# Edge lengths (4:3) before --scale, and how often each is picked
+_SIZES   = ((800, 600), (2000, 1500), (4000, 3000))
+_WEIGHTS = (0.5, 0.35, 0.15)
+
+# kind → share of the corpus
+_KINDS = {
+    "jpeg":    0.55,
+    "png":     0.15,
+    "png_rgba": 0.05,
+    "tiff":    0.08,
+    "tiff16":  0.07,
+    "corrupt": 0.10,
+}
+
+_CAMERAS = (("Canon", "EOS R6"), ("NIKON CORPORATION", "NIKON Z 6"), ("Apple", "iPhone 13"))
+
+MANIFEST_VERSION = 1
+
+
+def _photo(rng: np.random.Generator, w: int, h: int) -> np.ndarray:
+    """Smooth gradients, some shapes and sensor-like noise — compresses like a photo."""
+    y, x = np.mgrid[0:h, 0:w].astype(np.float32)
+    x /= w
+    y /= h
+    base = rng.uniform(40, 200, 3).astype(np.float32)
+    tilt = rng.uniform(-80, 80, (3, 2)).astype(np.float32)
+    freq = rng.uniform(2, 9)
+    img = np.empty((h, w, 3), dtype=np.float32)
+    for c in range(3):
+        img[..., c] = base[c] + tilt[c, 0] * x + tilt[c, 1] * y + 25 * np.sin(freq * (x + y * (c + 1)))
+
+    pil = Image.fromarray(np.clip(img, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(pil)
+    for _ in range(int(rng.integers(3, 12))):
+        x0, y0 = int(rng.integers(0, w)), int(rng.integers(0, h))
+        x1, y1 = x0 + int(rng.integers(w // 20, w // 3)), y0 + int(rng.integers(h // 20, h // 3))
+        fill = tuple(int(v) for v in rng.integers(0, 256, 3))
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)((x0, y0, x1, y1), fill=fill)
+
+    out = np.asarray(pil, dtype=np.int16) + rng.normal(0, 4, (h, w, 3)).astype(np.int16)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+def _screenshot(rng: np.random.Generator, w: int, h: int, alpha: bool) -> Image.Image:
+    """Flat panels and text-like strokes — compresses like UI captures and diagrams."""
+    mode = "RGBA" if alpha else "RGB"
+    bg = tuple(int(v) for v in rng.integers(200, 256, 3)) + ((0,) if alpha else ())
+    img = Image.new(mode, (w, h), bg)
+    draw = ImageDraw.Draw(img)
+    for _ in range(int(rng.integers(4, 10))):
+        x0, y0 = int(rng.integers(0, w - 20)), int(rng.integers(0, h - 20))
+        x1, y1 = min(w, x0 + int(rng.integers(40, w // 2))), min(h, y0 + int(rng.integers(20, h // 3)))
+        fill = tuple(int(v) for v in rng.integers(0, 256, 3)) + ((255,) if alpha else ())
+        draw.rectangle((x0, y0, x1, y1), fill=fill)
+        for row in range(y0 + 6, y1 - 6, 14):
+            length = int(rng.integers(10, max(11, x1 - x0 - 10)))
+            draw.line((x0 + 6, row, x0 + 6 + length, row), fill=(20, 20, 20) + ((255,) if alpha else ()), width=3)
+    return img
+
+
+def _exif(rng: np.random.Generator, index: int) -> bytes:
+    make, model = _CAMERAS[index % len(_CAMERAS)]
+    exif = Image.Exif()
+    exif[0x010F] = make                                   # Make
+    exif[0x0110] = model                                  # Model
+    exif[0x0112] = 1                                      # Orientation
+    month, day = int(rng.integers(1, 13)), int(rng.integers(1, 29))
+    stamp = f"{2015 + index % 9}:{month:02d}:{day:02d} {int(rng.integers(0, 24)):02d}:00:00"
+    exif.get_ifd(0x8769)[0x9003] = stamp                  # DateTimeOriginal
+    return exif.tobytes()
+
+
+def _write(path: str, kind: str, rng: np.random.Generator, w: int, h: int, index: int):
+    if kind == "jpeg":
+        Image.fromarray(_photo(rng, w, h)).save(path, "JPEG", quality=int(rng.integers(88, 97)), exif=_exif(rng, index))
+    elif kind in ("png", "png_rgba"):
+        _screenshot(rng, w, h, kind == "png_rgba").save(path, "PNG", compress_level=1)
+    elif kind == "tiff":
+        Image.fromarray(_photo(rng, w, h)).save(path, "TIFF")
+    elif kind == "tiff16":
+        # Scanner-style: 12 significant bits in a 16-bit container
+        write_tiff16(path, _photo(rng, w, h).astype(np.uint16) << 4)
+    else:
+        flavour = index % 3
+        if flavour == 0:
+            data = rng.bytes(int(rng.integers(1000, 50000)))
+        elif flavour == 1:
+            buf = Image.fromarray(_photo(rng, w, h))
+            tmp = path + ".tmp"
+            buf.save(tmp, "JPEG", quality=90)
+            with open(tmp, "rb") as f:
+                full = f.read()
+            os.remove(tmp)
+            data = full[: len(full) // 3]
+        else:
+            data = b""
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+_EXT = {"jpeg": ".jpg", "png": ".png", "png_rgba": ".png", "tiff": ".tif", "tiff16": ".tif", "corrupt": ".jpg"}
+
+
+def generate(dest: str, count: int = 48, seed: int = 1, scale: float = 1.0) -> dict:
+    """Create (or reuse) the corpus in `dest`; returns its manifest."""
+    params = {"version": MANIFEST_VERSION, "count": count, "seed": seed, "scale": scale}
+    manifest_path = os.path.join(dest, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("params") == params and all(
+            os.path.exists(os.path.join(dest, e["name"])) for e in manifest["files"]
+        ):
+            return manifest
+
+    os.makedirs(dest, exist_ok=True)
+    rng   = np.random.default_rng(seed)
+    kinds = list(_KINDS)
+    picks = rng.choice(len(kinds), size=count, p=list(_KINDS.values()))
+    sizes = rng.choice(len(_SIZES), size=count, p=_WEIGHTS)
+
+    files = []
+    for i in range(count):
+        kind = kinds[picks[i]]
+        w, h = (max(16, int(v * scale)) for v in _SIZES[sizes[i]])
+        name = f"{i:04d}_{kind}{_EXT[kind]}"
+        path = os.path.join(dest, name)
+        # Each file gets its own stream so one file's content never depends on another's
+        _write(path, kind, np.random.default_rng([seed, i]), w, h, i)
+        files.append({"name": name, "kind": kind, "width": w, "height": h, "bytes": os.path.getsize(path)})
+
+    manifest = {
+        "params":      params,
+        "files":       files,
+        "total_bytes": sum(f["bytes"] for f in files),
+        "corrupt":     sum(f["kind"] == "corrupt" for f in files),
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.corpus", description="Generate the synthetic benchmark corpus.")
+    parser.add_argument("dest")
+    parser.add_argument("--count", type=int, default=48)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every image edge (0.25 for a quick corpus)")
+    args = parser.parse_args(argv)
+    manifest = generate(args.dest, args.count, args.seed, args.scale)
+    print(f"{len(manifest['files'])} files, {manifest['total_bytes'] / 2**20:.1f} MB, "
+          f"{manifest['corrupt']} corrupt → {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
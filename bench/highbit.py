@@ -0,0 +1,162 @@
+"""
+bench/highbit.py — Benchmark for the 16-bit TIFF → 8-bit path (core/highbit.py).
+
+Generates large synthetic 16-bit scans (defaults give ~110 MB per file) and
+compares Pillow's generic convert() with the app's own path: _compress_worker
+(to bytes, JPEG 85) with and without EXIF preservation, which is where
+core.highbit.to_8bit runs. Worker cases also report their decode / convert /
+encode stage times from the worker's spans.
+
+    python -m bench.highbit [--size 4300] [--repeat 3] [--keep DIR]
+"""
+
+import argparse
+import io
+import json
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+import psutil
+from PIL import Image
+
+from core.imaging import _compress_worker, compress_options
+
+
+def write_tiff16(path: str, samples: np.ndarray, photometric: int = 2):
+    """
+    Write an uncompressed, single-strip, little-endian 16-bit TIFF.
+    Pillow cannot write 48-bit RGB TIFFs, so the few tags needed are emitted by hand.
+    """
+    height, width, spp = samples.shape
+    data = samples.astype("<u2").tobytes()
+    entries = [
+        (256, 4, 1, width),                  # ImageWidth
+        (257, 4, 1, height),                 # ImageLength
+        (258, 3, spp, None),                 # BitsPerSample (array, written below)
+        (259, 3, 1, 1),                      # Compression: none
+        (262, 3, 1, photometric),            # PhotometricInterpretation
+        (273, 4, 1, None),                   # StripOffsets (patched below)
+        (277, 3, 1, spp),                    # SamplesPerPixel
+        (278, 4, 1, height),                 # RowsPerStrip
+        (279, 4, 1, len(data)),              # StripByteCounts
+        (284, 3, 1, 1),                      # PlanarConfiguration: chunky
+    ]
+    ifd_offset  = 8
+    ifd_size    = 2 + len(entries) * 12 + 4
+    bits_offset = ifd_offset + ifd_size
+    data_offset = bits_offset + 2 * spp
+    data_offset += data_offset % 2
+
+    with open(path, "wb") as f:
+        f.write(b"II" + struct.pack("<HI", 42, ifd_offset))
+        f.write(struct.pack("<H", len(entries)))
+        for tag, typ, count, value in entries:
+            if tag == 258:
+                value = 16 if spp == 1 else bits_offset
+            elif tag == 273:
+                value = data_offset
+            if typ == 3 and count == 1:
+                f.write(struct.pack("<HHIHH", tag, typ, count, value, 0))
+            else:
+                f.write(struct.pack("<HHII", tag, typ, count, value))
+        f.write(struct.pack("<I", 0))
+        f.write(struct.pack(f"<{spp}H", *([16] * spp)))
+        f.write(b"\0" * (data_offset - f.tell()))
+        f.write(data)
+
+
+def _synthetic_scan(size: int, spp: int, bits: int) -> np.ndarray:
+    """Smooth gradients plus noise, using `bits` of the 16-bit container like a real scanner."""
+    rng = np.random.default_rng(1234)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    top = (1 << bits) - 1
+    planes = [(x * 0.7 + y * 0.3), (y * 0.8 + 0.1), (1 - x) * 0.9]
+    out = np.empty((size, size, spp), dtype=np.uint16)
+    for c in range(spp):
+        plane = planes[c % 3] * top + rng.normal(0, top * 0.01, (size, size))
+        out[..., c] = np.clip(plane, 0, top)
+    return out
+
+
+def _measure(fn, repeat: int) -> dict:
+    proc = psutil.Process()
+    times = []
+    peak = 0
+    fn()   # warm-up: first-call imports and the page cache are not what is measured
+    for _ in range(repeat):
+        base = proc.memory_info().rss
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+        peak = max(peak, proc.memory_info().rss - base)
+        del result
+    return {"best_s": round(min(times), 4), "mean_s": round(sum(times) / len(times), 4), "rss_delta_mb": round(peak / 2**20, 1)}
+
+
+def run(size: int, repeat: int, workdir: str) -> list[dict]:
+    results = []
+    cases = [("rgb48", 3, 16, 2), ("gray16", 1, 16, 1), ("gray12", 1, 12, 1)]
+    for name, spp, bits, photometric in cases:
+        path = os.path.join(workdir, f"{name}.tif")
+        write_tiff16(path, _synthetic_scan(size, spp, bits), photometric)
+        with open(path, "rb") as f:
+            data = f.read()
+        mb = len(data) / 2**20
+
+        def pillow():
+            return Image.open(io.BytesIO(data)).convert("RGB")
+
+        def worker(preserve_exif: bool):
+            options = compress_options("JPEG", 85, preserve_exif=preserve_exif, to_bytes=True)
+
+            def run_worker():
+                _, ok, _, err, encoded, (_, spans, _) = _compress_worker(
+                    path, os.path.join(workdir, name + "_C"), options, max_retries=1)
+                if not ok:
+                    raise RuntimeError(err)
+                return Image.open(io.BytesIO(encoded)), spans
+            return run_worker
+
+        row = {"case": name, "file_mb": round(mb, 1)}
+        cases = (("pillow_convert", pillow), ("worker_exif", worker(True)), ("worker_no_exif", worker(False)))
+        for label, fn in cases:
+            try:
+                stats = _measure(fn, repeat)
+                stats["mb_per_s"] = round(mb / stats["best_s"], 1)
+                out = fn()
+                if isinstance(out, tuple):
+                    out, spans = out
+                    stats["stages_ms"] = {
+                        stage: round((end - start) / 1e6, 1)
+                        for stage, start, end in spans if stage in ("decode", "convert", "encode")
+                    }
+                stats["mean_level"] = round(float(np.asarray(out).mean()), 1)  # ~0 or ~255 means crushed / clipped
+            except Exception as exc:
+                stats = {"error": str(exc)}
+            row[label] = stats
+        results.append(row)
+        os.remove(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=4300, help="image edge in pixels (4300 → ~110 MB RGB48)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--keep", help="directory for the generated TIFFs (default: temp dir)")
+    args = parser.parse_args()
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        results = run(args.size, args.repeat, args.keep)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run(args.size, args.repeat, tmp)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
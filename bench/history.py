@@ -0,0 +1,256 @@
+"""
+bench/history.py — Benchmark result history and run-to-run comparison.
+
+Benchmarks run with --record append one JSON line per run to a history file
+(default bench_history.jsonl): suite, time, git commit, machine fingerprint,
+and every case with its repeated trials.
+
+    python -m bench.history list
+    python -m bench.history compare [BASE] [NEW] [--suite compress]
+
+BASE / NEW are run numbers from `list` (which counts every suite's runs),
+negative indexes among the suite's runs (-1 = latest) or git commit
+prefixes; by default the two latest runs of the suite on this
+machine are compared. For each case and metric the means are compared with
+Welch's t-test at 95 % confidence; only significant changes beyond the
+noise threshold are reported as regressions or improvements. The exit code
+is 1 when there is a regression, so the command can gate a release build.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import psutil
+
+DEFAULT_HISTORY = "bench_history.jsonl"
+
+# Two-sided 95 % Student t critical values by degrees of freedom
+_T95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+    9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042,
+    40: 2.021, 60: 2.000, 120: 1.980,
+}
+
+# Relative changes smaller than this are never reported, however significant
+NOISE_THRESHOLD = 0.03
+
+
+# ── Statistics ────────────────────────────────────────────────────────────────
+def t_critical(df: float) -> float:
+    """95 % two-sided critical value, interpolated between table entries."""
+    if df >= 120:
+        return 1.96 + (1.980 - 1.96) * 120 / df
+    keys = sorted(_T95)
+    df = max(1.0, df)
+    for lo, hi in zip(keys, keys[1:]):
+        if lo <= df <= hi:
+            return _T95[lo] + (_T95[hi] - _T95[lo]) * (df - lo) / (hi - lo)
+    return _T95[1]
+
+
+def summarize(values: list[float]) -> dict:
+    """Mean, sample standard deviation and 95 % confidence half-width."""
+    n = len(values)
+    mean = sum(values) / n
+    sd = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1)) if n > 1 else 0.0
+    ci = t_critical(n - 1) * sd / math.sqrt(n) if n > 1 else None
+    return {"n": n, "mean": mean, "sd": sd, "ci95": ci}
+
+
+def welch(a: dict, b: dict) -> bool | None:
+    """True if the means of two summarize() results differ at 95 %; None without enough trials."""
+    if a["n"] < 2 or b["n"] < 2:
+        return None
+    va, vb = a["sd"] ** 2 / a["n"], b["sd"] ** 2 / b["n"]
+    if va + vb == 0:
+        return a["mean"] != b["mean"]
+    t = abs(a["mean"] - b["mean"]) / math.sqrt(va + vb)
+    df = (va + vb) ** 2 / ((va ** 2 / (a["n"] - 1) if va else 0) + (vb ** 2 / (b["n"] - 1) if vb else 0))
+    return t > t_critical(df)
+
+
+def summarize_trials(trials: list[dict], metrics: dict[str, str]) -> dict:
+    """Per-metric summarize() over a case's trials (metrics missing from a trial are skipped)."""
+    out = {}
+    for name in metrics:
+        values = [t[name] for t in trials if t.get(name) is not None]
+        if values:
+            out[name] = summarize(values)
+    return out
+
+
+# ── Run metadata ──────────────────────────────────────────────────────────────
+def git_info() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, timeout=10,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty":  bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def machine() -> dict:
+    """What the numbers depend on; `fingerprint` is a short hash of it."""
+    info = {
+        "cpu":       _cpu_model(),
+        "cpus":      os.cpu_count(),
+        "memory_gb": round(psutil.virtual_memory().total / 2**30),
+        "system":    f"{platform.system()} {platform.release()}",
+        "python":    platform.python_version(),
+    }
+    info["fingerprint"] = hashlib.sha1(json.dumps(info, sort_keys=True).encode()).hexdigest()[:12]
+    return info
+
+
+# ── Storage ───────────────────────────────────────────────────────────────────
+def record(result: dict, path: str = DEFAULT_HISTORY) -> dict:
+    """Append a benchmark result (as returned by a suite's run()) with its metadata."""
+    entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": git_info(), "machine": machine(), **result}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def load(path: str = DEFAULT_HISTORY) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _case_key(case: dict) -> str:
+    return ", ".join(f"{k}={v}" for k, v in sorted(case["key"].items()))
+
+
+def _pick(runs: list[dict], ref: str, suite: str) -> dict:
+    """
+    A `suite` run by the index `list` prints (counted over every suite), by
+    negative index among the suite's runs (-1 is its latest), or the latest
+    one whose commit starts with `ref`.
+    """
+    in_suite = [r for r in runs if r["suite"] == suite]
+    try:
+        i = int(ref)
+        run = runs[i] if i >= 0 else in_suite[i]
+    except (ValueError, IndexError):
+        pass
+    else:
+        if run["suite"] != suite:
+            raise SystemExit(f"run {ref} is from the {run['suite']} suite; pass --suite {run['suite']} to compare it")
+        return run
+    matches = [r for r in in_suite if r["git"]["commit"].startswith(ref)]
+    if not matches:
+        raise SystemExit(f"no {suite} run matches {ref!r}")
+    return matches[-1]
+
+
+# ── Comparison ────────────────────────────────────────────────────────────────
+def compare(base: dict, new: dict, threshold: float = NOISE_THRESHOLD) -> list[dict]:
+    """One row per (case, metric) present in both runs."""
+    metrics = {**base.get("metrics", {}), **new.get("metrics", {})}
+    base_cases = {_case_key(c): c for c in base["cases"]}
+    rows = []
+    for case in new["cases"]:
+        key = _case_key(case)
+        if key not in base_cases:
+            continue
+        for name, better in metrics.items():
+            a = base_cases[key]["summary"].get(name)
+            b = case["summary"].get(name)
+            if not a or not b or not a["mean"]:
+                continue
+            change = (b["mean"] - a["mean"]) / a["mean"]
+            significant = welch(a, b)
+            verdict = "same"
+            if significant is None:
+                verdict = "n/a"
+            elif significant and abs(change) >= threshold:
+                improved = change > 0 if better == "higher" else change < 0
+                verdict = "improved" if improved else "regressed"
+            rows.append({"case": key, "metric": name, "base": a, "new": b, "change": change, "verdict": verdict})
+    return rows
+
+
+def _fmt(s: dict) -> str:
+    return f"{s['mean']:.3f}" + (f" ±{s['ci95']:.3f}" if s["ci95"] is not None else "")
+
+
+def _describe(run: dict) -> str:
+    g = run["git"]
+    return f"{run['time']} {g['commit'][:10]}{'+' if g['dirty'] else ''} ({run['machine']['fingerprint']})"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.history", description="Inspect and compare benchmark runs.")
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list recorded runs")
+    p = sub.add_parser("compare", help="compare two runs")
+    p.add_argument("base", nargs="?", help="index from `list`, or a commit prefix")
+    p.add_argument("new", nargs="?", help="as base (default: the suite's latest run)")
+    p.add_argument("--suite", default="compress", help="suite to compare (default: compress)")
+    p.add_argument("--threshold", type=float, default=NOISE_THRESHOLD, help="minimum relative change to report")
+    p.add_argument("--all", action="store_true", help="also list unchanged metrics")
+    args = parser.parse_args(argv)
+
+    runs = load(args.history)
+    if args.command == "list":
+        for i, run in enumerate(runs):
+            trials = max((len(c["trials"]) for c in run["cases"]), default=0)
+            print(f"{i:4d}  {run['suite']:<9} {_describe(run)}  {len(run['cases'])} cases x {trials} trials")
+        return 0
+
+    if args.base is None:
+        here = machine()["fingerprint"]
+        local = [r for r in runs if r["suite"] == args.suite and r["machine"]["fingerprint"] == here]
+        if len(local) < 2:
+            raise SystemExit(f"need two {args.suite} runs on this machine in {args.history}")
+        base, new = local[-2], local[-1]
+    else:
+        base, new = _pick(runs, args.base, args.suite), _pick(runs, args.new or "-1", args.suite)
+
+    print(f"base: {_describe(base)}")
+    print(f"new:  {_describe(new)}")
+    if base["machine"]["fingerprint"] != new["machine"]["fingerprint"]:
+        print("warning: the runs come from different machines")
+
+    rows = compare(base, new, args.threshold)
+    regressions = 0
+    for row in rows:
+        if row["verdict"] == "same" and not args.all:
+            continue
+        regressions += row["verdict"] == "regressed"
+        print(f"{row['verdict']:<9} {row['case']:<44} {row['metric']:<13} "
+              f"{_fmt(row['base'])} → {_fmt(row['new'])}  ({row['change'] * 100:+.1f}%)")
+    if not any(r["verdict"] in ("improved", "regressed") for r in rows):
+        print("no significant changes")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+bench/read_ahead.py — Regression check for the read-ahead budget (core/prefetch.py).
+
+Compresses a few noise PNGs, each larger than half the read-ahead budget,
+through CompressionJob.events(). Only one of them fits the budget at a time,
+so the next prefetch waits until the pool collects a result and releases a
+block; a pool loop blocked on that prefetch hangs the run for good.
+
+    python -m bench.read_ahead [--files 8] [--timeout 60]
+
+Prints one JSON line; the exit code is 1 if the run hangs or a file fails.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from core.pipeline import CompressionJob
+
+_BUDGET_MB = 1
+
+
+def _write_sources(folder: str, count: int):
+    rng = np.random.default_rng(3)
+    # Noise does not compress: ~0.75 MB per PNG, over half of a 1 MB budget
+    for i in range(count):
+        Image.fromarray(rng.integers(0, 256, (500, 500, 3), dtype=np.uint8)).save(os.path.join(folder, f"n{i}.png"))
+
+
+def run(count: int, timeout: float, workdir: str) -> dict:
+    src, out = os.path.join(workdir, "src"), os.path.join(workdir, "out")
+    os.makedirs(src)
+    _write_sources(src, count)
+    largest = max(os.path.getsize(os.path.join(src, n)) for n in os.listdir(src))
+
+    job = CompressionJob(src, out, output_format="WEBP", workers=4, read_ahead_mb=_BUDGET_MB)
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(e for e in job.events() if e[0] == "file_done"),
+                              daemon=True)
+    t0 = time.monotonic()
+    runner.start()
+    runner.join(timeout)
+    hung = runner.is_alive()
+    if hung:
+        job.cancel()
+    return {
+        "files": count, "budget_bytes": _BUDGET_MB * 1024 * 1024, "largest_source": largest,
+        "completed": len(results), "failed": sum(not e[2] for e in results),
+        "seconds": round(time.monotonic() - t0, 2), "hung": hung,
+        "ok": not hung and len(results) == count and all(e[2] for e in results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.read_ahead", description="Check the read-ahead budget cannot hang a run.")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds before the run counts as hung")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run(args.files, args.timeout, tmp)
+    print(json.dumps(result))
+    sys.exit(0 if result["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
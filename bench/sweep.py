@@ -0,0 +1,315 @@
+"""
+bench/sweep.py — Encoder parameter sweep over a sample of a real corpus.
+
+Runs the compressor's own encode path (core.imaging._encode, i.e. what
+_compress_worker does per file) for every point of a parameter grid, in
+parallel across files, and measures output size, SSIM / PSNR against the
+decoded source, and encode time. Writes report.json and report.html with
+the size / quality / time Pareto front marked.
+
+    python -m bench.sweep ~/Pictures/2024 [--sample 24] [--out sweep_report]
+                          [--qualities 70,75,80,85,90] [--save-presets]
+
+Pareto points are stored in the report as presets; --save-presets also
+adds them to the app settings (Compress tab → Preset), and the tab can
+import them from a report.json written on another machine.
+"""
+
+import argparse
+import html
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+from PIL import Image
+
+from core.highbit     import is_high_bit
+from core.imaging     import (
+    JPEG_SUBSAMPLING, VALID_IMAGE_EXTENSIONS, _encode, _high_bit_to_8bit, compress_options,
+)
+from core.worker_pool import WorkerPool
+
+# Rows per band when computing metrics, to bound memory on large photos
+_BAND = 512
+# SSIM window (uniform, as in scikit-image's default) and constants for 8-bit data
+_WIN = 7
+_C1  = (0.01 * 255) ** 2
+_C2  = (0.03 * 255) ** 2
+
+
+# ── Grid ──────────────────────────────────────────────────────────────────────
+def default_grid(qualities=(70, 75, 80, 85, 90), formats=("JPEG", "WEBP", "PNG")) -> list[dict]:
+    """Parameter points to try; each is a core.presets-style dict plus a "label"."""
+    grid = []
+    if "JPEG" in formats:
+        for q in qualities:
+            for sub in (2, 0):
+                for progressive in (False, True):
+                    grid.append({
+                        "label": f"JPEG q{q} {JPEG_SUBSAMPLING[sub]}" + (" progressive" if progressive else ""),
+                        "output_format": "JPEG", "jpeg_quality": q,
+                        "jpeg_subsampling": sub, "jpeg_progressive": progressive,
+                    })
+    if "WEBP" in formats:
+        for q in qualities:
+            grid.append({"label": f"WebP q{q}", "output_format": "WEBP", "jpeg_quality": q})
+    if "PNG" in formats:
+        for level in (6, 9):
+            grid.append({"label": f"PNG level {level}", "output_format": "PNG", "png_compression": level})
+        for colors in (256, 64):
+            grid.append({
+                "label": f"PNG {colors} colours", "output_format": "PNG",
+                "png_quantize": True, "png_colors": colors,
+            })
+    return grid
+
+
+def _options(point: dict) -> dict:
+    return compress_options(
+        point["output_format"],
+        point.get("jpeg_quality", 85),
+        point.get("png_compression", 6),
+        preserve_exif=False,
+        to_bytes=True,
+        png_quantize=point.get("png_quantize", False),
+        png_colors=point.get("png_colors", 256),
+        jpeg_subsampling=point.get("jpeg_subsampling", -1),
+        jpeg_progressive=point.get("jpeg_progressive", False),
+    )
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+def _box_mean(a: np.ndarray) -> np.ndarray:
+    """Mean over every _WIN x _WIN window ('valid' positions only)."""
+    c = np.pad(a.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    w = _WIN
+    return (c[w:, w:] - c[:-w, w:] - c[w:, :-w] + c[:-w, :-w]) / (w * w)
+
+
+def ssim(ref: np.ndarray, out: np.ndarray) -> float:
+    """
+    Mean SSIM of two uint8 RGB arrays, averaged over the R, G and B planes
+    (like scikit-image with channel_axis) so chroma subsampling shows up.
+    """
+    total, count = 0.0, 0
+    height = ref.shape[0]
+    for top, c in itertools.product(range(0, max(1, height - _WIN + 1), _BAND), range(3)):
+        rows = slice(top, min(height, top + _BAND + _WIN - 1))
+        x = ref[rows, :, c].astype(np.float64)
+        y = out[rows, :, c].astype(np.float64)
+        if x.shape[0] < _WIN or x.shape[1] < _WIN:
+            break
+        mx, my = _box_mean(x), _box_mean(y)
+        # Sample (co)variances, as scikit-image does
+        n = _WIN * _WIN / (_WIN * _WIN - 1)
+        vx  = (_box_mean(x * x) - mx * mx) * n
+        vy  = (_box_mean(y * y) - my * my) * n
+        vxy = (_box_mean(x * y) - mx * my) * n
+        s = ((2 * mx * my + _C1) * (2 * vxy + _C2)) / ((mx * mx + my * my + _C1) * (vx + vy + _C2))
+        total += float(s.sum())
+        count += s.size
+    return total / count if count else 1.0
+
+
+def psnr(ref: np.ndarray, out: np.ndarray) -> float:
+    """PSNR in dB over all RGB samples; inf for identical images."""
+    sq = 0
+    for top in range(0, ref.shape[0], _BAND):
+        d = ref[top:top + _BAND].astype(np.int64) - out[top:top + _BAND]
+        sq += int((d * d).sum())
+    mse = sq / ref.size
+    return float("inf") if mse == 0 else float(10 * np.log10(255 * 255 / mse))
+
+
+def _decode_rgb(data: bytes) -> np.ndarray:
+    src = io.BytesIO(data)
+    img = Image.open(src)
+    if is_high_bit(img):
+        img = _high_bit_to_8bit(img, src)
+    if img.mode == "P":
+        img = img.convert("RGBA")   # quantized PNGs may carry palette transparency
+    return np.asarray(img.convert("RGB"))
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+def _sweep_file(path: str, grid: list[dict]) -> dict:
+    """Pool task: encode one file at every grid point. Must be top-level to pickle."""
+    with open(path, "rb") as f:
+        data = f.read()
+    filename = os.path.basename(path)
+    ref = _decode_rgb(data)
+
+    results = []
+    for point in grid:
+        started = time.perf_counter()
+        _, ok, _, err, out = _encode(io.BytesIO(data), filename, "sweep", _options(point))
+        seconds = time.perf_counter() - started
+        if not ok:
+            results.append({"label": point["label"], "error": err})
+            continue
+        decoded = _decode_rgb(out)
+        results.append({
+            "label":   point["label"],
+            "bytes":   len(out),
+            "seconds": seconds,
+            "ssim":    ssim(ref, decoded),
+            "psnr":    psnr(ref, decoded),
+        })
+    return {"file": path, "bytes": len(data), "pixels": ref.shape[0] * ref.shape[1], "results": results}
+
+
+# ── Aggregation ───────────────────────────────────────────────────────────────
+def summarize(grid: list[dict], files: list[dict]) -> list[dict]:
+    """One row per grid point, aggregated over the sampled files, Pareto points flagged."""
+    source_bytes = sum(f["bytes"] for f in files)
+    pixels       = sum(f["pixels"] for f in files)
+    rows = []
+    for point in grid:
+        per_file = [r for f in files for r in f["results"] if r["label"] == point["label"]]
+        good = [r for r in per_file if "error" not in r]
+        if not good:
+            continue
+        out_bytes = sum(r["bytes"] for r in good)
+        seconds   = sum(r["seconds"] for r in good)
+        finite    = [r["psnr"] for r in good if r["psnr"] != float("inf")]
+        rows.append({
+            "label":     point["label"],
+            "preset":    {k: v for k, v in point.items() if k != "label"},
+            "bytes":     out_bytes,
+            "ratio":     out_bytes / max(source_bytes, 1),
+            "ssim_mean": sum(r["ssim"] for r in good) / len(good),
+            "ssim_min":  min(r["ssim"] for r in good),
+            "psnr_mean": sum(finite) / len(finite) if finite else None,
+            "seconds":   seconds,
+            "mpix_per_s": pixels / 1e6 / seconds if seconds else None,
+            "errors":    len(per_file) - len(good),
+        })
+
+    for row in rows:
+        row["pareto"] = not any(_dominates(other, row) for other in rows if other is not row)
+    rows.sort(key=lambda r: r["ratio"])
+    return rows
+
+
+def _dominates(a: dict, b: dict) -> bool:
+    """a is at least as small, as good and as fast as b, and strictly better in one."""
+    no_worse = a["bytes"] <= b["bytes"] and a["ssim_mean"] >= b["ssim_mean"] and a["seconds"] <= b["seconds"]
+    better   = a["bytes"] < b["bytes"] or a["ssim_mean"] > b["ssim_mean"] or a["seconds"] < b["seconds"]
+    return no_worse and better
+
+
+def write_html(path: str, report: dict):
+    head = ("Setting", "Size", "SSIM mean", "SSIM min", "PSNR dB", "Time s", "MP/s", "Pareto")
+    lines = [
+        "<!doctype html><meta charset='utf-8'><title>Encoder sweep</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}"
+        "td,th{padding:4px 10px;border-bottom:1px solid #ddd;text-align:right}"
+        "td:first-child,th:first-child{text-align:left}tr.pareto{background:#e8f5e9;font-weight:bold}</style>",
+        f"<h1>Encoder sweep</h1><p>{len(report['files'])} files, "
+        f"{report['source_bytes'] / 1e6:.1f} MB sampled from {html.escape(report['corpus'])}. "
+        "Size is relative to the source files; highlighted rows are on the Pareto front "
+        "(no other setting is smaller, better and faster at once).</p>",
+        "<table><tr>" + "".join(f"<th>{h}</th>" for h in head) + "</tr>",
+    ]
+    for r in report["configs"]:
+        cells = (
+            html.escape(r["label"]),
+            f"{r['ratio'] * 100:.1f}%",
+            f"{r['ssim_mean']:.4f}",
+            f"{r['ssim_min']:.4f}",
+            "—" if r["psnr_mean"] is None else f"{r['psnr_mean']:.2f}",
+            f"{r['seconds']:.2f}",
+            "—" if r["mpix_per_s"] is None else f"{r['mpix_per_s']:.1f}",
+            "✓" if r["pareto"] else "",
+        )
+        cls = " class='pareto'" if r["pareto"] else ""
+        lines.append(f"<tr{cls}>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+    lines.append("</table>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+def sample_corpus(folder: str, count: int, seed: int = 0) -> list[str]:
+    files = sorted(
+        os.path.join(root, f)
+        for root, _, names in os.walk(folder)
+        for f in names
+        if os.path.splitext(f)[1].lower() in VALID_IMAGE_EXTENSIONS
+    )
+    if len(files) <= count:
+        return files
+    return sorted(random.Random(seed).sample(files, count))
+
+
+def run(folder: str, sample: int, grid: list[dict], workers: int, out_dir: str, preset_prefix: str = "Sweep") -> dict:
+    paths = sample_corpus(folder, sample)
+    if not paths:
+        raise SystemExit(f"no images found in {folder}")
+
+    files, failed = [], []
+    started = time.perf_counter()
+    with WorkerPool(workers) as pool:
+        for args, ok, value in pool.imap_unordered(_sweep_file, ((p, grid) for p in paths)):
+            if ok:
+                files.append(value)
+            else:
+                failed.append({"file": args[0], "error": value})
+            print(f"[{len(files) + len(failed)}/{len(paths)}] {os.path.basename(args[0])}", flush=True)
+
+    configs = summarize(grid, files)
+    report = {
+        "corpus":       os.path.abspath(folder),
+        "source_bytes": sum(f["bytes"] for f in files),
+        "wall_seconds": time.perf_counter() - started,
+        "configs":      configs,
+        "presets":      {f"{preset_prefix}: {r['label']}": r["preset"] for r in configs if r["pareto"]},
+        "files":        files,
+        "failed":       failed,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    write_html(os.path.join(out_dir, "report.html"), report)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.sweep", description="Sweep encoder settings over a corpus sample.")
+    parser.add_argument("corpus", help="folder of images to sample from")
+    parser.add_argument("--sample", type=int, default=24, help="files to sample (default: 24)")
+    parser.add_argument("--qualities", default="70,75,80,85,90", help="JPEG / WebP qualities to try")
+    parser.add_argument("--formats", default="JPEG,WEBP,PNG", help="formats to include")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--out", default="sweep_report", help="report directory (default: sweep_report)")
+    parser.add_argument("--save-presets", action="store_true", help="add the Pareto points to the app's presets")
+    args = parser.parse_args(argv)
+
+    grid = default_grid(
+        tuple(int(q) for q in args.qualities.split(",")),
+        tuple(f.strip().upper() for f in args.formats.split(",")),
+    )
+    report = run(args.corpus, args.sample, grid, args.workers, args.out)
+
+    for r in report["configs"]:
+        mark = "*" if r["pareto"] else " "
+        print(f"{mark} {r['label']:<32} {r['ratio'] * 100:6.1f}%  SSIM {r['ssim_mean']:.4f}  {r['seconds']:7.2f} s")
+    print(f"Report: {os.path.join(args.out, 'report.html')}")
+
+    if args.save_presets:
+        from core.presets import save_presets
+        if save_presets(report["presets"]):
+            print(f"Saved {len(report['presets'])} preset(s) for the Compress tab.")
+        else:
+            print("PySide6 is not installed here; import report.json from the Compress tab instead.")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    multiprocessing.set_start_method("spawn", force=True)
+    main()
@@ -0,0 +1,135 @@
+"""
+bench/upload.py — Upload throughput benchmark against a local fake Immich server.
+
+The server runs in its own process, answers POST /api/assets after a fixed
+latency (simulating the network round trip and server-side processing) and
+reports every 10th file as a duplicate (409), like a re-run would. The
+uploaded files come from the bench.corpus corpus.
+
+    python -m bench.upload [--workers 2,10] [--latency-ms 0,50] [--trials 3] [--record]
+
+Metrics per case: uploads_per_s, mb_per_s, ttfr_s and peak_rss_mb (this
+process, i.e. the upload threads), with repeated trials as in
+bench.compress.
+"""
+
+import argparse
+import http.server
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+
+from bench.compress import PeakRss, _corpus_files, _csv, add_arguments, finish
+from bench.corpus   import generate
+from bench.history  import summarize_trials
+from core.immich    import UploadJob
+
+METRICS = {
+    "uploads_per_s": "higher",
+    "mb_per_s":      "higher",
+    "ttfr_s":        "lower",
+    "peak_rss_mb":   "lower",
+}
+
+
+class _FakeImmich(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, status: int, body: bytes = b"{}"):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(200, b'{"version": "bench"}')
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.latency:
+            time.sleep(self.latency)
+        # Deterministic ~10 % duplicates, keyed on the multipart body
+        self._reply(409 if zlib.crc32(body[-4096:]) % 10 == 0 else 201)
+
+
+def _serve(conn, latency: float):
+    """Server process: report the bound port, then serve until killed."""
+    handler = type("Handler", (_FakeImmich,), {"latency": latency})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    conn.send(server.server_address[1])
+    server.serve_forever()
+
+
+def run_case(workers: int, latency_ms: int, files: list[str], total_bytes: int) -> dict:
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(child, latency_ms / 1000), daemon=True)
+    server.start()
+    try:
+        url = f"http://127.0.0.1:{parent.recv()}"
+        first, failed = None, 0
+        # Only this process: the fake server is a child but not part of the uploader
+        with PeakRss(children=False) as rss:
+            started = time.perf_counter()
+            for _, label, _ in UploadJob([], url, "bench", workers=workers).stream(files):
+                if first is None:
+                    first = time.perf_counter() - started
+                failed += label not in ("uploaded", "duplicate (skipped)")
+            seconds = time.perf_counter() - started
+    finally:
+        server.kill()
+        server.join()
+
+    return {
+        "uploads_per_s": round(len(files) / seconds, 3),
+        "mb_per_s":      round(total_bytes / 2**20 / seconds, 3),
+        "ttfr_s":        round(first, 4) if first is not None else None,
+        "peak_rss_mb":   round(rss.peak / 2**20, 1),
+        "failed":        failed,
+    }
+
+
+def run(matrix: list[tuple[int, int]], files: list[str], params: dict, trials: int) -> dict:
+    total_bytes = sum(os.path.getsize(p) for p in files)
+    results = {case: [] for case in matrix}
+    for trial in range(trials):
+        for workers, latency_ms in matrix:
+            m = run_case(workers, latency_ms, files, total_bytes)
+            results[(workers, latency_ms)].append(m)
+            print(f"[{trial + 1}/{trials}] x{workers:<3} {latency_ms:>4} ms  {m['uploads_per_s']:8.2f} uploads/s "
+                  f"{m['mb_per_s']:7.2f} MB/s  first {m['ttfr_s']} s  peak {m['peak_rss_mb']} MB",
+                  file=sys.stderr, flush=True)
+    return {
+        "suite":   "upload",
+        "params":  {**params, "files": len(files), "trials": trials},
+        "metrics": METRICS,
+        "cases": [
+            {"key": {"workers": w, "latency_ms": l}, "trials": ts, "summary": summarize_trials(ts, METRICS)}
+            for (w, l), ts in results.items()
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.upload", description="Benchmark Immich upload throughput.")
+    add_arguments(parser)
+    parser.add_argument("--workers", default="2,10", help="upload thread counts to try (default: 2,10)")
+    parser.add_argument("--latency-ms", default="0,50", help="server latencies to simulate (default: 0,50)")
+    args = parser.parse_args(argv)
+
+    manifest = generate(args.corpus, args.count, args.seed, args.scale)
+    matrix = [(int(w), int(l)) for w in _csv(args.workers) for l in _csv(args.latency_ms)]
+    finish(run(matrix, _corpus_files(args.corpus), {"corpus": manifest["params"]}, max(1, args.trials)), args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    multiprocessing.set_start_method("spawn", force=True)
+    main()
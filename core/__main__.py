@@ -0,0 +1,363 @@
+"""
+core/__main__.py — Headless command line for servers, NAS boxes and cron jobs.
+
+    python -m core compress SOURCE OUTPUT [--format WEBP] [--upload]
+    python -m core upload PATH [PATH…]
+    python -m core estimate SOURCE
+
+Nothing here imports PySide6, and the compression / upload modules are only
+imported by the subcommand that needs them, so `--help` returns at once.
+Progress is written to stdout as one JSON object per line, e.g.
+
+    {"event": "file_done", "file": "IMG_1.jpg", "ok": true, "output": "…"}
+    {"event": "progress", "percent": 40}
+    {"event": "done", "ok": 10, "failed": 0, "seconds": 3.2}
+
+A "timing" event before "done" carries per-stage statistics (see
+core.timing); --trace PATH also writes a Chrome / Perfetto trace, and
+--report PATH (.csv or .jsonl) a per-file report (see core.report).
+compress --memory-profile samples the RSS of this process and the workers
+and ends with a "memory" event (see core.memory). Uploads end with an
+"upload_connections" event: HTTP connections opened, requests sent, how
+many went over an open connection, and retries (--upload-retries).
+
+compress --upload uploads every file as soon as it is compressed; the
+"done" event of the compression then comes before the last uploads
+finish, and "backpressure" events report compression being held back
+while the upload backlog is over --backlog-files / --backlog-mb.
+--sequential-upload uploads only after the whole run instead.
+With --local-copies failed / none the images go from the workers to the
+upload in memory (within --memory-budget-mb) and only the failed uploads,
+or nothing, are written to OUTPUT.
+
+The Immich server and API key come from --server / --api-key or the
+IMMICH_SERVER / IMMICH_API_KEY environment variables.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+# compress --upload uploads on a second thread; keep their lines whole
+_emit_lock = threading.Lock()
+
+
+def _emit(event: str, **fields):
+    line = json.dumps({"event": event, **fields})
+    with _emit_lock:
+        print(line, flush=True)
+
+
+def _parse_date(text: str):
+    import datetime
+    return datetime.date.fromisoformat(text)
+
+
+def _immich_target(args) -> tuple[str, str]:
+    server = args.server or os.environ.get("IMMICH_SERVER", "")
+    key    = args.api_key or os.environ.get("IMMICH_API_KEY", "")
+    if not server or not key:
+        raise SystemExit("an Immich server and API key are required (--server/--api-key or IMMICH_SERVER/IMMICH_API_KEY)")
+    return server, key
+
+
+def _upload(files, server: str, api_key: str, trace_path: str | None = None, report=None,
+            keep_failed: bool = False, retries: int = 3) -> int:
+    """Upload `files` (a FileList, list of paths or UploadBacklog), emitting events; returns the number of failures."""
+    from core.immich import UploadJob
+
+    failed = 0
+    job = UploadJob(files, server, api_key, trace_path=trace_path, report=report,
+                    keep_failed=keep_failed, retries=retries)
+    for kind, *payload in job.events():
+        if kind == "file_done":
+            filename, label = payload
+            ok = label in ("uploaded", "duplicate (skipped)")
+            failed += not ok
+            _emit("upload_done", file=filename, ok=ok, status=label)
+        elif kind == "log":
+            message, is_error = payload
+            _emit("log", message=message, error=is_error)
+        elif kind == "timing":
+            _emit("upload_timing", stages=payload[0])
+        elif kind == "connections":
+            _emit("upload_connections", **payload[0])
+        else:
+            _emit("upload_progress", percent=payload[0])
+    return failed
+
+
+# ── Subcommands ──────────────────────────────────────────────────────────────
+def cmd_compress(args) -> int:
+    from core.filelist import FileList
+    from core.pipeline import CompressionJob
+    from core.streams  import UploadBacklog
+
+    if args.upload:
+        server, api_key = _immich_target(args)
+    date_range = None
+    if args.since or args.until:
+        import datetime
+        date_range = (args.since or datetime.date(1900, 1, 1), args.until or datetime.date.today())
+
+    report = _open_report(args.report)
+    backlog, uploader, upload_failed, sink = None, None, [], None
+    in_memory = args.upload and not args.archive and args.local_copies != "all"
+    if in_memory or (args.upload and not args.archive and not args.sequential_upload):
+        def pressure(full: bool):
+            job.throttle(full)
+            files, size = backlog.pending
+            _emit("backpressure", paused=full, pending_files=files, pending_bytes=size)
+
+        budget_mb = args.memory_budget_mb if in_memory else args.backlog_mb
+        backlog = UploadBacklog(args.backlog_files, budget_mb * 1024 * 1024, on_pressure=pressure)
+        if in_memory:
+            sink = lambda src, out_path, data: backlog.put(out_path, data=data, source=src)
+        uploader = threading.Thread(
+            target=lambda: upload_failed.append(
+                _upload(backlog, server, api_key, _sibling(args.trace, "upload"), report,
+                        keep_failed=args.local_copies == "failed", retries=args.upload_retries)),
+            daemon=True,
+        )
+    memory = None
+    if args.memory_profile:
+        from core.memory import MemorySampler
+        memory = MemorySampler()
+        memory.watch("app", lambda: [os.getpid()])
+        memory.start()
+    try:
+        job = CompressionJob(
+            args.source, args.output,
+            output_format=args.format,
+            jpeg_quality=args.quality,
+            png_compression=args.png_compression,
+            preserve_exif=not args.strip_exif,
+            adaptive_quality=args.adaptive,
+            png_quantize=args.quantize,
+            png_colors=args.png_colors,
+            jpeg_subsampling=args.subsampling,
+            jpeg_progressive=args.progressive,
+            max_tasks_per_child=args.max_tasks_per_child,
+            task_timeout=args.task_timeout,
+            output_layout=args.layout,
+            archive_path=args.archive,
+            read_ahead_mb=args.read_ahead_mb,
+            background=args.background,
+            date_range=date_range,
+            dedupe=args.dedupe,
+            trace_path=args.trace,
+            report=report,
+            memory=memory,
+            sink=sink,
+            on_status=lambda msg: _emit("status", message=msg),
+        )
+
+        started = time.monotonic()
+        outputs, failed = FileList(), 0
+        if uploader:
+            uploader.start()
+        for kind, *payload in job.events():
+            if kind == "file_done":
+                filename, ok, out_path, err, _ = payload
+                _emit("file_done", file=filename, ok=ok, output=out_path, error=err or None)
+                if ok:
+                    outputs.append(out_path)
+                    if backlog is not None and sink is None:
+                        backlog.put(out_path)
+                else:
+                    failed += 1
+            elif kind == "scanned":
+                _emit("scanned", total=payload[0], skipped=payload[1])
+            elif kind == "duplicates":
+                _emit("duplicates", clusters=[{"kept": k, "duplicates": d} for k, d in payload[0]])
+            elif kind == "timing":
+                _emit("timing", stages=payload[0])
+            else:
+                _emit("progress", percent=payload[0])
+        _emit("done", ok=len(outputs), failed=failed, seconds=round(time.monotonic() - started, 3))
+
+        if args.upload:
+            if args.archive:
+                _emit("log", message="--upload is ignored with --archive", error=True)
+            elif uploader:
+                backlog.close()
+                uploader.join()
+                failed += upload_failed[0] if upload_failed else 1
+            else:
+                failed += _upload(outputs, server, api_key, _sibling(args.trace, "upload"), report,
+                                  retries=args.upload_retries)
+        return 1 if failed else 0
+    finally:
+        if backlog is not None:
+            # Interrupted: let the (daemon) upload thread run out
+            backlog.close()
+        if memory:
+            memory.close()
+            snap = memory.snapshot()
+            summary = {
+                "peaks":     {g: v["peak"] for g, v in snap["groups"].items()},
+                "total_peak": snap["total_peak"],
+                "top_files": [{"file": f, "peak": p, "stage": st} for p, f, st in snap["top_files"]],
+            }
+            _emit("memory", **summary)
+            if report and not report.error:
+                report.add({"record": "memory", "memory": summary})
+        _close_report(report)
+
+
+def cmd_upload(args) -> int:
+    from core.filelist import FileList, walk
+    from core.imaging  import OUTPUT_EXTENSIONS, VALID_IMAGE_EXTENSIONS
+
+    server, api_key = _immich_target(args)
+    extensions = set(VALID_IMAGE_EXTENSIONS) | {"." + ext for ext in OUTPUT_EXTENSIONS.values()}
+    files = FileList()
+    for path in args.paths:
+        if os.path.isdir(path):
+            for root, name, _ in walk(path, extensions):
+                files.add(root, name)
+        else:
+            files.append(path)
+    started = time.monotonic()
+    report = _open_report(args.report)
+    try:
+        failed = _upload(files, server, api_key, args.trace, report, retries=args.upload_retries)
+    finally:
+        _close_report(report)
+    _emit("done", ok=len(files) - failed, failed=failed, seconds=round(time.monotonic() - started, 3))
+    return 1 if failed else 0
+
+
+def cmd_estimate(args) -> int:
+    from core.pipeline import estimate_compressed_size
+
+    est_bytes, count = estimate_compressed_size(
+        args.source, args.format, args.quality, args.png_compression,
+        adaptive_quality=args.adaptive, png_quantize=args.quantize,
+    )
+    _emit("estimate", files=count, estimated_bytes=est_bytes)
+    return 0
+
+
+# ── Argument parsing ─────────────────────────────────────────────────────────
+def _add_encoder_args(p: argparse.ArgumentParser):
+    p.add_argument("--format", default="JPEG", type=str.upper,
+                   choices=("JPEG", "PNG", "WEBP", "AUTO"), help="output format (default: JPEG)")
+    p.add_argument("--quality", type=int, default=85, help="JPEG / WebP quality 1-100 (default: 85)")
+    p.add_argument("--png-compression", type=int, default=6, help="PNG zlib level 0-9 (default: 6)")
+    p.add_argument("--adaptive", action="store_true", help="pick JPEG quality per image")
+    p.add_argument("--quantize", action="store_true", help="quantize PNGs to a palette")
+
+
+def _add_immich_args(p: argparse.ArgumentParser):
+    p.add_argument("--server", help="Immich server URL (default: $IMMICH_SERVER)")
+    p.add_argument("--api-key", help="Immich API key (default: $IMMICH_API_KEY)")
+    p.add_argument("--upload-retries", type=int, default=3,
+                   help="retries per upload on connection errors and 429/502/503/504 responses (default: 3)")
+
+
+def _add_trace_arg(p: argparse.ArgumentParser):
+    p.add_argument("--trace", metavar="PATH", help="write a Chrome / Perfetto timing trace of the run here")
+    p.add_argument("--report", metavar="PATH", help="stream a per-file report to this .csv / .jsonl file")
+
+
+def _open_report(path: str | None):
+    """A started RunReport for --report, or None."""
+    if not path:
+        return None
+    from core.report import RunReport
+
+    try:
+        report = RunReport(path)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    report.start()
+    return report
+
+
+def _close_report(report):
+    if not report:
+        return
+    try:
+        report.close()
+        _emit("report", path=report.path, rows=report.rows)
+    except Exception as exc:
+        _emit("log", message=f"run report incomplete: {exc}", error=True)
+
+
+def _sibling(path: str | None, kind: str) -> str | None:
+    """trace.json → trace_upload.json, for the upload that follows a compress run."""
+    if not path:
+        return None
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_{kind}{ext or '.json'}"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m core", description="Compress and upload images without the GUI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("compress", help="compress a folder of images")
+    p.add_argument("source")
+    p.add_argument("output", help="output folder")
+    _add_encoder_args(p)
+    p.add_argument("--png-colors", type=int, default=256)
+    p.add_argument("--subsampling", type=int, default=-1, choices=(-1, 0, 1, 2),
+                   help="JPEG chroma subsampling: 0 = 4:4:4, 1 = 4:2:2, 2 = 4:2:0 (default: encoder default)")
+    p.add_argument("--progressive", action="store_true", help="write progressive JPEGs")
+    p.add_argument("--strip-exif", action="store_true", help="drop EXIF metadata")
+    p.add_argument("--layout", default="flat", choices=("flat", "mirror", "sharded"))
+    p.add_argument("--archive", help="write one .zip / .tar at this path instead of files")
+    p.add_argument("--since", type=_parse_date, help="only images captured on or after YYYY-MM-DD")
+    p.add_argument("--until", type=_parse_date, help="only images captured on or before YYYY-MM-DD")
+    p.add_argument("--dedupe", default="off", choices=("off", "flag", "skip"), help="burst-shot handling")
+    p.add_argument("--read-ahead-mb", type=int, default=128)
+    p.add_argument("--max-tasks-per-child", type=int, default=200)
+    p.add_argument("--task-timeout", type=int, default=300)
+    p.add_argument("--background", action="store_true", help="run workers at low CPU / I/O priority")
+    p.add_argument("--memory-profile", action="store_true", help="sample memory use and report per-file peaks")
+    p.add_argument("--upload", action="store_true", help="upload the compressed files to Immich as they complete")
+    p.add_argument("--sequential-upload", action="store_true", help="with --upload, upload only after the whole run")
+    p.add_argument("--backlog-files", type=int, default=500,
+                   help="hold compression back while this many files wait for upload (0 = no limit, default: 500)")
+    p.add_argument("--backlog-mb", type=int, default=2048,
+                   help="…or while they take up this many MB (0 = no limit, default: 2048)")
+    p.add_argument("--local-copies", default="all", choices=("all", "failed", "none"),
+                   help="with --upload, write every compressed file (default), or upload straight from "
+                        "memory and write only the failed uploads / nothing")
+    p.add_argument("--memory-budget-mb", type=int, default=512,
+                   help="with --local-copies failed/none, hold compression back while the images waiting "
+                        "for or in upload take up this many MB (default: 512)")
+    _add_immich_args(p)
+    _add_trace_arg(p)
+    p.set_defaults(func=cmd_compress)
+
+    p = sub.add_parser("upload", help="upload files or folders to Immich")
+    p.add_argument("paths", nargs="+")
+    _add_immich_args(p)
+    _add_trace_arg(p)
+    p.set_defaults(func=cmd_upload)
+
+    p = sub.add_parser("estimate", help="estimate the compressed size of a folder")
+    p.add_argument("source")
+    _add_encoder_args(p)
+    p.set_defaults(func=cmd_estimate)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    multiprocessing.set_start_method("spawn", force=True)
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,114 @@
+"""
+core/archive.py — Single-file archive sink for compressed images.
+One writer thread appends encoded images to a .zip (stored) or .tar archive,
+so a run produces one big sequential write instead of many small files.
+"""
+
+import io
+import os
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+
+# archive extension → display label
+ARCHIVE_FORMATS = {
+    ".zip": "ZIP archive (stored)",
+    ".tar": "TAR archive",
+}
+
+
+class ArchiveWriter(threading.Thread):
+    """
+    Background writer fed through a bounded queue.
+
+    The archive is written to `<path>.partial` and renamed onto `path` only by
+    finish(), so a finished archive is never half-written. Each member is
+    flushed as soon as it is written: a .tar is readable up to the last
+    complete member at any time, and every .zip member carries its sizes and
+    CRC in the local header so streaming readers can recover a partial file.
+
+    add() blocks while the queue is full, which in turn stops the compressor
+    from dispatching more work than the disk can absorb.
+    """
+
+    def __init__(self, path: str, max_queued: int = 32):
+        super().__init__(daemon=True)
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unsupported archive type: {ext or path}")
+        self.path         = path
+        self.partial_path = path + ".partial"
+        self._kind        = ext
+        self._queue       = queue.Queue(maxsize=max_queued)
+        self.error: Exception | None = None
+        self._ended       = False   # finish()'s end marker was taken
+        self.members      = 0
+        self.bytes_written = 0
+
+    # ── Producer side ─────────────────────────────────────────────────────────
+    def add(self, name: str, data: bytes):
+        """Queue one member; raises if the writer thread has failed."""
+        if self.error:
+            raise self.error
+        self._queue.put((name, data))
+
+    def finish(self, keep_partial: bool = False):
+        """
+        Drain the queue, close the archive and move it into place.
+        With keep_partial (e.g. on cancel) the closed archive stays at
+        `<path>.partial` so it is not mistaken for a complete run.
+        """
+        self._queue.put(None)
+        self.join()
+        if self.error:
+            raise self.error
+        if not keep_partial:
+            os.replace(self.partial_path, self.path)
+
+    # ── Writer thread ─────────────────────────────────────────────────────────
+    def run(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            if self._kind == ".zip":
+                self._write_zip()
+            else:
+                self._write_tar()
+        except Exception as exc:
+            self.error = exc
+            # Keep consuming so producers blocked in add() are released
+            while not self._ended and self._queue.get() is not None:
+                pass
+
+    def _items(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._ended = True
+                return
+            yield item
+
+    def _write_zip(self):
+        with open(self.partial_path, "wb") as fh, \
+                zipfile.ZipFile(fh, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for name, data in self._items():
+                info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                zf.writestr(info, data)
+                fh.flush()
+                self.members += 1
+                self.bytes_written += len(data)
+
+    def _write_tar(self):
+        with open(self.partial_path, "wb") as fh, \
+                tarfile.open(fileobj=fh, mode="w", format=tarfile.PAX_FORMAT) as tf:
+            for name, data in self._items():
+                info = tarfile.TarInfo(name)
+                info.size  = len(data)
+                info.mtime = int(time.time())
+                info.mode  = 0o644
+                tf.addfile(info, io.BytesIO(data))
+                fh.flush()
+                self.members += 1
+                self.bytes_written += len(data)
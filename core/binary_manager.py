@@ -13,6 +13,8 @@ import requests
 
 from PySide6.QtCore import QThread, Signal
 
+from core.priority import lower_priority, suspend_process, resume_process
+
 
 GITHUB_API_URL = "https://api.github.com/repos/simulot/immich-go/releases/latest"
 
@@ -133,16 +135,22 @@ class DownloadBinaryThread(QThread):
 
 
 class RunCommandThread(QThread):
-    """Runs an immich-go command and streams its output dynamically."""
+    """
+    Runs an immich-go command and streams its output dynamically.
+    pause() / resume() stop and continue the whole process tree; with
+    `background` the child runs at low CPU and I/O priority.
+    """
 
     output_line       = Signal(str, bool)  # (line, is_stderr)
     process_done      = Signal(int)        # return code
     log_file_detected = Signal(str)        # emits path to immich-go's log file
 
-    def __init__(self, cmd: list[str], parent=None):
+    def __init__(self, cmd: list[str], background: bool = False, parent=None):
         super().__init__(parent)
         self._cmd = cmd
         self._proc = None
+        self._background = background
+        self._paused = False
 
     def run(self):
         import subprocess
@@ -170,6 +178,10 @@ class RunCommandThread(QThread):
                 errors="replace",
                 **kwargs
             )
+            if self._background:
+                lower_priority(self._proc.pid)
+            if self._paused:
+                suspend_process(self._proc.pid, group=True)
 
             import threading
             
@@ -203,12 +215,31 @@ class RunCommandThread(QThread):
             self.output_line.emit(f"[ERROR] {exc}", True)
             self.process_done.emit(-1)
 
+    @property
+    def pid(self) -> int | None:
+        """The running immich-go process, if any."""
+        if self._proc and self._proc.poll() is None:
+            return self._proc.pid
+        return None
+
+    def pause(self):
+        self._paused = True
+        if self._proc and self._proc.poll() is None:
+            suspend_process(self._proc.pid, group=True)
+
+    def resume(self):
+        self._paused = False
+        if self._proc and self._proc.poll() is None:
+            resume_process(self._proc.pid, group=True)
+
     def terminate_process(self):
         import subprocess
         import signal
         import os
         import sys
 
+        if self._paused:
+            self.resume()  # a stopped process never acts on SIGTERM
         if self._proc and self._proc.poll() is None:
             try:
                 # Terminate the process group to ensure spawned children are also killed
@@ -2,6 +2,8 @@
 core/config.py — QSettings-based configuration for RaidCloud Immich Suite.
 """
 
+import json
+
 from PySide6.QtCore import QSettings
 
 
@@ -72,6 +74,154 @@ class AppConfig:
     def preserve_exif(self, v: bool):
         self._s.setValue("compression/preserve_exif", v)
 
+    @property
+    def adaptive_quality(self) -> bool:
+        val = self._s.value("compression/adaptive_quality", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @adaptive_quality.setter
+    def adaptive_quality(self, v: bool):
+        self._s.setValue("compression/adaptive_quality", v)
+
+    @property
+    def png_quantize(self) -> bool:
+        val = self._s.value("compression/png_quantize", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @png_quantize.setter
+    def png_quantize(self, v: bool):
+        self._s.setValue("compression/png_quantize", v)
+
+    @property
+    def png_colors(self) -> int:
+        return int(self._s.value("compression/png_colors", 256))
+
+    @png_colors.setter
+    def png_colors(self, v: int):
+        self._s.setValue("compression/png_colors", v)
+
+    @property
+    def png_dither(self) -> bool:
+        val = self._s.value("compression/png_dither", True)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @png_dither.setter
+    def png_dither(self, v: bool):
+        self._s.setValue("compression/png_dither", v)
+
+    @property
+    def jpeg_subsampling(self) -> int:
+        return int(self._s.value("compression/jpeg_subsampling", -1))
+
+    @jpeg_subsampling.setter
+    def jpeg_subsampling(self, v: int):
+        self._s.setValue("compression/jpeg_subsampling", v)
+
+    @property
+    def jpeg_progressive(self) -> bool:
+        val = self._s.value("compression/jpeg_progressive", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @jpeg_progressive.setter
+    def jpeg_progressive(self, v: bool):
+        self._s.setValue("compression/jpeg_progressive", v)
+
+    @property
+    def presets(self) -> dict:
+        # name → {compress option: value}, stored as JSON; see core.presets
+        try:
+            return json.loads(self._s.value("compression/presets", "{}", str))
+        except ValueError:
+            return {}
+
+    @presets.setter
+    def presets(self, v: dict):
+        self._s.setValue("compression/presets", json.dumps(v))
+
+    @property
+    def max_tasks_per_child(self) -> int:
+        return int(self._s.value("compression/max_tasks_per_child", 200))
+
+    @max_tasks_per_child.setter
+    def max_tasks_per_child(self, v: int):
+        self._s.setValue("compression/max_tasks_per_child", v)
+
+    @property
+    def task_timeout(self) -> int:
+        return int(self._s.value("compression/task_timeout", 300))
+
+    @task_timeout.setter
+    def task_timeout(self, v: int):
+        self._s.setValue("compression/task_timeout", v)
+
+    @property
+    def output_layout(self) -> str:
+        return self._s.value("compression/output_layout", "flat", str)
+
+    @output_layout.setter
+    def output_layout(self, v: str):
+        self._s.setValue("compression/output_layout", v)
+
+    @property
+    def output_sink(self) -> str:
+        return self._s.value("compression/output_sink", "folder", str)
+
+    @output_sink.setter
+    def output_sink(self, v: str):
+        self._s.setValue("compression/output_sink", v)
+
+    @property
+    def read_ahead_mb(self) -> int:
+        return int(self._s.value("compression/read_ahead_mb", 128))
+
+    @read_ahead_mb.setter
+    def read_ahead_mb(self, v: int):
+        self._s.setValue("compression/read_ahead_mb", v)
+
+    @property
+    def date_filter(self) -> bool:
+        val = self._s.value("compression/date_filter", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @date_filter.setter
+    def date_filter(self, v: bool):
+        self._s.setValue("compression/date_filter", v)
+
+    @property
+    def date_start(self) -> str:
+        return self._s.value("compression/date_start", "2000-01-01", str)
+
+    @date_start.setter
+    def date_start(self, v: str):
+        self._s.setValue("compression/date_start", v)
+
+    @property
+    def date_end(self) -> str:
+        # Empty means "today" so a saved filter does not silently freeze its end date
+        return self._s.value("compression/date_end", "", str)
+
+    @date_end.setter
+    def date_end(self, v: str):
+        self._s.setValue("compression/date_end", v)
+
+    @property
+    def dedupe_mode(self) -> str:
+        return self._s.value("compression/dedupe_mode", "off", str)
+
+    @dedupe_mode.setter
+    def dedupe_mode(self, v: str):
+        self._s.setValue("compression/dedupe_mode", v)
+
     # ── Paths ─────────────────────────────────────────────────────────────────
     @property
     def last_source_folder(self) -> str:
@@ -133,6 +283,162 @@ class AppConfig:
     def recursive_upload(self, v: bool):
         self._s.setValue("advanced/recursive_upload", v)
 
+    @property
+    def background_priority(self) -> bool:
+        val = self._s.value("advanced/background_priority", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @background_priority.setter
+    def background_priority(self, v: bool):
+        self._s.setValue("advanced/background_priority", v)
+
+    @property
+    def trace_enabled(self) -> bool:
+        val = self._s.value("advanced/trace_enabled", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @trace_enabled.setter
+    def trace_enabled(self, v: bool):
+        self._s.setValue("advanced/trace_enabled", v)
+
+    @property
+    def memory_profiling(self) -> bool:
+        val = self._s.value("advanced/memory_profiling", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @memory_profiling.setter
+    def memory_profiling(self, v: bool):
+        self._s.setValue("advanced/memory_profiling", v)
+
+    @property
+    def memory_tracemalloc(self) -> bool:
+        val = self._s.value("advanced/memory_tracemalloc", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @memory_tracemalloc.setter
+    def memory_tracemalloc(self, v: bool):
+        self._s.setValue("advanced/memory_tracemalloc", v)
+
+    @property
+    def stall_threshold_ms(self) -> int:
+        """GUI event-loop stalls longer than this are logged (see core.stall); 0 = off."""
+        return int(self._s.value("advanced/stall_threshold_ms", 50))
+
+    @stall_threshold_ms.setter
+    def stall_threshold_ms(self, v: int):
+        self._s.setValue("advanced/stall_threshold_ms", v)
+
+    @property
+    def report_format(self) -> str:
+        """Run report extension (".csv" / ".jsonl", see core.report), or "" for none."""
+        return self._s.value("advanced/report_format", ".csv", str)
+
+    @report_format.setter
+    def report_format(self, v: str):
+        self._s.setValue("advanced/report_format", v)
+
+    # ── Overlapped upload ─────────────────────────────────────────────────────
+    @property
+    def upload_overlap(self) -> bool:
+        """Upload each file as soon as it is compressed (see core.streams.UploadBacklog)."""
+        val = self._s.value("upload/overlap", True)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @upload_overlap.setter
+    def upload_overlap(self, v: bool):
+        self._s.setValue("upload/overlap", v)
+
+    @property
+    def upload_backlog_files(self) -> int:
+        return int(self._s.value("upload/backlog_files", 500))
+
+    @upload_backlog_files.setter
+    def upload_backlog_files(self, v: int):
+        self._s.setValue("upload/backlog_files", v)
+
+    @property
+    def upload_backlog_mb(self) -> int:
+        return int(self._s.value("upload/backlog_mb", 2048))
+
+    @upload_backlog_mb.setter
+    def upload_backlog_mb(self, v: int):
+        self._s.setValue("upload/backlog_mb", v)
+
+    @property
+    def upload_retries(self) -> int:
+        """Transport retries per upload for failed connects and 429 / 502 / 503 / 504 responses."""
+        return int(self._s.value("upload/retries", 3))
+
+    @upload_retries.setter
+    def upload_retries(self, v: int):
+        self._s.setValue("upload/retries", v)
+
+    @property
+    def upload_local_copies(self) -> str:
+        """Keep "all" compressed files, only "failed" uploads, or "none" (both upload from memory)."""
+        return self._s.value("upload/local_copies", "all", str)
+
+    @upload_local_copies.setter
+    def upload_local_copies(self, v: str):
+        self._s.setValue("upload/local_copies", v)
+
+    @property
+    def upload_memory_mb(self) -> int:
+        return int(self._s.value("upload/memory_mb", 512))
+
+    @upload_memory_mb.setter
+    def upload_memory_mb(self, v: int):
+        self._s.setValue("upload/memory_mb", v)
+
+    # ── Distributed compression ───────────────────────────────────────────────
+    @property
+    def distributed_enabled(self) -> bool:
+        val = self._s.value("distributed/enabled", False)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @distributed_enabled.setter
+    def distributed_enabled(self, v: bool):
+        self._s.setValue("distributed/enabled", v)
+
+    @property
+    def distributed_port(self) -> int:
+        return int(self._s.value("distributed/port", 47800))
+
+    @distributed_port.setter
+    def distributed_port(self, v: int):
+        self._s.setValue("distributed/port", v)
+
+    @property
+    def distributed_secret(self) -> str:
+        return self._s.value("distributed/secret", "", str)
+
+    @distributed_secret.setter
+    def distributed_secret(self, v: str):
+        self._s.setValue("distributed/secret", v)
+
+    @property
+    def distributed_stream(self) -> bool:
+        val = self._s.value("distributed/stream", True)
+        if isinstance(val, str):
+            return val.lower() == "true"
+        return bool(val)
+
+    @distributed_stream.setter
+    def distributed_stream(self, v: bool):
+        self._s.setValue("distributed/stream", v)
+
     # ── Helpers ───────────────────────────────────────────────────────────────
     def sync(self):
         """Force flush to disk."""
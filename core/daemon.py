@@ -0,0 +1,379 @@
+"""
+core/daemon.py — Long-running compression service for scripts and other tools.
+
+Keeps a warm WorkerPool (processes started and Pillow / NumPy imported up
+front) and serves a small HTTP API on a Unix domain socket and/or a
+localhost port:
+
+    python -m core.daemon --socket /tmp/raidcloud.sock --port 47900
+
+    GET  /health
+    POST /compress?name=IMG_1.jpg&format=WEBP     raw image bytes in, encoded bytes out
+    POST /compress   {"paths": [...], "output_dir": "...", "options": {...}}
+    POST /compress   {"items": [{"name": "a.png", "data": "<base64>"}, ...]}
+
+JSON requests are batches: their items go to the pool together, and items
+from concurrent requests share it as workers free up. Without "output_dir"
+the encoded images come back base64-encoded. Options default to the app's
+saved compression settings; any compress_options() key can be overridden
+per request.
+
+    curl --unix-socket /tmp/raidcloud.sock --data-binary @a.jpg \\
+         -o a_small.jpg "http://localhost/compress?name=a.jpg"
+"""
+
+import argparse
+import base64
+import collections
+import concurrent.futures
+import http.server
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+import threading
+import urllib.parse
+from multiprocessing import shared_memory
+
+from core.imaging     import OUTPUT_EXTENSIONS, _compress_worker, compress_options
+from core.layout      import OutputLayout
+from core.worker_pool import WorkerPool
+
+DEFAULT_PORT = 47900
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+# Option keys a request may override, with the type each is parsed as
+_OPTION_TYPES = {
+    "format":           str,
+    "jpeg_quality":     int,
+    "png_compression":  int,
+    "preserve_exif":    bool,
+    "adaptive_quality": bool,
+    "png_quantize":     bool,
+    "png_colors":       int,
+    "png_dither":       bool,
+    "jpeg_subsampling": int,
+    "jpeg_progressive": bool,
+}
+
+
+def _preload():
+    """Pool initializer: pay the Pillow / NumPy import cost before the first request."""
+    import core.imaging  # noqa: F401
+
+
+def saved_options() -> dict:
+    """compress_options() from the app's saved settings, or defaults when Qt is unavailable."""
+    try:
+        from core.config import AppConfig
+    except ImportError:
+        return compress_options()
+    c = AppConfig()
+    return compress_options(
+        c.output_format, c.jpeg_quality, c.png_compression, c.preserve_exif,
+        c.adaptive_quality, False, c.png_quantize, c.png_colors, c.png_dither,
+        c.jpeg_subsampling, c.jpeg_progressive,
+    )
+
+
+def _parse_options(base: dict, overrides: dict) -> dict:
+    options = dict(base)
+    for key, value in overrides.items():
+        kind = _OPTION_TYPES.get(key)
+        if kind is None:
+            raise ValueError(f"unknown option {key!r}")
+        if kind is bool and isinstance(value, str):
+            value = value.lower() in ("1", "true", "yes")
+        options[key] = kind(value)
+    options["format"] = options["format"].upper()
+    if options["format"] not in OUTPUT_EXTENSIONS and options["format"] != "AUTO":
+        raise ValueError(f"unknown format {options['format']!r}")
+    return options
+
+
+def _parse_batch(base: dict, req) -> tuple[dict, list[str] | None, list[tuple[str, bytes]] | None, str | None]:
+    """
+    Validate a JSON batch request; returns (options, paths, items, output_dir)
+    with one of paths / items set. Raises ValueError for a malformed request.
+    """
+    if not isinstance(req, dict):
+        raise ValueError("request body must be a JSON object")
+    overrides = req.get("options") or {}
+    if not isinstance(overrides, dict):
+        raise ValueError('"options" must be an object')
+    options = _parse_options(base, overrides)
+    output_dir = req.get("output_dir")
+    if output_dir is not None and not isinstance(output_dir, str):
+        raise ValueError('"output_dir" must be a string')
+
+    if "paths" in req:
+        paths = req["paths"]
+        if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+            raise ValueError('"paths" must be a list of strings')
+        return options, paths, None, output_dir
+
+    raw = req.get("items", [])
+    if not isinstance(raw, list):
+        raise ValueError('"items" must be a list')
+    items = []
+    for i, item in enumerate(raw):
+        if not isinstance(item, dict) or not isinstance(item.get("data"), str):
+            raise ValueError(f'items[{i}] must be an object with base64 "data"')
+        name = item.get("name", "image")
+        if not isinstance(name, str):
+            raise ValueError(f'items[{i}] "name" must be a string')
+        try:
+            items.append((name, base64.b64decode(item["data"], validate=True)))
+        except ValueError as exc:
+            raise ValueError(f'items[{i}] "data" is not valid base64: {exc}') from None
+    return options, None, items, output_dir
+
+
+class CompressionService:
+    """
+    Owns the warm pool. One dispatcher thread runs a single, never-ending
+    WorkerPool.imap_unordered() over a shared queue; submit() may be called
+    from any thread and returns a Future for the worker result tuple.
+    """
+
+    def __init__(self, workers: int | None = None, max_tasks_per_child: int = 200, task_timeout: int = 300):
+        self._pool = WorkerPool(
+            workers or min(4, os.cpu_count() or 1),
+            max_tasks_per_child=max_tasks_per_child,
+            task_timeout=task_timeout,
+            initializer=_preload,
+        )
+        self._queue   = collections.deque()
+        self._lock    = threading.Lock()
+        self._futures: dict[int, tuple[tuple, concurrent.futures.Future]] = {}
+        self._wake_r, self._wake_w = multiprocessing.Pipe(duplex=False)
+        self._closed  = False
+        self._thread  = threading.Thread(target=self._dispatch, daemon=True)
+        self.completed = 0
+
+    def start(self):
+        self._pool.warm()
+        self._thread.start()
+
+    def close(self):
+        self._closed = True
+        self._pool.cancel()
+        self._wake_w.send_bytes(b"")
+        self._thread.join(timeout=10)
+        self._pool.close()
+
+    @property
+    def workers(self) -> int:
+        return len(self._pool.pids)
+
+    def submit(self, args: tuple) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._futures[id(args)] = (args, future)
+            self._queue.append(args)
+        self._wake_w.send_bytes(b"")
+        return future
+
+    def _source(self):
+        while not self._closed:
+            with self._lock:
+                args = self._queue.popleft() if self._queue else None
+            yield args
+
+    def _dispatch(self):
+        for args, ok, value in self._pool.imap_unordered(_compress_worker, self._source(), wakeup=self._wake_r):
+            with self._lock:
+                _, future = self._futures.pop(id(args))
+            self.completed += 1
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_result((os.path.basename(args[0]), False, "", value, None, None))
+        with self._lock:
+            for _, future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+    # ── Request helpers ───────────────────────────────────────────────────────
+    def compress_bytes(self, items: list[tuple[str, bytes]], options: dict) -> list[tuple]:
+        """Encode in-memory images; returns worker result tuples in input order."""
+        options = dict(options, to_bytes=True)
+        blocks, futures = [], []
+        try:
+            for name, data in items:
+                shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+                shm.buf[:len(data)] = data
+                blocks.append(shm)
+                stem = os.path.splitext(os.path.basename(name))[0] or "image"
+                # max_retries=1: the bytes will not change on a second attempt
+                futures.append(self.submit((name, stem, options, shm.name, len(data), 1)))
+            return [f.result() for f in futures]
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    def compress_paths(self, paths: list[str], options: dict, output_dir: str | None) -> list[tuple]:
+        """Encode files; written to output_dir (flat layout) or returned as bytes."""
+        if not paths:
+            return []
+        if output_dir:
+            common = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+            plan   = OutputLayout(common, output_dir).plan
+            options = dict(options, to_bytes=False)
+        else:
+            plan   = lambda p: os.path.splitext(os.path.basename(p))[0]
+            options = dict(options, to_bytes=True)
+        futures = [self.submit((p, plan(p), options)) for p in paths]
+        return [f.result() for f in futures]
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    server_version = "RaidCloudCompress/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass   # one line per image would drown the caller's own logging
+
+    @property
+    def service(self) -> CompressionService:
+        return self.server.service
+
+    def _reply(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, obj):
+        self._reply(status, json.dumps(obj).encode(), "application/json")
+
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path != "/health":
+            return self._json(404, {"error": "not found"})
+        self._json(200, {"workers": self.service.workers, "completed": self.service.completed})
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/compress":
+            return self._json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            # The body cannot be framed, so the connection cannot be reused either
+            self.close_connection = True
+            return self._json(400, {"error": "invalid Content-Length"})
+        body   = self.rfile.read(length)
+        query  = dict(urllib.parse.parse_qsl(url.query))
+
+        batch = None
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                batch = _parse_batch(self.server.options, json.loads(body or b"{}"))
+            else:
+                name    = query.pop("name", "image")
+                options = _parse_options(self.server.options, query)
+        except (ValueError, TypeError) as exc:
+            return self._json(400, {"error": str(exc)})
+        if batch:
+            return self._batch(*batch)
+
+        filename, ok, out_name, err, data, _ = self.service.compress_bytes([(name, body)], options)[0]
+        if not ok:
+            return self._json(422, {"error": err, "name": filename})
+        fmt = next(f for f, ext in OUTPUT_EXTENSIONS.items() if out_name.endswith("." + ext))
+        self._reply(200, data, _MIME_TYPES[fmt], {"X-Output-Name": out_name})
+
+    def _batch(self, options: dict, paths: list[str] | None, items: list[tuple[str, bytes]] | None,
+               output_dir: str | None):
+        if paths is not None:
+            results = self.service.compress_paths(paths, options, output_dir)
+        else:
+            results = self.service.compress_bytes(items, options)
+
+        out = []
+        for filename, ok, out_path, err, data, _ in results:
+            entry = {"name": filename, "ok": ok}
+            if ok:
+                entry["output"] = out_path
+                if data is not None:
+                    entry["data"] = base64.b64encode(data).decode()
+            else:
+                entry["error"] = err
+            out.append(entry)
+        self._json(200, {"results": out})
+
+
+class _TCPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = super().get_request()
+            # BaseHTTPRequestHandler expects an (host, port) client address
+            return request, ("local", 0)
+
+
+def serve(socket_path: str | None, port: int | None, workers: int | None = None, options: dict | None = None):
+    """Run the service until interrupted."""
+    service = CompressionService(workers)
+    service.start()
+
+    servers = []
+    if socket_path and "_UnixServer" not in globals():
+        raise SystemExit("Unix domain sockets are not available on this platform; use --port")
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        servers.append(_UnixServer(socket_path, _Handler))
+    if port is not None:
+        # Localhost only: the API reads and writes arbitrary paths
+        servers.append(_TCPServer(("127.0.0.1", port), _Handler))
+    for srv in servers:
+        srv.service = service
+        srv.options = options or saved_options()
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+
+    print(f"Compression daemon ready ({service.workers} workers)"
+          + (f" on {socket_path}" if socket_path else "")
+          + (f" on http://127.0.0.1:{port}" if port is not None else ""), flush=True)
+    try:
+        threading.Event().wait()
+    finally:
+        for srv in servers:
+            srv.shutdown()
+            srv.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.daemon", description="Run the compression daemon.")
+    parser.add_argument("--socket", help="Unix domain socket path")
+    parser.add_argument("--port", type=int, help=f"localhost HTTP port (e.g. {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, help="pool size (default: up to 4)")
+    args = parser.parse_args(argv)
+    if not args.socket and args.port is None:
+        args.port = DEFAULT_PORT
+    serve(args.socket, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    multiprocessing.set_start_method("spawn", force=True)
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,142 @@
+"""
+core/dedupe.py — Perceptual near-duplicate detection for burst shots and retakes.
+Each image gets a 64-bit difference hash from a draft-decoded thumbnail;
+hashes go into a BK-tree so finding everything within a few bits of an image
+does not mean comparing it against the whole folder.
+"""
+
+import concurrent.futures
+import os
+
+import numpy as np
+from PIL import Image
+
+from core.analysis import thumbnail
+
+DEDUPE_MODES = {
+    "off":  "Off",
+    "flag": "Flag near-duplicates",
+    "skip": "Skip near-duplicates",
+}
+
+# Hamming distance (out of 64 bits) under which two frames count as the same scene
+DEFAULT_MAX_DISTANCE = 6
+
+_HASH_SIZE = 8
+
+
+def dhash(img: Image.Image) -> int:
+    """
+    Difference hash: shrink to 9x8 grey and record, for every pixel, whether
+    it is brighter than its right-hand neighbour. Robust to rescaling,
+    recompression and small exposure changes.
+    """
+    small = np.asarray(img.convert("L").resize((_HASH_SIZE + 1, _HASH_SIZE), Image.BOX), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def sharpness(img: Image.Image) -> float:
+    """Variance of the Laplacian of the grey thumbnail; blurred frames score low."""
+    g = np.asarray(img.convert("L"), dtype=np.float32)
+    if g.shape[0] < 3 or g.shape[1] < 3:
+        return 0.0
+    lap = g[1:-1, :-2] + g[1:-1, 2:] + g[:-2, 1:-1] + g[2:, 1:-1] - 4 * g[1:-1, 1:-1]
+    return float(lap.var())
+
+
+def fingerprint(path: str) -> tuple[int, float, int, int] | None:
+    """(hash, sharpness, pixel count, file size) for `path`, or None if Pillow cannot read it."""
+    try:
+        with open(path, "rb") as f:
+            with Image.open(f) as img:
+                pixels = img.size[0] * img.size[1]
+            thumb = thumbnail(f)
+            return dhash(thumb), sharpness(thumb), pixels, os.fstat(f.fileno()).st_size
+    except Exception:
+        return None
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes with Hamming distance."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self):
+        self._root = None   # [hash, items, {distance: child}]
+
+    def add(self, h: int, item):
+        if self._root is None:
+            self._root = [h, [item], {}]
+            return
+        node = self._root
+        while True:
+            d = (h ^ node[0]).bit_count()
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, [item], {}]
+                return
+            node = child
+
+    def search(self, h: int, radius: int) -> list:
+        """Every item whose hash is within `radius` bits of `h`."""
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            d = (h ^ node[0]).bit_count()
+            if d <= radius:
+                found.extend(node[1])
+            # Triangle inequality: only subtrees at distance d±radius can match
+            for cd, child in node[2].items():
+                if d - radius <= cd <= d + radius:
+                    stack.append(child)
+        return found
+
+
+def find_near_duplicates(
+    files: list[str],
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+    io_threads: int = 8,
+) -> list[tuple[str, list[str]]]:
+    """
+    Group `files` into clusters of near-identical frames and return
+    [(kept, [duplicates…]), …] for every cluster with more than one member.
+    The kept frame is the sharpest, then the largest (pixels, then bytes).
+    Files Pillow cannot read (most RAW formats) are never clustered.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, io_threads)) as pool:
+        prints = list(pool.map(fingerprint, files))
+
+    tree = BKTree()
+    parent = list(range(len(files)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, fp in enumerate(prints):
+        if fp is None:
+            continue
+        for j in tree.search(fp[0], max_distance):
+            parent[find(j)] = find(i)
+        tree.add(fp[0], i)
+
+    clusters: dict[int, list[int]] = {}
+    for i, fp in enumerate(prints):
+        if fp is not None:
+            clusters.setdefault(find(i), []).append(i)
+
+    result = []
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        best = max(members, key=lambda i: prints[i][1:])
+        result.append((files[best], [files[i] for i in sorted(members) if i != best]))
+    result.sort()
+    return result
@@ -0,0 +1,448 @@
+"""
+core/distributed.py — Spread compression over several machines on the LAN.
+
+The workstation running the app is the coordinator: it listens on a TCP port
+and hands tasks to worker hosts that connect to it. A worker host is just
+
+    python -m core.distributed COORDINATOR_HOST:PORT --secret SECRET [--processes N]
+
+running a local WorkerPool. Workers keep reconnecting, so they can be left
+running between jobs. Everything also works on one machine: start a few
+workers against 127.0.0.1 to try it out.
+
+Messages are pickled over multiprocessing.connection with an HMAC handshake
+on the shared secret, so only run this on a trusted network.
+"""
+
+import argparse
+import collections
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+from core.worker_pool import WorkerPool, _drain
+
+DEFAULT_PORT = 47800
+
+# Worker hosts ping this often, and are given up on after WORKER_TIMEOUT
+# seconds of silence (their tasks then go to other hosts).
+PING_INTERVAL  = 5.0
+WORKER_TIMEOUT = 30.0
+
+_POLL_INTERVAL = 0.1
+
+
+class _RemoteWorker:
+    """Coordinator-side handle for one connected worker host."""
+
+    __slots__ = ("conn", "name", "slots", "inflight", "last_seen", "stealing", "send_lock")
+
+    def __init__(self, conn, name: str, slots: int):
+        self.conn      = conn
+        self.name      = name
+        self.slots     = max(1, slots)
+        self.inflight: dict[int, tuple] = {}   # task id → args, started or queued on the host
+        self.last_seen = time.monotonic()
+        self.stealing  = False
+        self.send_lock = threading.Lock()
+
+
+class Coordinator:
+    """
+    Drop-in replacement for WorkerPool that runs tasks on remote worker hosts.
+
+    Each host is kept `prefetch` tasks ahead of its process count so it never
+    waits on the network. Once the task source runs dry, hosts with idle
+    processes steal tasks still queued (not yet started) on busier hosts.
+    A host that disconnects or goes silent for `worker_timeout` seconds has
+    all its tasks re-dispatched, up to `max_attempts` times per task.
+
+    With `stream` the coordinator reads each source file (args[0]) and sends
+    its bytes along; the remote fn gets (shm_name, size) appended to its args,
+    exactly as with the local ReadAhead stage. Without it, hosts read
+    args[0] themselves, so paths must resolve identically on every host
+    (a shared mount).
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        port: int = DEFAULT_PORT,
+        host: str = "0.0.0.0",
+        stream: bool = False,
+        max_tasks_per_child: int = 0,
+        task_timeout: float | None = None,
+        prefetch: int = 2,
+        worker_timeout: float = WORKER_TIMEOUT,
+        max_attempts: int = 3,
+        on_event=None,
+    ):
+        if not secret:
+            raise ValueError("a shared secret is required for distributed compression")
+        self.stream              = stream
+        self.max_tasks_per_child = max_tasks_per_child
+        self.task_timeout        = task_timeout or None
+        self.prefetch            = max(0, prefetch)
+        self.worker_timeout      = worker_timeout
+        self.max_attempts        = max(1, max_attempts)
+        self._on_event           = on_event
+        self._listener           = multiprocessing.connection.Listener((host, port), authkey=secret.encode())
+        self.address             = self._listener.address
+        self._incoming           = queue.Queue()
+        self._workers: list[_RemoteWorker] = []
+        self._cancel             = False
+        self._paused             = False
+        self.lost                = 0   # hosts dropped mid-run
+        self.stolen              = 0   # tasks moved between hosts by work stealing
+        self._accepter           = threading.Thread(target=self._accept, daemon=True)
+        self._accepter.start()
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cancel(self):
+        self._cancel = True
+
+    def pause(self):
+        self._paused = True
+        for w in list(self._workers):
+            self._send(w, ("pause",))
+
+    def resume(self):
+        self._paused = False
+        for w in list(self._workers):
+            self._send(w, ("resume",))
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def close(self):
+        """Release every connected host (they go back to waiting) and stop listening."""
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        while not self._incoming.empty():
+            self._workers.append(self._incoming.get_nowait())
+        for w in self._workers:
+            self._send(w, ("stop",))
+            w.conn.close()
+        self._workers = []
+
+    @property
+    def hosts(self) -> list[str]:
+        return [w.name for w in self._workers]
+
+    def _event(self, msg: str):
+        if self._on_event:
+            self._on_event(msg)
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except multiprocessing.AuthenticationError:
+                self._event("Rejected a worker with the wrong secret.")
+                continue
+            except OSError:
+                return   # listener closed
+            try:
+                if not conn.poll(10):
+                    raise EOFError
+                kind, name, slots = conn.recv()
+                if kind != "hello":
+                    raise EOFError
+                conn.send(("config", self.max_tasks_per_child, self.task_timeout))
+            except (EOFError, OSError, ValueError, TypeError):
+                conn.close()
+                continue
+            self._incoming.put(_RemoteWorker(conn, name, slots))
+
+    def _send(self, w: _RemoteWorker, msg) -> bool:
+        try:
+            with w.send_lock:
+                w.conn.send(msg)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    # ── Main loop ─────────────────────────────────────────────────────────────
+    def imap_unordered(self, fn, tasks, wakeup=None):
+        """Same contract as WorkerPool.imap_unordered(), `wakeup` included."""
+        tasks     = iter(tasks)
+        exhausted = False
+        ids       = itertools.count()
+        args_of: dict[int, tuple] = {}
+        attempts  = collections.Counter()
+        pending   = collections.deque()   # task ids waiting to be (re-)dispatched
+
+        if not self._workers and self._incoming.empty():
+            self._event(f"Waiting for workers on port {self.address[1]}…")
+
+        while not self._cancel:
+            events = []
+
+            while not self._incoming.empty():
+                w = self._incoming.get_nowait()
+                self._workers.append(w)
+                if self._paused:
+                    self._send(w, ("pause",))
+                self._event(f"Worker {w.name} joined ({w.slots} processes).")
+
+            if not self._paused:
+                # Least-loaded hosts first
+                for w in sorted(self._workers, key=lambda w: len(w.inflight) / w.slots):
+                    while len(w.inflight) < w.slots + self.prefetch:
+                        if pending:
+                            tid = pending.popleft()
+                        elif not exhausted:
+                            try:
+                                args = next(tasks)
+                            except StopIteration:
+                                exhausted = True
+                                break
+                            if args is None:
+                                break
+                            tid = next(ids)
+                            args_of[tid] = args
+                        else:
+                            break
+                        ok, err = self._dispatch(w, fn, tid, args_of[tid])
+                        if not ok:
+                            if err:
+                                events.append((args_of.pop(tid), False, err))
+                                continue
+                            pending.appendleft(tid)
+                            break
+
+                if exhausted and not pending:
+                    self._steal()
+
+            if exhausted and not pending and not any(w.inflight for w in self._workers):
+                yield from events
+                break
+
+            conns = [w.conn for w in self._workers]
+            if wakeup is not None and not exhausted:
+                conns.append(wakeup)
+            if conns:
+                ready = set(multiprocessing.connection.wait(conns, timeout=_POLL_INTERVAL))
+            else:
+                time.sleep(_POLL_INTERVAL)
+                ready = set()
+            if wakeup in ready:
+                _drain(wakeup)
+            now = time.monotonic()
+
+            for w in list(self._workers):
+                try:
+                    while w.conn in ready and w.conn.poll():
+                        msg = w.conn.recv()
+                        w.last_seen = now
+                        if msg[0] == "result":
+                            _, tid, ok, value = msg
+                            if w.inflight.pop(tid, None) is not None:
+                                events.append((args_of.pop(tid), ok, value))
+                        elif msg[0] == "stolen":
+                            w.stealing = False
+                            for tid in msg[1]:
+                                if w.inflight.pop(tid, None) is not None:
+                                    pending.appendleft(tid)
+                                    self.stolen += 1
+                except (EOFError, OSError):
+                    self._lose(w, "disconnected", pending, attempts, args_of, events)
+                    continue
+                if w.conn not in ready and now - w.last_seen > self.worker_timeout:
+                    self._lose(w, "stopped responding", pending, attempts, args_of, events)
+
+            yield from events
+
+    def _dispatch(self, w: _RemoteWorker, fn, tid: int, args: tuple) -> tuple[bool, str | None]:
+        """Send one task. Returns (sent, error) — error is set when the task itself cannot run."""
+        data = None
+        if self.stream:
+            try:
+                with open(args[0], "rb") as f:
+                    data = f.read()
+            except OSError as exc:
+                return False, f"{type(exc).__name__}: {exc}"
+        if not self._send(w, ("task", tid, fn, args, data)):
+            return False, None
+        w.inflight[tid] = args
+        return True, None
+
+    def _steal(self):
+        free = sum(max(0, w.slots - len(w.inflight)) for w in self._workers)
+        if not free:
+            return
+        victim = max(self._workers, key=lambda w: len(w.inflight) - w.slots, default=None)
+        if victim is None or victim.stealing:
+            return
+        surplus = len(victim.inflight) - victim.slots
+        if surplus > 0:
+            victim.stealing = self._send(victim, ("steal", min(surplus, free)))
+
+    def _lose(self, w, reason, pending, attempts, args_of, events):
+        self._workers.remove(w)
+        w.conn.close()
+        self.lost += 1
+        self._event(f"Worker {w.name} {reason}; re-dispatching {len(w.inflight)} file(s).")
+        for tid in w.inflight:
+            attempts[tid] += 1
+            if attempts[tid] >= self.max_attempts:
+                events.append((args_of.pop(tid), False, f"lost {attempts[tid]} workers while running"))
+            else:
+                pending.append(tid)
+        w.inflight.clear()
+
+
+# ── Worker host ───────────────────────────────────────────────────────────────
+def _run_task(tid: int, fn, args: tuple, shm_name: str | None, shm_size: int):
+    """Pool-side trampoline: streamed tasks get their shared-memory block appended."""
+    if shm_name:
+        return fn(*args, shm_name, shm_size)
+    return fn(*args)
+
+
+def serve_once(address: tuple[str, int], secret: str, processes: int) -> bool:
+    """
+    Connect to a coordinator and work for it until it says stop or goes away.
+    Returns False if the coordinator could not be reached.
+    """
+    try:
+        conn = multiprocessing.connection.Client(address, authkey=secret.encode())
+    except (OSError, multiprocessing.AuthenticationError):
+        return False
+
+    send_lock = threading.Lock()
+
+    def send(msg):
+        with send_lock:
+            conn.send(msg)
+
+    try:
+        send(("hello", socket.gethostname(), processes))
+        _, max_tasks_per_child, task_timeout = conn.recv()
+    except (EOFError, OSError):
+        conn.close()
+        return True
+
+    local   = collections.deque()   # (tid, fn, args, data) not yet started
+    lock    = threading.Lock()
+    stopped = threading.Event()
+    pool    = WorkerPool(processes, max_tasks_per_child=max_tasks_per_child, task_timeout=task_timeout)
+
+    def receive():
+        try:
+            while True:
+                msg = conn.recv()
+                if msg[0] == "task":
+                    with lock:
+                        local.append(msg[1:])
+                elif msg[0] == "steal":
+                    with lock:
+                        taken = [local.pop()[0] for _ in range(min(msg[1], len(local)))]
+                    send(("stolen", taken))
+                elif msg[0] == "pause":
+                    pool.pause()
+                elif msg[0] == "resume":
+                    pool.resume()
+                elif msg[0] == "stop":
+                    break
+        except (EOFError, OSError):
+            pass
+        stopped.set()
+        pool.cancel()
+
+    def ping():
+        while not stopped.wait(PING_INTERVAL):
+            try:
+                send(("ping",))
+            except OSError:
+                return
+
+    blocks: dict[int, shared_memory.SharedMemory] = {}
+
+    def source():
+        while not stopped.is_set():
+            with lock:
+                item = local.popleft() if local else None
+            if item is None:
+                yield None
+                continue
+            tid, fn, args, data = item
+            shm_name, size = None, 0
+            if data:
+                shm = shared_memory.SharedMemory(create=True, size=len(data))
+                shm.buf[:len(data)] = data
+                blocks[tid] = shm
+                shm_name, size = shm.name, len(data)
+            yield (tid, fn, args, shm_name, size)
+
+    threading.Thread(target=receive, daemon=True).start()
+    threading.Thread(target=ping, daemon=True).start()
+
+    try:
+        with pool:
+            for (tid, *_), ok, value in pool.imap_unordered(_run_task, source()):
+                shm = blocks.pop(tid, None)
+                if shm:
+                    shm.close()
+                    shm.unlink()
+                send(("result", tid, ok, value))
+    except (OSError, EOFError):
+        pass
+    finally:
+        stopped.set()
+        for shm in blocks.values():
+            shm.close()
+            shm.unlink()
+        conn.close()
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.distributed",
+        description="Run a compression worker host for a RaidCloud coordinator.",
+    )
+    parser.add_argument("coordinator", help="HOST:PORT of the machine running the app")
+    parser.add_argument("--secret", default=os.environ.get("RAIDCLOUD_WORKER_SECRET", ""),
+                        help="shared secret (default: $RAIDCLOUD_WORKER_SECRET)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--once", action="store_true", help="exit after one job instead of reconnecting")
+    args = parser.parse_args(argv)
+
+    host, _, port = args.coordinator.rpartition(":")
+    if not host or not port.isdigit() or not args.secret:
+        parser.error("expected HOST:PORT and a --secret")
+
+    print(f"Worker with {args.processes} processes → {host}:{port}", flush=True)
+    while True:
+        if serve_once((host, int(port)), args.secret, args.processes):
+            print("Job finished.", flush=True)
+            if args.once:
+                return
+        else:
+            time.sleep(2)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    multiprocessing.set_start_method("spawn", force=True)
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
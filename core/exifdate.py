@@ -0,0 +1,105 @@
+"""
+core/exifdate.py — Capture-date lookup for date-range filtering before compression.
+Only the file header is parsed (Pillow opens images lazily), so checking a
+date costs one small read instead of a full decode.
+"""
+
+import concurrent.futures
+import datetime
+import os
+import threading
+
+from PIL import Image
+
+from core.filelist import FileList
+
+_EXIF_IFD          = 0x8769
+_DATETIME_ORIGINAL = 36867
+_DATETIME          = 306
+
+# (path, size, mtime_ns) → capture date or None; kept for the life of the
+# process so re-running with a different range does not re-read headers.
+_cache: dict[tuple[str, int, int], datetime.date | None] = {}
+_cache_lock = threading.Lock()
+
+
+def _parse(value) -> datetime.date | None:
+    # EXIF dates are "YYYY:MM:DD HH:MM:SS"; some cameras write dashes
+    try:
+        text = value.decode("ascii", "replace") if isinstance(value, bytes) else str(value)
+        return datetime.date(int(text[0:4]), int(text[5:7]), int(text[8:10]))
+    except (ValueError, TypeError):
+        return None
+
+
+def read_capture_date(path: str) -> datetime.date | None:
+    """
+    DateTimeOriginal (falling back to DateTime) from the file's EXIF header,
+    or None when there is none or the format is not readable by Pillow.
+    """
+    try:
+        with Image.open(path) as img:
+            # PNG keeps EXIF wherever it likes; getexif() would decode the
+            # pixels to find a trailing chunk, so only use it if already seen.
+            if img.format == "PNG" and "exif" not in img.info:
+                return None
+            exif = img.getexif()
+            return _parse(exif.get_ifd(_EXIF_IFD).get(_DATETIME_ORIGINAL, "")) or _parse(exif.get(_DATETIME, ""))
+    except Exception:
+        return None
+
+
+def capture_date(path: str, st: os.stat_result | None = None) -> datetime.date:
+    """
+    Cached capture date of `path`. Files without a usable EXIF date fall back
+    to their modification date, as Immich itself does.
+    """
+    st = st or os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    with _cache_lock:
+        hit = key in _cache
+        date = _cache.get(key)
+    if not hit:
+        date = read_capture_date(path)
+        with _cache_lock:
+            _cache[key] = date
+    return date or datetime.date.fromtimestamp(st.st_mtime)
+
+
+class CaptureDateFilter:
+    """
+    Checks files against an inclusive [start, end] capture-date range on a
+    pool of I/O threads. submit() paths while the folder is being walked so
+    the header reads overlap the scan, then collect the survivors with
+    results(), which keeps submission order.
+    """
+
+    def __init__(self, start: datetime.date, end: datetime.date, io_threads: int = 8):
+        self.start    = start
+        self.end      = end
+        self.skipped  = 0
+        self._pending: list[tuple[str, concurrent.futures.Future]] = []
+        self._pool    = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, io_threads))
+
+    def submit(self, path: str):
+        self._pending.append((path, self._pool.submit(self._in_range, path)))
+
+    def _in_range(self, path: str) -> bool:
+        try:
+            return self.start <= capture_date(path) <= self.end
+        except OSError:
+            # Vanished or unreadable — let the worker report it
+            return True
+
+    def results(self) -> FileList:
+        kept = FileList()
+        try:
+            for path, future in self._pending:
+                if future.result():
+                    kept.append(path)
+                else:
+                    self.skipped += 1
+        finally:
+            self._pending = []
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        return kept
@@ -0,0 +1,170 @@
+"""
+core/filelist.py — Compact file lists for very large trees.
+A run over millions of files used to hold a Python str per absolute path
+(often in two or three lists at once). FileList keeps each directory once,
+packs the file names into a single buffer with an offsets array, and keeps
+sizes and mtimes in array('Q'), about a third of the memory of a list of
+paths. Paths are rebuilt one at a time as the list is iterated.
+"""
+
+import collections.abc
+import os
+from array import array
+
+# Names are stored as UTF-8; surrogatepass round-trips any str os.scandir returns
+_CODEC = ("utf-8", "surrogatepass")
+
+
+class FileList(collections.abc.Sequence):
+    """
+    Append-only sequence of paths, with a size and mtime (ns) per path.
+
+    Indexing and iteration yield path strings, so a FileList can be passed
+    wherever a list of paths was; entries() also yields size and mtime.
+    Pickles as a handful of flat buffers.
+    """
+
+    def __init__(self, paths=()):
+        self._dirs: list[str] = []
+        self._dir_ids: dict[str, int] = {}
+        self._names   = bytearray()
+        self._ends    = array("Q")   # end offset of each name in _names
+        self._dir_of  = array("I")   # index into _dirs
+        self.sizes    = array("Q")
+        self.mtimes   = array("Q")
+        for path in paths:
+            self.append(path)
+
+    # ── Building ──────────────────────────────────────────────────────────────
+    def add(self, folder: str, name: str, size: int = 0, mtime_ns: int = 0):
+        """Append `name` inside `folder` (the scan's fast path: no splitting)."""
+        dir_id = self._dir_ids.get(folder)
+        if dir_id is None:
+            dir_id = self._dir_ids[folder] = len(self._dirs)
+            self._dirs.append(folder)
+        self._names += name.encode(*_CODEC)
+        self._ends.append(len(self._names))
+        self._dir_of.append(dir_id)
+        self.sizes.append(size)
+        self.mtimes.append(max(0, mtime_ns))
+
+    def append(self, path: str, size: int = 0, mtime_ns: int = 0):
+        folder, name = os.path.split(path)
+        self.add(folder, name, size, mtime_ns)
+
+    @classmethod
+    def scan(cls, folder: str, extensions, skip_dirs=(), stat: bool = False) -> "FileList":
+        """
+        Every file under `folder` whose lower-cased extension is in
+        `extensions`, skipping directories in `skip_dirs` (absolute paths).
+        With `stat`, sizes and mtimes are filled in as well.
+        """
+        files = cls()
+        for root, name, entry in walk(folder, extensions, skip_dirs):
+            if stat:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    files.add(root, name)   # vanished — let the worker report it
+                    continue
+                files.add(root, name, st.st_size, st.st_mtime_ns)
+            else:
+                files.add(root, name)
+        return files
+
+    # ── Sequence ──────────────────────────────────────────────────────────────
+    def __len__(self):
+        return len(self._ends)
+
+    def _name(self, i: int) -> str:
+        start = self._ends[i - 1] if i else 0
+        return self._names[start:self._ends[i]].decode(*_CODEC)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._select(range(len(self))[i])
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("FileList index out of range")
+        return os.path.join(self._dirs[self._dir_of[i]], self._name(i))
+
+    def __iter__(self):
+        dirs, names, dir_of = self._dirs, self._names, self._dir_of
+        start = 0
+        for i, end in enumerate(self._ends):
+            yield os.path.join(dirs[dir_of[i]], names[start:end].decode(*_CODEC))
+            start = end
+
+    def __repr__(self):
+        return f"<FileList of {len(self)} files in {len(self._dirs)} folders>"
+
+    def entries(self):
+        """(path, size, mtime_ns) for every file, lazily."""
+        return zip(self, self.sizes, self.mtimes)
+
+    def total_size(self) -> int:
+        return sum(self.sizes)
+
+    # ── Derived lists ─────────────────────────────────────────────────────────
+    def _select(self, indices) -> "FileList":
+        out = FileList()
+        for i in indices:
+            out.add(self._dirs[self._dir_of[i]], self._name(i), self.sizes[i], self.mtimes[i])
+        return out
+
+    def filter(self, keep) -> "FileList":
+        """A new FileList of the paths for which keep(path) is true."""
+        return self._select(i for i, path in enumerate(self) if keep(path))
+
+    def sort(self):
+        """Sort in place by folder, then name (folders stay together, unlike a str sort)."""
+        rank = {d: r for r, d in enumerate(sorted(self._dirs))}
+        dirs, names, dir_of, ends = self._dirs, self._names, self._dir_of, self._ends
+        order = sorted(
+            range(len(self)),
+            key=lambda i: (rank[dirs[dir_of[i]]], names[ends[i - 1] if i else 0:ends[i]]),
+        )
+        self.__dict__.update(self._select(order).__dict__)
+
+    # ── Pickling: flat buffers only, the folder index is rebuilt ──────────────
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_dir_ids"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._dir_ids = {d: i for i, d in enumerate(self._dirs)}
+
+
+def walk(folder: str, extensions, skip_dirs=()):
+    """
+    (root, name, os.DirEntry) for every matching file under `folder`, in
+    name order per folder, with os.scandir (no per-file stat on most
+    platforms). Unreadable folders are skipped, as os.walk does.
+    """
+    skip = {os.path.abspath(d) for d in skip_dirs}
+    stack = [folder]
+    while stack:
+        root = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        entries.sort(key=lambda e: e.name)
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                # Symlinked folders are not followed, as with os.walk's default
+                if not entry.is_symlink() and os.path.abspath(entry.path) not in skip:
+                    subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in extensions:
+                yield root, entry.name, entry
+        # Depth-first, in name order
+        stack.extend(reversed(subdirs))
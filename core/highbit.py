@@ -0,0 +1,136 @@
+"""
+core/highbit.py — Fast 16-bit → 8-bit path for TIFF scans and linear DNGs.
+Pillow's generic convert("RGB") clips I;16 data (12/14-bit scans come out
+black or blown) and is slow on 48-bit images. Here the samples are viewed as
+a NumPy array — straight over the file buffer when the strips are stored
+uncompressed — and mapped to 8 bits through a lookup table, a few rows at a
+time so memory stays bounded.
+"""
+
+import numpy as np
+from PIL import Image
+
+HIGH_BIT_MODES = ("I;16", "I;16L", "I;16B", "I;16N", "I")
+
+# Rows converted per chunk; bounds the temporary index array to
+# CHUNK_ROWS * width * samples * 8 bytes.
+CHUNK_ROWS = 256
+
+# TIFF / DNG tags
+_BITS_PER_SAMPLE   = 258
+_COMPRESSION       = 259
+_PHOTOMETRIC       = 262
+_STRIP_OFFSETS     = 273
+_SAMPLES_PER_PIXEL = 277
+_STRIP_BYTE_COUNTS = 279
+_PLANAR_CONFIG     = 284
+_TILE_OFFSETS      = 324
+_WHITE_LEVEL       = 50717
+_LINEAR_RAW        = 34892
+
+
+def is_high_bit(img: Image.Image) -> bool:
+    """True for 16-bit grayscale images and for 16-bit-per-sample TIFFs Pillow would truncate."""
+    if img.mode in HIGH_BIT_MODES:
+        return True
+    tags = getattr(img, "tag_v2", None)
+    if not tags:
+        return False
+    bits = tags.get(_BITS_PER_SAMPLE)
+    bits = bits if isinstance(bits, tuple) else (bits,)
+    return bool(bits[0]) and all(b == 16 for b in bits)
+
+
+def to_8bit(img: Image.Image, buffer=None) -> Image.Image:
+    """
+    Convert a high-bit-depth image to 8-bit L / RGB / RGBA.
+    `buffer` is the raw file contents (bytes-like); when given and the image
+    is an uncompressed, contiguous, chunky TIFF, the samples are read in place
+    without decoding or copying. Otherwise Pillow decodes the image once.
+    Linear DNG data gets an sRGB-like gamma; everything else is scaled linearly.
+    """
+    tags = getattr(img, "tag_v2", None) or {}
+    samples = _samples_view(img, tags, buffer) if buffer is not None else None
+    if samples is None:
+        if img.mode not in HIGH_BIT_MODES:
+            # Pillow already decodes 48-bit TIFFs to 8-bit RGB; nothing to gain here
+            return img.convert("RGB")
+        samples = np.asarray(img)
+        if samples.dtype != np.uint16:
+            # 32-bit "I" images: clamp to the 16-bit range the tables cover
+            samples = np.clip(samples, 0, 0xFFFF).astype(np.uint16)
+        if samples.ndim == 2:
+            samples = samples[..., None]
+
+    height, width, spp = samples.shape
+    white = tags.get(_WHITE_LEVEL)
+    if isinstance(white, tuple):
+        white = max(white)
+    if not white:
+        # Scale by the container's effective bit depth (12-, 14- or 16-bit
+        # scans), not by the brightest pixel, so exposure is preserved.
+        white = (1 << max(8, int(samples.max()).bit_length())) - 1
+    white = min(int(white), 0xFFFF)
+    gamma = tags.get(_PHOTOMETRIC) == _LINEAR_RAW
+    shift = white.bit_length() - 8 if white & (white + 1) == 0 else None
+    lut   = _lookup_table(white, gamma) if gamma or shift is None else None
+
+    out = np.empty((height, width, spp), dtype=np.uint8)
+    for row in range(0, height, CHUNK_ROWS):
+        chunk = samples[row:row + CHUNK_ROWS]
+        dest  = out[row:row + CHUNK_ROWS]
+        if lut is None:
+            # 2^n - 1 white point: a plain shift, ~10x faster than a table gather
+            np.right_shift(chunk, max(shift, 0), out=dest, casting="unsafe")
+        else:
+            np.take(lut, chunk, out=dest)
+    del samples, chunk
+
+    mode = {1: "L", 3: "RGB", 4: "RGBA"}.get(spp)
+    if mode is None:
+        out = out[..., :3] if spp > 3 else np.repeat(out[..., :1], 3, axis=2)
+        mode = "RGB"
+    out = np.ascontiguousarray(out.squeeze(axis=2) if mode == "L" else out)
+    return Image.frombuffer(mode, (width, height), out, "raw", mode, 0, 1)
+
+
+def _lookup_table(white: int, gamma: bool) -> np.ndarray:
+    """Full 16-bit table, so values above `white` saturate without a separate clip."""
+    x = np.minimum(np.arange(0x10000, dtype=np.float32) / max(white, 1), 1.0)
+    if gamma:
+        # sRGB transfer curve
+        x = np.where(x <= 0.0031308, 12.92 * x, 1.055 * np.power(x, 1 / 2.4) - 0.055)
+    return np.rint(x * 255).astype(np.uint8)
+
+
+def _samples_view(img: Image.Image, tags, buffer) -> np.ndarray | None:
+    """Zero-copy (height, width, samples) uint16 view of uncompressed strip data, or None."""
+    try:
+        if tags.get(_COMPRESSION, 1) != 1 or _TILE_OFFSETS in tags:
+            return None
+        if tags.get(_PLANAR_CONFIG, 1) != 1:
+            return None
+        spp  = int(tags.get(_SAMPLES_PER_PIXEL, 1))
+        bits = tags.get(_BITS_PER_SAMPLE)
+        bits = bits if isinstance(bits, tuple) else (bits,)
+        if any(b != 16 for b in bits):
+            return None
+
+        offsets = tags.get(_STRIP_OFFSETS)
+        counts  = tags.get(_STRIP_BYTE_COUNTS)
+        offsets = offsets if isinstance(offsets, tuple) else (offsets,)
+        counts  = counts if isinstance(counts, tuple) else (counts,)
+        for i in range(len(offsets) - 1):
+            if offsets[i] + counts[i] != offsets[i + 1]:
+                return None
+
+        width, height = img.size
+        needed = width * height * spp * 2
+        if sum(counts) < needed or offsets[0] + needed > len(buffer):
+            return None
+
+        endian = ">" if bytes(buffer[:2]) == b"MM" else "<"
+        flat = np.frombuffer(buffer, dtype=f"{endian}u2", count=width * height * spp, offset=offsets[0])
+        return flat.reshape(height, width, spp)
+    except (TypeError, ValueError):
+        return None
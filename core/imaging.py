@@ -0,0 +1,289 @@
+"""
+core/imaging.py — Per-file image compression worker.
+Kept free of Qt imports: every pool process imports this module on spawn,
+and recycled workers respawn often during long runs.
+"""
+
+import io
+import os
+import time
+
+from PIL import Image
+
+from core.analysis import thumbnail, image_stats, predict
+from core.highbit  import is_high_bit, to_8bit
+from core.prefetch import SharedBufferReader
+from core.quantize import quantize_png
+
+VALID_IMAGE_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg",
+    ".tif", ".tiff",
+    ".cr2", ".cr3",
+    ".nef", ".nrw",
+    ".arw", ".sr2", ".srf",
+    ".dng",
+)
+
+RAW_EXTENSIONS = (
+    ".cr2", ".cr3", ".nef", ".nrw",
+    ".arw", ".sr2", ".srf", ".dng",
+)
+
+
+# Pillow format → file extension
+OUTPUT_EXTENSIONS = {
+    "JPEG": "jpg",
+    "PNG":  "png",
+    "WEBP": "webp",
+}
+
+# Pillow JPEG `subsampling` value → display label (-1 leaves libjpeg's 4:2:0 default)
+JPEG_SUBSAMPLING = {
+    -1: "Default",
+    0:  "4:4:4",
+    1:  "4:2:2",
+    2:  "4:2:0",
+}
+
+# TIFF IFD0 tags carried into the output's EXIF: description, make, model,
+# orientation, software, date/time, artist, copyright
+_TIFF_EXIF_TAGS = (0x010E, 0x010F, 0x0110, 0x0112, 0x0131, 0x0132, 0x013B, 0x8298)
+# Exif and GPS sub-IFDs
+_EXIF_SUB_IFDS = (0x8769, 0x8825)
+
+
+def compress_options(
+    output_format: str = "JPEG",
+    jpeg_quality: int = 85,
+    png_compression: int = 6,
+    preserve_exif: bool = True,
+    adaptive_quality: bool = False,
+    to_bytes: bool = False,
+    png_quantize: bool = False,
+    png_colors: int = 256,
+    png_dither: bool = True,
+    jpeg_subsampling: int = -1,
+    jpeg_progressive: bool = False,
+) -> dict:
+    """
+    Build the per-run options dict handed to every _compress_worker call.
+    output_format is "JPEG", "PNG", "WEBP" or "AUTO" (picked per image by
+    core.analysis); jpeg_quality also drives WebP. With png_quantize, PNG
+    output is reduced to an adaptive palette of at most png_colors colours.
+    jpeg_subsampling (see JPEG_SUBSAMPLING) and jpeg_progressive only affect
+    JPEG output.
+    """
+    return {
+        "format":           output_format,
+        "jpeg_quality":     jpeg_quality,
+        "png_compression":  png_compression,
+        "preserve_exif":    preserve_exif,
+        "adaptive_quality": adaptive_quality,
+        "to_bytes":         to_bytes,
+        "png_quantize":     png_quantize,
+        "png_colors":       png_colors,
+        "png_dither":       png_dither,
+        "jpeg_subsampling": jpeg_subsampling,
+        "jpeg_progressive": jpeg_progressive,
+    }
+
+
+def _compress_worker(
+    file_path: str,
+    out_base: str,
+    options: dict,
+    shm_name: str | None = None,
+    shm_size: int = 0,
+    max_retries: int = 3,
+):
+    """
+    Worker function meant for WorkerPool.
+    Must be top-level so it can be pickled.
+    `out_base` is the output path without extension, as planned by OutputLayout;
+    the extension follows the format actually used. `options` comes from
+    compress_options().
+    With options["to_bytes"] nothing is written: the encoded image is returned
+    instead and out_path is just its name (used as an archive member name).
+    When the ReadAhead stage already prefetched the file, `shm_name` /
+    `shm_size` locate its bytes in shared memory and the file is not re-read.
+    Returns (filename, bool success, out_path, error message, encoded bytes | None,
+    info), where info is (pid, spans, details): spans are core.timing
+    (stage, start_ns, end_ns) tuples for read / analyze / decode / convert /
+    encode / write, plus "retry" for the back-off sleeps; details holds what
+    _encode recorded (see there) and the source size.
+    """
+    filename = os.path.basename(file_path)
+    spans: list[tuple[str, int, int]] = []
+    details: dict = {}
+    clock = time.monotonic_ns
+
+    for attempt in range(max_retries):
+        try:
+            t0 = clock()
+            if shm_name:
+                src = SharedBufferReader(shm_name, shm_size)
+                details["source_bytes"] = shm_size
+            else:
+                with open(file_path, "rb") as f:
+                    src = io.BytesIO(f.read())
+                details["source_bytes"] = src.seek(0, io.SEEK_END)
+                src.seek(0)
+            spans.append(("read", t0, clock()))
+
+            try:
+                return (*_encode(src, filename, out_base, options, spans, details),
+                        (os.getpid(), tuple(spans), details))
+            finally:
+                src.close()
+
+        except Exception as exc:
+            if attempt == max_retries - 1:
+                return (filename, False, "", str(exc), None, (os.getpid(), tuple(spans), details))
+            else:
+                t0 = clock()
+                time.sleep(2 ** attempt)
+                spans.append(("retry", t0, clock()))
+
+    return (filename, False, "", "Process failed silently", None, (os.getpid(), tuple(spans), details))
+
+
+def _encode(src, filename: str, out_base: str, options: dict, spans: list | None = None,
+            details: dict | None = None):
+    """
+    Decode `src` (a file object) and encode it; returns the worker result
+    tuple without the info element. Stage spans are appended to `spans`, and
+    width / height / format / quality (as chosen for this image) and
+    output_bytes are stored in `details`, when given.
+    """
+    clock = time.monotonic_ns
+    mark  = spans.append if spans is not None else (lambda span: None)
+    output_format = options["format"]
+    quality       = options["jpeg_quality"]
+
+    t0 = clock()
+    if output_format == "AUTO" or options["adaptive_quality"]:
+        predicted_format, predicted_quality = predict(image_stats(thumbnail(src)), quality)
+        if output_format == "AUTO":
+            output_format = predicted_format
+        if options["adaptive_quality"]:
+            quality = predicted_quality
+        t1 = clock()
+        mark(("analyze", t0, t1))
+        t0 = t1
+
+    out_path = f"{out_base}.{OUTPUT_EXTENSIONS[output_format]}"
+    img = Image.open(src)
+    if details is not None:
+        details.update(
+            width=img.width, height=img.height, format=output_format,
+            quality=quality if output_format != "PNG" else None,
+        )
+
+    exif_bytes = None
+    high_bit = is_high_bit(img)
+    if high_bit:
+        # No load(): to_8bit reads the samples in place (or decodes once itself),
+        # so its time shows up under "convert". TIFF tags are parsed on open.
+        if options["preserve_exif"]:
+            exif_bytes = _tiff_exif(img) if getattr(img, "tag_v2", None) else img.info.get("exif")
+    else:
+        img.load()  # full decode here (also populates img.info["exif"]) so it is timed on its own
+        exif_bytes = img.info.get("exif") if options["preserve_exif"] else None
+    t1 = clock()
+    mark(("decode", t0, t1))
+    t0 = t1
+
+    if high_bit:
+        img = _high_bit_to_8bit(img, src)
+
+    is_raw = os.path.splitext(filename)[1].lower() in RAW_EXTENSIONS
+    keep_alpha = output_format != "JPEG" and not is_raw and _has_alpha(img)
+    if is_raw or img.mode not in ("RGB", "RGBA", "L", "CMYK"):
+        img = img.convert("RGBA" if keep_alpha else "RGB")
+    elif img.mode == "RGBA" and output_format == "JPEG":
+        img = img.convert("RGB")
+    elif img.mode == "CMYK" and output_format != "JPEG":
+        img = img.convert("RGB")
+    t1 = clock()
+    mark(("convert", t0, t1))
+    t0 = t1
+
+    save_kwargs: dict = {
+        "format": output_format,
+    }
+    if output_format == "JPEG":
+        save_kwargs["optimize"] = True
+        save_kwargs["quality"] = quality
+        if options["jpeg_subsampling"] >= 0:
+            save_kwargs["subsampling"] = options["jpeg_subsampling"]
+        if options["jpeg_progressive"]:
+            save_kwargs["progressive"] = True
+        if exif_bytes:
+            save_kwargs["exif"] = exif_bytes
+    elif output_format == "WEBP":
+        save_kwargs["quality"] = quality
+        save_kwargs["method"] = 4
+        if exif_bytes:
+            save_kwargs["exif"] = exif_bytes
+    else:
+        save_kwargs["optimize"] = True
+        save_kwargs["compress_level"] = options["png_compression"]
+
+    data = None
+    if output_format == "PNG" and options["png_quantize"]:
+        # None means no palette was accurate enough; fall through to lossless
+        data = quantize_png(img, options["png_colors"], options["png_dither"])
+    if data is None:
+        # Encode to memory first so encoding and writing are timed apart
+        buf = io.BytesIO()
+        img.save(buf, **save_kwargs)
+        data = buf.getvalue()
+    t1 = clock()
+    mark(("encode", t0, t1))
+    if details is not None:
+        details["output_bytes"] = len(data)
+
+    if options["to_bytes"]:
+        return (filename, True, out_path, "", data)
+
+    with open(out_path, "wb") as f:
+        f.write(data)
+    mark(("write", t1, clock()))
+    # Return the actual output path so the caller can track it without parsing strings
+    return (filename, True, out_path, "", None)
+
+
+def _high_bit_to_8bit(img: Image.Image, src) -> Image.Image:
+    """Run core.highbit over the source bytes in place (BytesIO or shared memory)."""
+    owned  = isinstance(src, io.BytesIO)
+    buffer = src.getbuffer() if owned else getattr(src, "buffer", None)
+    try:
+        return to_8bit(img, buffer)
+    finally:
+        if owned:
+            buffer.release()
+
+
+def _tiff_exif(img: Image.Image) -> bytes | None:
+    """
+    EXIF for a TIFF / DNG, built from its tags without decoding any pixels
+    (Pillow's TIFF plugin never fills info["exif"]). Only the descriptive
+    IFD0 tags and the Exif / GPS sub-IFDs are kept; the rest describe strips.
+    """
+    tags = img.getexif()
+    exif = Image.Exif()
+    found = False
+    for tag in _TIFF_EXIF_TAGS:
+        if tag in tags:
+            exif[tag] = tags[tag]
+            found = True
+    for ifd in _EXIF_SUB_IFDS:
+        sub = tags.get_ifd(ifd)
+        if sub:
+            exif.get_ifd(ifd).update(sub)
+            found = True
+    return exif.tobytes() if found else None
+
+
+def _has_alpha(img: Image.Image) -> bool:
+    return img.mode in ("LA", "PA") or "transparency" in img.info
@@ -0,0 +1,507 @@
+"""
+core/immich.py — Qt-free Immich REST client used by the uploader.
+Uploads a list of local files directly to an Immich server using its API.
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import datetime
+import mimetypes
+import os
+import queue
+import sys
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.filelist import FileList
+from core.report  import RunReport
+from core.streams import MemoryUpload, UploadBacklog, iterate_async, run_in_thread
+from core.timing  import StageStats, TraceWriter
+
+
+# Responses worth retrying: rate limiting and a proxy in front of a busy or restarting server
+_RETRY_STATUS = (429, 502, 503, 504)
+
+
+def make_session(pool_size: int = 1, retries: int = 3) -> requests.Session:
+    """
+    A requests.Session with keep-alive connections to the server, up to
+    `pool_size` of them (one per upload thread), and `retries` transport
+    retries with exponential back-off for failed connects and
+    _RETRY_STATUS responses (honouring Retry-After). Reads that time out
+    are not retried: the server may still be processing the upload.
+    """
+    retry = Retry(
+        total=retries, connect=retries, read=0, status=retries,
+        backoff_factor=0.5,
+        status_forcelist=_RETRY_STATUS,
+        # Immich recognises a re-sent asset by its checksum (409), so POST is safe to repeat;
+        # _upload_worker tells our own earlier attempt apart by the retry history
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = _CountingAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=retry, pool_block=True)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def connection_stats(session: requests.Session) -> dict:
+    """
+    {opened, requests, reused} for a make_session() session so far:
+    connections opened (reconnects of dropped keep-alives included),
+    requests sent (retries included), and requests that went over a
+    connection that was already open.
+    """
+    opened = failed = sent = 0
+    for adapter in set(session.adapters.values()):
+        if isinstance(adapter, _CountingAdapter):
+            opened += adapter.connects
+            failed += adapter.connect_errors
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    sent += pool.num_requests
+    return {"opened": opened, "requests": sent, "reused": max(0, sent - opened - failed)}
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts the connections its pools open. urllib3's own
+    num_connections counts connection objects, which silently reconnect
+    when a keep-alive connection was dropped.
+    """
+
+    def __init__(self, **kwargs):
+        self.connects       = 0
+        self.connect_errors = 0
+        self._count_lock    = threading.Lock()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        manager = self.poolmanager
+        manager.pool_classes_by_scheme = {
+            scheme: type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": self._counting(pool_cls.ConnectionCls)})
+            for scheme, pool_cls in manager.pool_classes_by_scheme.items()
+        }
+
+    def _counting(self, connection_cls):
+        adapter = self
+
+        class CountingConnection(connection_cls):
+            def connect(self):
+                try:
+                    super().connect()
+                except Exception:
+                    with adapter._count_lock:
+                        adapter.connect_errors += 1
+                    raise
+                with adapter._count_lock:
+                    adapter.connects += 1
+
+        return CountingConnection
+
+
+def test_connection(server_url: str, api_key: str, timeout: int = 10) -> tuple[bool, str]:
+    """Returns (ok, message)."""
+    url = server_url.rstrip("/") + "/api/server/about"
+    try:
+        # One retry rides out a proxy hiccup without making a wrong URL slow to report
+        with make_session(retries=1) as session:
+            r = session.get(
+                url,
+                headers={"x-api-key": api_key},
+                timeout=timeout,
+            )
+        if r.status_code == 200:
+            data = r.json()
+            version = data.get("version", "unknown")
+            return True, f"Connected ✓  (Immich {version})"
+        else:
+            return False, f"HTTP {r.status_code}: {r.text[:120]}"
+    except requests.exceptions.ConnectionError:
+        return False, "Connection refused — check server URL."
+    except requests.exceptions.Timeout:
+        return False, "Connection timed out."
+    except Exception as exc:
+        return False, str(exc)
+
+
+def upload_files(paths, server_url: str, api_key: str):
+    """Sync generator over UploadJob.stream(): (path, result_label, log | None) per file."""
+    yield from UploadJob([], server_url, api_key).stream(paths)
+
+
+async def aupload_files(paths, server_url: str, api_key: str):
+    """Async-iterator version of upload_files(); `paths` may also be an async iterable."""
+    async for result in UploadJob([], server_url, api_key).astream(paths):
+        yield result
+
+
+class UploadJob:
+    """
+    Uploads files to Immich via POST /api/assets on a small thread pool.
+
+    events() runs the job and yields, as uploads complete:
+        ("file_done", filename, status_str)  — per-file result label
+        ("log", message, is_error)
+        ("progress", percent)                — 0-100 overall %
+        ("timing", summary)                  — StageStats.summary() at the end
+        ("connections", stats)               — HTTP connection reuse, see below
+    stream() / astream() upload an open-ended stream of paths instead.
+    `files` may also be a core.streams.UploadBacklog fed by a compression
+    that is still running; progress is then relative to the files
+    compressed so far. A backlog may also hand over in-memory files
+    (core.streams.MemoryUpload): their bytes are posted as they are, dated
+    by the original, and released from the backlog's budget once uploaded.
+    With `keep_failed`, an in-memory file whose upload fails is written to
+    its output path so a later upload can retry it; so are the ones still
+    queued or uploading when the run is cancelled (see `cancel_log`).
+
+    pause() holds back uploads that have not started yet; uploads already in
+    flight are allowed to finish. `workers` overrides the default of
+    min(10, CPUs) upload threads.
+
+    Each run posts through one make_session() pool with a keep-alive
+    connection per thread and `retries` transport retries. When it ends,
+    `connections` holds connection_stats() plus the number of retries.
+
+    Every upload's stages (queue wait, paused, prepare, upload) are timed
+    into `timing`; with `trace_path` a Chrome / Perfetto trace of the upload
+    threads is written there when the run ends. With `report` (a started
+    core.report.RunReport) every upload's result and timings are streamed
+    into it; the caller closes it.
+    """
+
+    def __init__(self, files: FileList | list[str] | UploadBacklog, server_url: str, api_key: str, workers: int = 0,
+                 trace_path: str | None = None, report: RunReport | None = None, keep_failed: bool = False,
+                 retries: int = 3):
+        self.files      = files
+        self.workers    = workers
+        self.server_url = server_url.rstrip("/")
+        self.api_key    = api_key
+        self.trace_path = trace_path
+        self.report     = report
+        self.keep_failed = keep_failed
+        self.retries    = retries
+        self.timing     = StageStats()
+        self.connections: dict | None = None
+        self.trace_log: tuple[str, bool] | None = None
+        self.cancel_log: tuple[str, bool] | None = None
+        self._cancel    = False
+        self._running   = threading.Event()
+        self._running.set()
+
+    def cancel(self):
+        self._cancel = True
+        self._running.set()  # release workers parked by pause()
+        if isinstance(self.files, UploadBacklog):
+            self.files.close()   # and a feeder waiting for the next compressed file
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def events(self):
+        # A backlog starts empty and grows while compression runs
+        growing = isinstance(self.files, UploadBacklog)
+        if not growing and len(self.files) == 0:
+            return
+
+        completed = 0
+        for file_path, result_label, log_warn_err in self.stream(self.files):
+            yield ("file_done", os.path.basename(file_path), result_label)
+            if log_warn_err:
+                yield ("log", log_warn_err[0], log_warn_err[1])
+            completed += 1
+            yield ("progress", int(completed / max(len(self.files), 1) * 100))
+
+        if self.timing:
+            yield ("timing", self.timing.summary())
+        if self.connections and self.connections["requests"]:
+            yield ("connections", self.connections)
+        if self.trace_log:
+            yield ("log", *self.trace_log)
+        if self.cancel_log:
+            yield ("log", *self.cancel_log)
+        if self._cancel:
+            yield ("log", "Upload cancelled by user.", False)
+
+    def stream(self, paths):
+        """
+        Upload the files of an open-ended stream of paths (or MemoryUpload
+        items), yielding (path, result_label, (log_msg, is_err) | None) as
+        each one completes.
+        Only about two uploads per thread are queued ahead, so paths are
+        pulled no faster than they are uploaded and consumed. Closing the
+        generator early cancels the rest.
+        """
+        upload_url = f"{self.server_url}/api/assets"
+        headers = {"x-api-key": self.api_key}
+
+        # Keep workers reasonable (e.g. 5-10) to not hammer the server network layer too violently.
+        max_workers = self.workers or min(10, os.cpu_count() or 4)
+        slots = threading.Semaphore(max_workers * 2)
+        done  = queue.Queue()
+        fed   = threading.Event()
+        fed_count = 0
+        inflight: dict[concurrent.futures.Future, str | MemoryUpload] = {}
+        leftover: list = []   # pulled from `paths` but never started
+        backlog = paths if isinstance(paths, UploadBacklog) else None
+        session = make_session(max_workers, self.retries)
+        posted  = 0   # uploads that reached the network; the session's other requests are retries
+        trace = TraceWriter(self.trace_path, "upload") if self.trace_path else None
+        report = self.report if self.report and not self.report.error else None
+        if report:
+            report.add({"record": "run", "settings": {
+                "job": "upload", "server": self.server_url, "workers": max_workers,
+            }})
+
+        def feed():
+            nonlocal fed_count
+            try:
+                for item in paths:
+                    while not self._cancel and not slots.acquire(timeout=0.25):
+                        pass
+                    if not self._cancel:
+                        try:
+                            fut = executor.submit(self._upload_worker, item, session, upload_url, headers,
+                                                  time.monotonic_ns())
+                        except RuntimeError:
+                            pass   # shut down by a cancel meanwhile
+                        else:
+                            # We map futures to items so we can track errors back to filename
+                            inflight[fut] = item
+                            fut.add_done_callback(lambda f, i=item: done.put((i, f)))
+                            fed_count += 1
+                            continue
+                    leftover.append(item)
+                    # A cancelled backlog is closed: take the rest of it, so its in-memory files are settled too
+                    if backlog is None:
+                        return
+            finally:
+                fed.set()
+                done.put(None)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        received = 0
+        try:
+            while not (fed.is_set() and received == fed_count):
+                entry = done.get()
+                if entry is None:
+                    continue
+                if self._cancel:
+                    break
+                item, future = entry
+                inflight.pop(future, None)
+                file_path = item.path if isinstance(item, MemoryUpload) else item
+                received += 1
+                slots.release()
+                try:
+                    result_label, log_warn_err, (track, spans) = future.result()
+                except Exception as exc:
+                    result_label, log_warn_err, track, spans = \
+                        "FAILED", (f"[ERROR] {os.path.basename(file_path)}: {exc}", True), "", ()
+                if isinstance(item, MemoryUpload):
+                    note = self._settle(item, result_label, backlog)
+                    if note:
+                        msg = log_warn_err[0] if log_warn_err else f"[WARN] {os.path.basename(file_path)}: {result_label}"
+                        log_warn_err = (f"{msg} — {note}", True)
+                self.timing.add_spans(spans)
+                posted += any(stage == "upload" for stage, _, _ in spans)
+                if trace:
+                    name = os.path.basename(file_path)
+                    for stage, start, end in spans:
+                        # Queue waits overlap each other, so they get async rows
+                        if stage == "queue":
+                            trace.add_wait(stage, start, end, {"file": name})
+                        else:
+                            trace.add(track, stage, start, end, {"file": name, "result": result_label})
+                if report:
+                    try:
+                        report.add({
+                            "record": "upload", "source": file_path, "status": result_label,
+                            "error": log_warn_err[0] if log_warn_err else None, "spans": spans,
+                        })
+                    except Exception:
+                        report = None   # the writer failed; close() raises it to the caller
+                yield (file_path, result_label, log_warn_err)
+        finally:
+            left_early = not (fed.is_set() and received == fed_count)
+            if left_early:
+                # Left early (cancel, break, error): start nothing new, release paused workers
+                self.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            if left_early:
+                self._settle_rest(inflight, leftover, backlog, feeder)
+            stats = connection_stats(session)
+            self.connections = dict(stats, retries=max(0, stats["requests"] - posted))
+            # Uploads still running after a cancel close their connection when they return it
+            session.close()
+            if trace:
+                try:
+                    self.trace_log = (f"Timing trace written to {trace.write()}", False)
+                except OSError as exc:
+                    self.trace_log = (f"Cannot write timing trace: {exc}", True)
+
+    def _settle(self, item: MemoryUpload, result_label: str, backlog: UploadBacklog | None) -> str | None:
+        """
+        Release an in-memory file once its upload is over; with keep_failed,
+        one that did not reach the server is written out first. Returns a
+        note for its log line.
+        """
+        note = None
+        if self.keep_failed and result_label not in ("uploaded", "duplicate (skipped)"):
+            note = _keep(item)
+        if backlog is not None:
+            backlog.done(item)
+        return note
+
+    def _settle_rest(self, inflight: dict, leftover: list, backlog: UploadBacklog | None,
+                     feeder: threading.Thread):
+        """
+        After a cancel: settle the in-memory files nobody will report on —
+        uploads still queued or running, and files pulled but never started.
+        Running uploads are not waited for, so they count as not uploaded.
+        """
+        if backlog is not None:
+            backlog.close()
+        feeder.join(timeout=1.0)   # lets it hand over a closed backlog's remaining files
+        rest = []
+        for future, item in list(inflight.items()):
+            label = "cancelled"
+            if future.done() and not future.cancelled() and future.exception() is None:
+                label = future.result()[0]
+            rest.append((item, label))
+        rest += [(item, "cancelled") for item in list(leftover)]
+
+        missed = kept = 0
+        for item, label in rest:
+            if not isinstance(item, MemoryUpload):
+                continue
+            note = self._settle(item, label, backlog)
+            if label not in ("uploaded", "duplicate (skipped)"):
+                missed += 1
+                kept += bool(note) and note.startswith("kept")
+        if missed:
+            msg = f"{missed} in-memory file(s) were not uploaded before the cancel"
+            if self.keep_failed:
+                msg += f"; {kept} kept in the output folder"
+            self.cancel_log = (msg + ".", bool(missed - kept))
+
+    async def astream(self, paths):
+        """
+        Async version of stream(): `paths` may be a sync or async iterable.
+        Stop awaiting and no new uploads start; cancelling the consuming
+        task (or leaving the loop) cancels the rest.
+        """
+        if hasattr(paths, "__aiter__"):
+            paths = iterate_async(paths, asyncio.get_running_loop())
+        async for result in run_in_thread(lambda: self.stream(paths), self.cancel):
+            yield result
+
+    def _upload_worker(self, item: str | MemoryUpload, session: requests.Session, upload_url: str,
+                       headers: dict, queued_ns: int):
+        """
+        Worker thread function; `item` is a path or an in-memory file.
+        Returns -> (result_label_str, (log_msg_str, is_err_bool) | None, (thread_name, spans))
+        where spans are core.timing (stage, start_ns, end_ns) tuples.
+        """
+        clock = time.monotonic_ns
+        spans = [("queue", queued_ns, clock())]
+        timing = (threading.current_thread().name, spans)
+        if not self._running.is_set():
+            t0 = clock()
+            self._running.wait()
+            spans.append(("paused", t0, clock()))
+        if self._cancel:
+            return ("cancelled", None, timing)
+
+        t0 = clock()
+        if isinstance(item, MemoryUpload):
+            file_path, dated, data = item.path, item.source, item.data
+        else:
+            file_path = dated = item
+            data = None
+        filename = os.path.basename(file_path)
+        mime, _ = mimetypes.guess_type(file_path)
+        if not mime:
+            mime = "application/octet-stream"
+
+        try:
+            created = _file_created_iso(dated)
+            t1 = clock()
+            spans.append(("prepare", t0, t1))
+            try:
+                with (open(file_path, "rb") if data is None else contextlib.nullcontext(data)) as f:
+                    resp = session.post(
+                        upload_url,
+                        headers=headers,
+                        files={"assetData": (filename, f, mime)},
+                        data={
+                            "deviceAssetId": filename,
+                            "deviceId":      "RaidCloudImmichSuite",
+                            "fileCreatedAt": created,
+                            "fileModifiedAt": created,
+                            "isFavorite":    "false",
+                        },
+                        timeout=120,
+                    )
+            finally:
+                spans.append(("upload", t1, clock()))
+
+            if resp.status_code in (200, 201):
+                return ("uploaded", None, timing)
+            elif resp.status_code == 409:
+                # After a 5xx the first attempt may have been stored: the duplicate is our own upload
+                return ("uploaded" if _resent_after_5xx(resp) else "duplicate (skipped)", None, timing)
+            else:
+                return (f"error {resp.status_code}", (f"[WARN] {filename}: HTTP {resp.status_code} — {resp.text[:80]}", True), timing)
+
+        except Exception as exc:
+            return ("FAILED", (f"[ERROR] {filename}: {exc}", True), timing)
+
+
+def _resent_after_5xx(resp: requests.Response) -> bool:
+    """True when urllib3 re-sent the request after a 5xx response (not 429 or a failed connect)."""
+    history = getattr(getattr(resp.raw, "retries", None), "history", ())
+    return any(h.status and h.status >= 500 for h in history)
+
+
+def _keep(item: MemoryUpload) -> str:
+    """Write a failed in-memory upload to its output path; returns a note for its log line."""
+    try:
+        os.makedirs(os.path.dirname(item.path), exist_ok=True)
+        with open(item.path, "wb") as f:
+            f.write(item.data)
+    except OSError as exc:
+        return f"could not keep a copy: {exc}"
+    return f"kept at {item.path}"
+
+
+def _file_created_iso(path: str) -> str:
+    """
+    Return the file's creation time as an ISO-8601 string.
+    - macOS:   st_birthtime  (true creation time)
+    - Windows: st_ctime      (creation time on NTFS)
+    - Linux:   st_mtime      (no creation time available, fall back to mtime)
+    """
+    stat = os.stat(path)
+    if sys.platform == "darwin":
+        ts = getattr(stat, "st_birthtime", stat.st_mtime)
+    elif sys.platform.startswith("win"):
+        ts = stat.st_ctime          # st_ctime = creation time on Windows NTFS
+    else:
+        ts = stat.st_mtime          # Linux fallback
+    return datetime.datetime.fromtimestamp(ts).isoformat()
@@ -0,0 +1,94 @@
+"""
+core/layout.py — Output path planning for the compressor.
+Decides where each compressed file goes (flat, mirrored or hash-sharded) and
+creates every output directory exactly once per run.
+"""
+
+import hashlib
+import os
+
+# mode key → display label
+OUTPUT_LAYOUTS = {
+    "flat":    "Flat (single folder)",
+    "mirror":  "Mirror source tree",
+    "sharded": "Sharded (hashed sub-folders)",
+}
+
+
+class OutputLayout:
+    """
+    Maps source files to output base paths (without extension — the worker
+    appends it once the output format is known).
+
+    - flat:    <out>/<stem>_C
+    - mirror:  <out>/<relative source dir>/<stem>_C
+    - sharded: <out>/<h0>/<h1>/<stem>_C, where h0/h1 come from a hash of the
+               file's relative path; each level has 256 buckets so directories
+               stay small even for millions of files.
+
+    Files outside the source folder keep none of their folders: mirror puts
+    them at the top of the output folder and sharded hashes their absolute
+    path, so no output path ever resolves outside the output folder.
+
+    Names are deduplicated case-insensitively within each output directory
+    (`IMG_0001_C`, `IMG_0001_C_2`, …) so files never overwrite each other, and
+    NTFS / APFS behave the same as ext4. Planning is deterministic for a given
+    scan order.
+    """
+
+    def __init__(self, source_folder: str, output_folder: str, mode: str = "flat", shard_depth: int = 1):
+        if mode not in OUTPUT_LAYOUTS:
+            raise ValueError(f"Unknown output layout: {mode}")
+        self.source_folder = os.path.abspath(source_folder)
+        self.output_folder = os.path.abspath(output_folder)
+        self.mode          = mode
+        self.shard_depth   = max(1, shard_depth)
+        self._used: set[str] = set()
+        self._made: set[str] = set()
+
+    def relative(self, file_path: str) -> str:
+        """Return the output base path relative to the output folder (always '/'-separated)."""
+        abs_path = os.path.abspath(file_path)
+        try:
+            rel = os.path.relpath(abs_path, self.source_folder)
+        except ValueError:
+            rel = abs_path   # another drive (Windows)
+        if os.path.isabs(rel) or rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            # Not under the source folder (e.g. paths streamed in from elsewhere): keep
+            # its folders out of the output path so it cannot land outside the output folder
+            rel_dir, filename = "", os.path.basename(abs_path)
+            hashed = abs_path
+        else:
+            rel_dir, filename = os.path.split(rel)
+            hashed = rel
+        stem = os.path.splitext(filename)[0]
+
+        if self.mode == "mirror":
+            parts = [p for p in rel_dir.split(os.sep) if p and p != os.curdir]
+        elif self.mode == "sharded":
+            digest = hashlib.blake2b(hashed.replace(os.sep, "/").encode("utf-8"), digest_size=8).hexdigest()
+            parts = [digest[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        else:
+            parts = []
+
+        base = "/".join(parts + [f"{stem}_C"])
+        key  = base.lower()
+        n = 1
+        while key in self._used:
+            n += 1
+            key = f"{base}_{n}".lower()
+        self._used.add(key)
+        return base if n == 1 else f"{base}_{n}"
+
+    def path(self, file_path: str) -> str:
+        """Return the absolute output base path without creating anything."""
+        return os.path.join(self.output_folder, *self.relative(file_path).split("/"))
+
+    def plan(self, file_path: str) -> str:
+        """Return the absolute output base path, creating its directory if this is the first use."""
+        base = self.path(file_path)
+        out_dir = os.path.dirname(base)
+        if out_dir not in self._made:
+            os.makedirs(out_dir, exist_ok=True)
+            self._made.add(out_dir)
+        return base
@@ -0,0 +1,198 @@
+"""
+core/memory.py — Opt-in memory instrumentation.
+A sampler thread reads the RSS of watched process groups (the app itself,
+compression workers, the immich-go child tree) with psutil at a fixed
+interval, keeps a short per-process history so a finished file's peak can
+be looked up from its timing spans, and optionally runs tracemalloc in
+this process to name the Python allocation sites behind its growth.
+"""
+
+import collections
+import heapq
+import os
+import threading
+import time
+import tracemalloc
+
+import psutil
+
+# Samples kept per process: at the default interval, the last minute
+_HISTORY = 600
+
+
+class MemorySampler(threading.Thread):
+    """
+    Samples RSS every `interval` seconds until close().
+
+    watch(group, pids_fn) adds a group; pids_fn is called on the sampler
+    thread every round and returns the pids to sample (with `children`, each
+    one's descendants are included). Every round updates the current and
+    peak RSS per group, and the history used by file_peak().
+
+    With `tracemalloc_frames` > 0, tracemalloc runs in this process for the
+    sampler's lifetime, keeping that many frames per allocation.
+    """
+
+    def __init__(self, interval: float = 0.1, tracemalloc_frames: int = 0, top_files: int = 10):
+        super().__init__(daemon=True, name="memory-sampler")
+        self.interval = interval
+        self.tracemalloc_frames = tracemalloc_frames
+        self._groups: dict[str, tuple] = {}                 # group → (pids_fn, children)
+        self._procs: dict[int, psutil.Process] = {}
+        self._history: dict[int, collections.deque] = {}   # pid → (monotonic_ns, rss)
+        self._current: dict[str, int] = {}
+        self._peaks: dict[str, int] = {}
+        self._total_peak = 0
+        self._top: list[tuple] = []                          # min-heap of (peak, file, stage)
+        self._top_n = top_files
+        self._lock = threading.Lock()
+        self._halt = threading.Event()
+
+    # ── Setup ────────────────────────────────────────────────────────────────
+    def watch(self, group: str, pids_fn, children: bool = False):
+        with self._lock:
+            self._groups[group] = (pids_fn, children)
+            self._peaks.setdefault(group, 0)
+
+    def unwatch(self, group: str):
+        """Stop sampling a group; its peak is kept for the summary."""
+        with self._lock:
+            self._groups.pop(group, None)
+            self._current.pop(group, None)
+
+    def start(self):
+        if self.tracemalloc_frames and not tracemalloc.is_tracing():
+            tracemalloc.start(self.tracemalloc_frames)
+        super().start()
+
+    def close(self):
+        self._halt.set()
+        if self.is_alive():
+            self.join()
+        if self.tracemalloc_frames and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # ── Sampler thread ───────────────────────────────────────────────────────
+    def run(self):
+        while True:
+            self._sample()
+            if self._halt.wait(self.interval):
+                return
+
+    def _rss(self, pid: int) -> int:
+        proc = self._procs.get(pid)
+        try:
+            if proc is None:
+                proc = self._procs[pid] = psutil.Process(pid)
+            return proc.memory_info().rss
+        except psutil.Error:
+            self._procs.pop(pid, None)
+            return 0
+
+    def _sample(self):
+        with self._lock:
+            groups = list(self._groups.items())
+        now = time.monotonic_ns()
+        current = {}
+        for group, (pids_fn, children) in groups:
+            try:
+                pids = list(pids_fn())
+            except Exception:
+                continue   # the owner is starting up or shutting down
+            if children:
+                for pid in list(pids):
+                    try:
+                        pids.extend(c.pid for c in psutil.Process(pid).children(recursive=True))
+                    except psutil.Error:
+                        pass
+            total = 0
+            for pid in pids:
+                rss = self._rss(pid)
+                if rss:
+                    total += rss
+                    self._history.setdefault(pid, collections.deque(maxlen=_HISTORY)).append((now, rss))
+            current[group] = total
+        # Forget processes gone for longer than the history spans (recycled workers)
+        horizon = now - int(_HISTORY * self.interval * 1e9)
+        for pid in [p for p, h in self._history.items() if h[-1][0] < horizon]:
+            del self._history[pid]
+            self._procs.pop(pid, None)
+        with self._lock:
+            for group, total in current.items():
+                if group in self._groups:
+                    self._current[group] = total
+                    self._peaks[group] = max(self._peaks.get(group, 0), total)
+            self._total_peak = max(self._total_peak, sum(self._current.values()))
+
+    # ── Queries (any thread) ─────────────────────────────────────────────────
+    def file_peak(self, pid: int, spans) -> tuple[int, str] | None:
+        """
+        Peak RSS of process `pid` while it ran `spans` (core.timing spans of
+        one file) and the stage it was in, or None if no sample fell inside
+        them — files much shorter than the interval are not measured.
+        """
+        history = self._history.get(pid)
+        if not history or not spans:
+            return None
+        best = None
+        for t, rss in list(history):
+            if t < spans[0][1] or t > spans[-1][2]:
+                continue
+            if best is None or rss > best[0]:
+                stage = next((s for s, start, end in spans if start <= t <= end), spans[-1][0])
+                best = (rss, stage)
+        return best
+
+    def record_file(self, name: str, peak: int, stage: str):
+        """Keep `name` among the files with the highest peaks."""
+        with self._lock:
+            item = (peak, name, stage)
+            if len(self._top) < self._top_n:
+                heapq.heappush(self._top, item)
+            elif item > self._top[0]:
+                heapq.heapreplace(self._top, item)
+
+    def snapshot(self) -> dict:
+        """
+        {"groups": {group: {"rss", "peak"}}, "total", "total_peak",
+         "top_files": [(peak, file, stage), …], "traced": (current, peak) | None}
+        """
+        with self._lock:
+            groups = {g: {"rss": self._current.get(g, 0), "peak": p} for g, p in self._peaks.items()}
+            snap = {
+                "groups":     groups,
+                "total":      sum(self._current.values()),
+                "total_peak": self._total_peak,
+                "top_files":  sorted(self._top, reverse=True),
+            }
+        snap["traced"] = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+        return snap
+
+    def top_allocations(self, limit: int = 10) -> list[str]:
+        """The largest live Python allocation sites in this process (tracemalloc only)."""
+        if not tracemalloc.is_tracing():
+            return []
+        stats = tracemalloc.take_snapshot().statistics("lineno")
+        return [f"{s.size / 2**20:8.1f} MB  {s.count:7d} blocks  {s.traceback}" for s in stats[:limit]]
+
+
+def _mb(n: int) -> str:
+    return f"{n / 2**20:,.0f} MB"
+
+
+def format_snapshot(snap: dict) -> str:
+    """One line per group plus the total, for the live panels."""
+    lines = [f"{group:<10} {_mb(g['rss']):>9}   peak {_mb(g['peak']):>9}" for group, g in snap["groups"].items()]
+    lines.append(f"{'total':<10} {_mb(snap['total']):>9}   peak {_mb(snap['total_peak']):>9}")
+    if snap["traced"]:
+        current, peak = snap["traced"]
+        lines.append(f"{'python':<10} {_mb(current):>9}   peak {_mb(peak):>9}  (tracemalloc)")
+    return "\n".join(lines)
+
+
+def format_top_files(snap: dict, limit: int = 5) -> list[str]:
+    """The files with the highest worker peaks, one line each."""
+    return [
+        f"{_mb(peak):>9}  {os.path.basename(name)}  ({stage})"
+        for peak, name, stage in snap["top_files"][:limit]
+    ]
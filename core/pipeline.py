@@ -0,0 +1,541 @@
+"""
+core/pipeline.py — Qt-free compression pipeline.
+Everything the compressor does (scan, filters, worker pool or LAN
+coordinator, archive / folder output) lives here so the GUI, the headless
+CLI and scripts all drive the same code.
+"""
+
+import asyncio
+import datetime
+import os
+import threading
+import time
+
+from core.archive     import ArchiveWriter
+from core.dedupe      import find_near_duplicates
+from core.distributed import Coordinator
+from core.exifdate    import CaptureDateFilter
+from core.filelist    import FileList, walk
+from core.imaging     import VALID_IMAGE_EXTENSIONS, _compress_worker, compress_options
+from core.layout      import OutputLayout
+from core.memory      import MemorySampler
+from core.prefetch    import ReadAhead
+from core.report      import RunReport
+from core.priority    import lower_priority
+from core.streams     import TaskFeed, iterate_async, run_in_thread
+from core.timing      import StageStats, TraceWriter
+from core.worker_pool import WorkerPool
+
+
+def estimate_compressed_size(
+    folder: str,
+    output_format: str,
+    jpeg_quality: int,
+    png_compression: int,
+    adaptive_quality: bool = False,
+    png_quantize: bool = False,
+) -> tuple[int, int]:
+    """
+    Quick estimation: sample up to 5 files and extrapolate.
+    Samples go through the same encode path as the real run (format
+    prediction included), just into memory.
+    Returns (estimated_bytes, total_file_count).
+    """
+    files = FileList.scan(folder, VALID_IMAGE_EXTENSIONS, stat=True)
+    if not files:
+        return 0, 0
+
+    options = compress_options(
+        output_format, jpeg_quality, png_compression,
+        preserve_exif=False, adaptive_quality=adaptive_quality, to_bytes=True,
+        png_quantize=png_quantize,
+    )
+    sample = files[:5]
+    sample_orig = sample.total_size()
+    sample_compressed = 0
+    for path in sample:
+        _, ok, _, _, data, _ = _compress_worker(path, "", options, max_retries=1)
+        sample_compressed += len(data) if ok else os.path.getsize(path)
+
+    ratio = sample_compressed / max(sample_orig, 1)
+    return int(files.total_size() * ratio), len(files)
+
+
+def compress_files(paths, output_folder: str, source_folder: str = ".", **options):
+    """
+    Sync generator: compress every path of `paths` (any iterable, consumed
+    lazily) into `output_folder`, yielding (path, ok, out_path, error) as
+    files complete. `options` are CompressionJob's keyword arguments.
+    """
+    yield from CompressionJob(source_folder, output_folder, **options).stream(paths)
+
+
+async def acompress_files(paths, output_folder: str, source_folder: str = ".", **options):
+    """
+    Async-iterator version of compress_files(); `paths` may also be an
+    async iterable. Usable from any asyncio service without Qt:
+
+        async for path, ok, out_path, err in acompress_files(paths, "/tmp/out", output_format="WEBP"):
+            ...
+    """
+    async for result in CompressionJob(source_folder, output_folder, **options).astream(paths):
+        yield result
+
+
+class CompressionJob:
+    """
+    Compresses all images in a source folder and saves them to an output folder,
+    laid out flat, mirroring the source tree or hash-sharded (see OutputLayout).
+    Uses WorkerPool to compress multiple files concurrently across CPU cores.
+
+    Workers are recycled after `max_tasks_per_child` files to keep Pillow /
+    libjpeg heap growth bounded, and a file that takes longer than
+    `task_timeout` seconds gets its worker killed and replaced; that file is
+    reported as timed out and the run carries on. `workers` overrides the
+    default pool size of min(4, CPUs).
+
+    With `archive_path` (.zip or .tar) workers return encoded bytes instead of
+    writing files, and a single ArchiveWriter thread streams them into one
+    archive; out_path is then the member name inside the archive.
+
+    With `sink`, nothing is written either: each encoded image is handed to
+    sink(source, out_path, data) as it completes (e.g. UploadBacklog.put for
+    an upload straight from memory) and out_path is where it would have been
+    written. If the sink raises, the file counts as failed.
+
+    With `read_ahead_mb` > 0 a ReadAhead stage prefetches upcoming files into
+    shared memory (up to that many MB) on a pool of I/O threads, so workers
+    decode straight from memory even when the source is a slow network share.
+
+    pause() / resume() stop dispatching and suspend the workers, and so does
+    throttle(True) (backpressure from an upload running alongside, see
+    core.streams.UploadBacklog) until throttle(False); with `background`
+    the workers run at low CPU and I/O priority.
+
+    With `date_range` (start, end) only files whose EXIF capture date (or,
+    lacking one, modification date) falls inside the range are compressed.
+    Headers are read on I/O threads while the folder is walked, and
+    out-of-range files are dropped before any worker is started.
+
+    With `dedupe` set to "flag" or "skip", near-identical frames (bursts,
+    retakes) are clustered by perceptual hash before dispatch; "skip" then
+    compresses only the best frame of each cluster.
+
+    With `distributed_port` set, files are compressed by worker hosts that
+    connect to a Coordinator on that port (see core.distributed) instead of
+    a local pool. With `distributed_stream` the source bytes are sent to the
+    hosts and the encoded bytes come back to be written here; otherwise the
+    hosts read and write the paths themselves through a shared mount.
+
+    Every file's stages (queue wait, read, analyze, decode, convert, encode,
+    write) are timed into `timing`, a core.timing.StageStats; with
+    `trace_path` a Chrome / Perfetto trace of every worker's timeline is
+    written there when the run ends. Remote hosts' clocks are not ours, so a
+    distributed run only contributes stage durations, not timeline or queue
+    waits.
+
+    With `report` (a started core.report.RunReport) every file's outcome,
+    sizes, dimensions, chosen format / quality and stage timings are
+    streamed into the report as it completes; the caller closes it.
+
+    With `memory` (a started core.memory.MemorySampler) the pool's workers
+    are sampled as the "workers" group, and each file's peak worker RSS and
+    the stage it peaked in go to the sampler's top files and the report.
+
+    events() runs the job and yields, in order:
+        ("duplicates", clusters, dup_bytes)             — [(kept, [near-duplicates…]), …] when dedupe is on,
+                                                          and the near-duplicates' total source size
+        ("scanned", total, skipped)                     — files to compress / dropped by the date filter
+        ("file_done", filename, ok, out_path, error, output_bytes)
+                                                        — per-file result, as files complete
+        ("progress", percent)                           — 0-100 overall %
+        ("timing", summary)                             — StageStats.summary() at the end
+    stream() / astream() instead compress an open-ended stream of paths and
+    yield per-file results only.
+    `on_status` is called (possibly from another thread) with coordinator
+    messages such as workers joining or being lost.
+    """
+
+    def __init__(
+        self,
+        source_folder: str,
+        output_folder: str,
+        output_format: str = "JPEG",
+        jpeg_quality: int = 85,
+        png_compression: int = 6,
+        preserve_exif: bool = True,
+        adaptive_quality: bool = False,
+        png_quantize: bool = False,
+        png_colors: int = 256,
+        png_dither: bool = True,
+        jpeg_subsampling: int = -1,
+        jpeg_progressive: bool = False,
+        max_tasks_per_child: int = 200,
+        task_timeout: int = 300,
+        output_layout: str = "flat",
+        archive_path: str | None = None,
+        read_ahead_mb: int = 128,
+        background: bool = False,
+        date_range: tuple[datetime.date, datetime.date] | None = None,
+        dedupe: str = "off",
+        distributed_port: int = 0,
+        distributed_secret: str = "",
+        distributed_stream: bool = True,
+        workers: int = 0,
+        trace_path: str | None = None,
+        report: RunReport | None = None,
+        memory: MemorySampler | None = None,
+        sink=None,
+        on_status=None,
+    ):
+        self.source_folder       = source_folder
+        self.output_folder       = output_folder
+        self.output_format       = output_format
+        self.jpeg_quality        = jpeg_quality
+        self.png_compression     = png_compression
+        self.preserve_exif       = preserve_exif
+        self.adaptive_quality    = adaptive_quality
+        self.png_quantize        = png_quantize
+        self.png_colors          = png_colors
+        self.png_dither          = png_dither
+        self.jpeg_subsampling    = jpeg_subsampling
+        self.jpeg_progressive    = jpeg_progressive
+        self.max_tasks_per_child = max_tasks_per_child
+        self.task_timeout        = task_timeout
+        self.output_layout       = output_layout
+        self.archive_path        = archive_path
+        self.read_ahead_mb       = read_ahead_mb
+        self.background          = background
+        self.date_range          = date_range
+        self.dedupe              = dedupe
+        self.distributed_port    = distributed_port
+        self.distributed_secret  = distributed_secret
+        self.distributed_stream  = distributed_stream
+        self.workers             = workers
+        self.trace_path          = trace_path
+        self.report              = report
+        self.memory              = memory
+        self.sink                = sink
+        self.timing              = StageStats()
+        self.on_status           = on_status or (lambda msg: None)
+        self._pool: WorkerPool | Coordinator | None = None
+        self._cancel             = False
+        self._paused             = False
+        self._throttled          = False
+        self._pause_lock         = threading.Lock()
+
+    def cancel(self):
+        self._cancel = True
+        if self._pool:
+            self._pool.cancel()
+
+    def pause(self):
+        self._paused = True
+        self._apply_pause()
+
+    def resume(self):
+        self._paused = False
+        self._apply_pause()
+
+    def throttle(self, on: bool):
+        """
+        Hold back (or release) the run for backpressure, e.g. from an
+        UploadBacklog; independent of pause() / resume(), so a user's pause
+        survives the backlog draining. Safe to call from any thread.
+        """
+        self._throttled = on
+        self._apply_pause()
+
+    def _apply_pause(self):
+        with self._pause_lock:
+            if self._pool:
+                if self._paused or self._throttled:
+                    self._pool.pause()
+                else:
+                    self._pool.resume()
+
+    def events(self):
+        files = FileList()
+        date_filter = CaptureDateFilter(*self.date_range) if self.date_range else None
+        # Never re-compress a previous run's output (the default output lives inside the source)
+        for root, name, _ in walk(self.source_folder, VALID_IMAGE_EXTENSIONS, skip_dirs=(self.output_folder,)):
+            if date_filter:
+                date_filter.submit(os.path.join(root, name))
+            else:
+                files.add(root, name)
+
+        if date_filter:
+            files = date_filter.results()
+
+        if self.dedupe != "off" and len(files) > 1:
+            clusters = find_near_duplicates(files)
+            yield ("duplicates", clusters, sum(_file_size(p) for _, dups in clusters for p in dups))
+            if self.dedupe == "skip":
+                dropped = {p for _, dups in clusters for p in dups}
+                files = files.filter(lambda p: p not in dropped)
+
+        yield ("scanned", len(files), date_filter.skipped if date_filter else 0)
+
+        if not files:
+            return
+
+        files.sort()
+        total = len(files)
+        completed = 0
+        for path, ok, out_path, err_msg, details in self._fed(files):
+            yield ("file_done", os.path.basename(path), ok, out_path, err_msg,
+                   details.get("output_bytes", 0) if ok else 0)
+            completed += 1
+            yield ("progress", min(100, int((completed / total) * 100)))
+        if self.timing:
+            yield ("timing", self.timing.summary())
+
+    def stream(self, paths):
+        """
+        Compress the files of an open-ended stream of paths, yielding
+        (path, ok, out_path, error) as each one completes.
+
+        Paths are pulled lazily (a few ahead of the workers, read-ahead
+        included), so a slow consumer or a slow source never buffers more
+        than a handful of files. The folder scan, date filter and dedupe of events() do not
+        apply; `source_folder` only anchors the mirror / sharded layouts.
+        Closing the generator early cancels the run.
+        """
+        for result in self._fed(paths, max_ahead=2 * self._pending_limit()):
+            yield result[:4]
+
+    async def astream(self, paths):
+        """
+        Async version of stream(): `paths` may be a sync or async iterable,
+        results are yielded on the running event loop. Backpressure follows
+        the consumer — stop awaiting and the workers stop being fed — and
+        cancelling the consuming task (or leaving the loop) cancels the run.
+        """
+        if hasattr(paths, "__aiter__"):
+            paths = iterate_async(paths, asyncio.get_running_loop())
+        async for result in run_in_thread(lambda: self.stream(paths), self.cancel):
+            yield result
+
+    def _fed(self, paths, max_ahead: int = 0):
+        """
+        _compress() with its tasks handed to the pool by a TaskFeed. The pool
+        loop is what collects results and so frees read-ahead budget; it must
+        never block on a slow source or on ReadAhead waiting for that budget.
+        """
+        feed = None
+
+        def wrap(tasks):
+            nonlocal feed
+            feed = TaskFeed(tasks, max_pending=self._pending_limit())
+            return feed
+
+        try:
+            yield from self._compress(paths, wrap, max_ahead)
+        finally:
+            if feed:
+                feed.close()
+        if feed and feed.error:
+            raise feed.error
+
+    def _pending_limit(self) -> int:
+        return self.workers or min(4, os.cpu_count() or 1)
+
+    def _compress(self, paths, wrap_tasks=None, max_ahead: int = 0):
+        """
+        Run `paths` through the pool and the configured output; yields
+        (path, ok, out_path, error, details) as files complete. `wrap_tasks`, if set,
+        turns the task stream into a non-blocking one (see TaskFeed);
+        `max_ahead` caps how many tasks the read-ahead stage pulls early.
+        """
+        layout = OutputLayout(self.source_folder, self.output_folder, self.output_layout)
+
+        distributed = self.distributed_port > 0
+        # Streamed remote results come back as bytes and are written here
+        to_bytes = bool(self.archive_path or self.sink) or (distributed and self.distributed_stream)
+        # Output paths are planned lazily as tasks are dispatched; OutputLayout
+        # creates each output directory only once. Archive members only need
+        # the relative name, and a sink gets paths that are never created.
+        plan = layout.relative if self.archive_path else layout.path if self.sink else layout.plan
+        options = compress_options(
+            self.output_format, self.jpeg_quality, self.png_compression,
+            self.preserve_exif, self.adaptive_quality, to_bytes,
+            self.png_quantize, self.png_colors, self.png_dither,
+            self.jpeg_subsampling, self.jpeg_progressive,
+        )
+        # When each file became ready for the pool; the gap to its first span is its queue wait
+        queued: dict[str, int] = {}
+
+        def make_tasks():
+            for file_path in paths:
+                queued[file_path] = time.monotonic_ns()
+                yield (file_path, plan(file_path), options)
+
+        tasks = make_tasks()
+        trace = TraceWriter(self.trace_path, "compress") if self.trace_path else None
+        if self.report:
+            settings = {k: v for k, v in options.items() if k != "to_bytes"}
+            self._report({"record": "run", "settings": {
+                "job": "compress", **settings, "output_layout": self.output_layout,
+                "archive": self.archive_path, "distributed": distributed, "in_memory": bool(self.sink),
+            }})
+
+        read_ahead = None
+        if self.read_ahead_mb > 0 and not distributed:
+            read_ahead = ReadAhead(tasks, byte_budget=self.read_ahead_mb * 1024 * 1024, max_ahead=max_ahead)
+            tasks = read_ahead
+
+        wakeup = None
+        if wrap_tasks:
+            tasks  = wrap_tasks(tasks)
+            wakeup = tasks.wakeup
+
+        if distributed:
+            try:
+                self._pool = Coordinator(
+                    self.distributed_secret,
+                    port=self.distributed_port,
+                    stream=self.distributed_stream,
+                    max_tasks_per_child=self.max_tasks_per_child,
+                    task_timeout=self.task_timeout,
+                    on_event=self.on_status,
+                )
+            except (OSError, ValueError) as exc:
+                self.on_status(f"Cannot start distributed compression: {exc}")
+                return
+        else:
+            # Limit to 4 workers to prevent OOM on high-core-count machines (e.g. M-series Mac)
+            max_workers = self.workers or min(4, os.cpu_count() or 1)
+            self._pool = WorkerPool(
+                max_workers,
+                max_tasks_per_child=self.max_tasks_per_child,
+                task_timeout=self.task_timeout,
+                initializer=lower_priority if self.background else None,
+            )
+
+        writer = None
+        if self.archive_path:
+            writer = ArchiveWriter(self.archive_path)
+            writer.start()
+
+        memory = self.memory if not distributed else None
+        if memory:
+            pool = self._pool
+            memory.watch("workers", lambda: pool.pids)
+
+        if self._cancel:
+            self._pool.cancel()
+        self._apply_pause()
+
+        drained = False
+        try:
+            with self._pool:
+                # results arrive as they complete rather than in submission order
+                for args, ok, result in self._pool.imap_unordered(_compress_worker, tasks, wakeup=wakeup):
+                    if read_ahead:
+                        read_ahead.release(args[3])
+                    queued_at = queued.pop(args[0], None)
+                    spans, details = (), {}
+                    if ok:
+                        _, ok, out_path, err_msg, data, (pid, spans, details) = result
+                        peak = memory.file_peak(pid, spans) if memory else None
+                        spans = self._record_spans(trace, args[0], queued_at, pid, spans, local=not distributed)
+                        if peak:
+                            memory.record_file(args[0], *peak)
+                            details = dict(details, peak_rss=peak[0], peak_stage=peak[1])
+                    else:
+                        # Worker timed out or died — the pool has already replaced it
+                        # (or, distributed, the task was lost on too many hosts)
+                        out_path, err_msg, data = "", result, None
+
+                    t0 = time.monotonic_ns()
+                    if writer and ok:
+                        try:
+                            writer.add(out_path, data)
+                        except Exception as exc:
+                            ok, err_msg = False, f"archive write failed: {exc}"
+                            self._pool.cancel()
+                    elif self.sink:
+                        if ok:
+                            try:
+                                self.sink(args[0], out_path, data)
+                            except Exception as exc:
+                                ok, err_msg = False, f"hand-off failed: {exc}"
+                        data = None   # nothing written, so no write stage
+                    elif ok and data is not None:
+                        try:
+                            with open(out_path, "wb") as f:
+                                f.write(data)
+                        except OSError as exc:
+                            ok, err_msg = False, f"write failed: {exc}"
+                    if data is not None:
+                        t1 = time.monotonic_ns()
+                        self.timing.add("write", t0, t1)
+                        spans += (("write", t0, t1),)
+                        if trace:
+                            trace.add("main", "write", t0, t1, {"file": args[0]})
+                    if self.report:
+                        self._report({
+                            "record": "compress", "source": args[0],
+                            "output": None if self.sink else out_path or None,
+                            "status": "ok" if ok else "failed", "error": err_msg or None,
+                            **details, "spans": spans,
+                        })
+                    yield (args[0], ok, out_path, err_msg, details)
+            drained = True
+        finally:
+            if read_ahead:
+                # Frees any blocks still held, e.g. after a cancel
+                read_ahead.close()
+            if writer and not drained:
+                # Closed early by the consumer: leave the archive as .partial
+                try:
+                    writer.finish(keep_partial=True)
+                except Exception:
+                    pass
+            if memory:
+                memory.unwatch("workers")
+            if trace:
+                try:
+                    self.on_status(f"Timing trace written to {trace.write()}")
+                except OSError as exc:
+                    self.on_status(f"Cannot write timing trace: {exc}")
+
+        if writer:
+            try:
+                writer.finish(keep_partial=self._cancel)
+            except Exception as exc:
+                yield (self.archive_path, False, "", f"archive write failed: {exc}", {})
+
+    def _record_spans(self, trace, path: str, queued_at: int | None, pid: int, spans, local: bool) -> tuple:
+        """
+        Add one file's worker spans (and its queue wait) to `timing` and the
+        trace; returns the spans with the queue wait included.
+        """
+        self.timing.add_spans(spans)
+        if not (local and spans):
+            return spans
+        if queued_at is not None:
+            self.timing.add("queue", queued_at, spans[0][1])
+        if trace:
+            track = f"worker {pid}"
+            name  = os.path.basename(path)
+            for stage, start, end in spans:
+                trace.add(track, stage, start, end, {"file": name})
+            if queued_at is not None:
+                trace.add_wait("queue", queued_at, spans[0][1], {"file": name})
+        return (("queue", queued_at, spans[0][1]),) + spans if queued_at is not None else spans
+
+    def _report(self, record: dict):
+        """Hand a record to the run report; a failed report is dropped, the run goes on."""
+        try:
+            self.report.add(record)
+        except Exception as exc:
+            self.on_status(f"Run report stopped: {exc}")
+            self.report = None
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,213 @@
+"""
+core/prefetch.py — I/O read-ahead stage for the compressor.
+A small thread pool reads upcoming source files into shared-memory blocks so
+CPU workers never block in open()/read() on slow network shares.
+"""
+
+import os
+import queue
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+
+class ReadAhead:
+    """
+    Wraps a stream of worker task tuples (args[0] = source path) and yields
+    each one with two extra items appended: the name of a shared-memory block
+    holding the file's bytes, and its size. Files that could not be prefetched
+    yield (None, 0) and the worker falls back to reading them itself.
+
+    At most `byte_budget` bytes are held in flight (a single larger file is
+    still let through on its own). With `max_ahead` > 0, at most that many
+    tasks are pulled from `tasks` ahead of the consumer as well, so a budget
+    sized for large files does not drain a lazy source of small ones. The
+    caller must release() every block once its task has finished, and close()
+    the stage when done.
+    """
+
+    def __init__(self, tasks, byte_budget: int = 128 * 1024 * 1024, io_threads: int = 8,
+                 max_ahead: int = 0):
+        self._tasks      = iter(tasks)
+        self._tasks_lock = threading.Lock()
+        self.byte_budget = byte_budget
+        self._used       = 0
+        self.max_ahead   = max_ahead
+        self._ahead      = 0
+        self._cond       = threading.Condition()
+        self._ready      = queue.Queue()
+        self._blocks: dict[str, tuple[shared_memory.SharedMemory, int]] = {}
+        self._closed     = False
+        self._threads    = [
+            threading.Thread(target=self._reader, daemon=True) for _ in range(max(1, io_threads))
+        ]
+        self._alive      = len(self._threads)
+        for t in self._threads:
+            t.start()
+
+    # ── Consumer side ─────────────────────────────────────────────────────────
+    def __iter__(self):
+        while True:
+            item = self._ready.get()
+            if item is None:
+                with self._cond:
+                    self._alive -= 1
+                    if self._alive == 0:
+                        return
+                continue
+            if self.max_ahead:
+                with self._cond:
+                    self._ahead -= 1
+                    self._cond.notify_all()
+            yield item
+
+    def release(self, name: str | None):
+        """Free a block once the worker that used it has finished."""
+        if not name:
+            return
+        with self._cond:
+            shm, size = self._blocks.pop(name, (None, 0))
+            if shm is None:
+                return
+            # shm.size may be rounded up to a page multiple (macOS); charge the file size
+            self._used -= size
+            self._cond.notify_all()
+        shm.close()
+        shm.unlink()
+
+    def close(self):
+        """Stop reading ahead and free every block still held."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for name in list(self._blocks):
+            self.release(name)
+
+    # ── Reader threads ────────────────────────────────────────────────────────
+    def _reader(self):
+        try:
+            while not self._closed:
+                if self.max_ahead:
+                    with self._cond:
+                        while not self._closed and self._ahead >= self.max_ahead:
+                            self._cond.wait()
+                        if self._closed:
+                            break
+                        self._ahead += 1
+                with self._tasks_lock:
+                    args = next(self._tasks, None)
+                if args is None:
+                    if self.max_ahead:
+                        with self._cond:
+                            self._ahead -= 1
+                            self._cond.notify_all()
+                    break
+                self._ready.put(args + self._prefetch(args[0]))
+        finally:
+            self._ready.put(None)
+
+    def _prefetch(self, path: str) -> tuple[str | None, int]:
+        try:
+            size = os.path.getsize(path)
+            if size == 0:
+                return (None, 0)
+
+            with self._cond:
+                while not self._closed and self._used and self._used + size > self.byte_budget:
+                    self._cond.wait()
+                if self._closed:
+                    return (None, 0)
+                self._used += size
+
+            try:
+                shm = shared_memory.SharedMemory(create=True, size=size)
+            except OSError:
+                # /dev/shm full or too small (e.g. in containers) — let the worker read it
+                with self._cond:
+                    self._used -= size
+                    self._cond.notify_all()
+                return (None, 0)
+
+            with self._cond:
+                self._blocks[shm.name] = (shm, size)
+
+            try:
+                with open(path, "rb", buffering=0) as f:
+                    view = shm.buf[:size]
+                    got = 0
+                    while got < size:
+                        n = f.readinto(view[got:])
+                        if not n:
+                            break
+                        got += n
+                    view.release()
+                if got != size:
+                    raise OSError("file changed size while reading")
+            except OSError:
+                self.release(shm.name)
+                return (None, 0)
+
+            return (shm.name, size)
+        except OSError:
+            return (None, 0)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block without handing it to the resource tracker."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching always registers the block, and the tracker shared
+    # with the parent would then fight the ReadAhead over who unlinks it.
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedBufferReader:
+    """
+    Read-only file object over a shared-memory block, so Pillow can decode
+    straight from the prefetched bytes without first copying the whole file
+    into a BytesIO.
+    """
+
+    def __init__(self, name: str, size: int):
+        self._shm  = _attach(name)
+        self._view = self._shm.buf[:size]
+        self._pos  = 0
+
+    @property
+    def buffer(self) -> memoryview:
+        """The whole file as a memoryview over shared memory (no copy)."""
+        return self._view
+
+    def read(self, n: int = -1) -> bytes:
+        end = len(self._view) if n is None or n < 0 else min(self._pos + n, len(self._view))
+        data = bytes(self._view[self._pos:end])
+        self._pos = end
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+            self._shm.close()
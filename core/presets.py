@@ -0,0 +1,55 @@
+"""
+core/presets.py — Named encoder presets for the Compress tab.
+A preset is a dict of the format / quality settings below, keyed like the
+matching AppConfig properties and CompressionJob arguments. bench.sweep
+writes them into its report and, when Qt is available, into the settings.
+"""
+
+import json
+
+# preset key → type it is parsed as
+PRESET_KEYS = {
+    "output_format":    str,
+    "jpeg_quality":     int,
+    "png_compression":  int,
+    "png_quantize":     bool,
+    "png_colors":       int,
+    "jpeg_subsampling": int,
+    "jpeg_progressive": bool,
+}
+
+
+def normalize(preset: dict) -> dict:
+    """Keep the known keys with their proper types; raises ValueError if the format is missing."""
+    if "output_format" not in preset:
+        raise ValueError("preset has no output_format")
+    out = {}
+    for key, kind in PRESET_KEYS.items():
+        if key in preset:
+            value = preset[key]
+            if kind is bool and isinstance(value, str):
+                value = value.lower() == "true"
+            out[key] = kind(value)
+    out["output_format"] = out["output_format"].upper()
+    return out
+
+
+def load_report_presets(path: str) -> dict[str, dict]:
+    """Presets stored in a bench.sweep report (report.json)."""
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    return {name: normalize(p) for name, p in report.get("presets", {}).items()}
+
+
+def save_presets(presets: dict[str, dict]) -> bool:
+    """Merge `presets` into the app settings; False when Qt is not installed."""
+    try:
+        from core.config import AppConfig
+    except ImportError:
+        return False
+    config = AppConfig()
+    saved = config.presets
+    saved.update({name: normalize(p) for name, p in presets.items()})
+    config.presets = saved
+    config.sync()
+    return True
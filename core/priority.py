@@ -0,0 +1,65 @@
+"""
+core/priority.py — Background priority and suspend/resume helpers.
+Used to keep long compression / immich-go runs from competing with whatever
+else the operator is doing on the workstation.
+"""
+
+import os
+import signal
+import sys
+
+import psutil
+
+
+def lower_priority(pid: int | None = None):
+    """
+    Drop a process (default: the current one) to background CPU and I/O priority.
+    Best effort: unsupported platforms or permission errors are ignored.
+    """
+    try:
+        proc = psutil.Process(pid)
+    except psutil.Error:
+        return
+
+    try:
+        if sys.platform.startswith("win"):
+            proc.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            proc.nice(max(proc.nice(), 10))
+    except (psutil.Error, OSError):
+        pass
+
+    # psutil only offers ionice on Linux and Windows (not macOS)
+    if hasattr(proc, "ionice"):
+        try:
+            if sys.platform.startswith("win"):
+                proc.ionice(psutil.IOPRIO_LOW)
+            else:
+                proc.ionice(psutil.IOPRIO_CLASS_IDLE)
+        except (psutil.Error, OSError):
+            pass
+
+
+def suspend_process(pid: int, group: bool = False):
+    """
+    Stop a process (SIGSTOP on POSIX). With group=True on POSIX the whole
+    process group led by `pid` is stopped, which also covers its children.
+    """
+    try:
+        if group and not sys.platform.startswith("win"):
+            os.killpg(os.getpgid(pid), signal.SIGSTOP)
+        else:
+            psutil.Process(pid).suspend()
+    except (psutil.Error, OSError):
+        pass
+
+
+def resume_process(pid: int, group: bool = False):
+    """Counterpart of suspend_process() (SIGCONT on POSIX)."""
+    try:
+        if group and not sys.platform.startswith("win"):
+            os.killpg(os.getpgid(pid), signal.SIGCONT)
+        else:
+            psutil.Process(pid).resume()
+    except (psutil.Error, OSError):
+        pass
@@ -0,0 +1,90 @@
+"""
+core/quantize.py — Lossy PNG output through adaptive palette quantization.
+Screenshots and diagrams rarely use more than a few hundred colours, so an
+8-bit palette PNG is typically half the size of the lossless truecolour one.
+"""
+
+import concurrent.futures
+import io
+import zlib
+
+import numpy as np
+from PIL import Image
+
+# (compress_level, zlib strategy) pairs tried for every palette size.
+# Pillow passes compress_type straight to zlib's deflateInit2 strategy.
+_ZLIB_TRIALS = (
+    (9, zlib.Z_DEFAULT_STRATEGY),
+    (9, zlib.Z_FILTERED),
+    (9, zlib.Z_RLE),
+    (6, zlib.Z_DEFAULT_STRATEGY),
+)
+
+# Error is measured on a box-downscaled copy so dithering noise averages out
+# the way it does for the eye.
+_ERROR_SCALE = 4
+
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def _trial_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Per-process pool for trial encodes (zlib releases the GIL while deflating)."""
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(_ZLIB_TRIALS))
+    return _executor
+
+
+def _encode_png(img: Image.Image, level: int, strategy: int) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=level, compress_type=strategy)
+    return buf.getvalue()
+
+
+def _mean_error(reference: np.ndarray, candidate: Image.Image, mode: str) -> float:
+    small = candidate.convert(mode).reduce(_ERROR_SCALE) if min(candidate.size) >= 4 * _ERROR_SCALE \
+        else candidate.convert(mode)
+    return float(np.abs(reference - np.asarray(small, dtype=np.float32)).mean())
+
+
+def quantize_png(
+    img: Image.Image,
+    max_colors: int = 256,
+    dither: bool = True,
+    max_error: float = 2.5,
+) -> bytes | None:
+    """
+    Quantize `img` to palettes of max_colors, max_colors/2 and max_colors/4,
+    encode every palette with each zlib trial in parallel, and return the
+    smallest PNG whose mean colour error (0-255 scale) is within max_error.
+    Returns None when no palette is accurate enough; callers then fall back
+    to lossless PNG.
+    """
+    mode = "RGBA" if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info else "RGB"
+    img  = img.convert(mode)
+    # Pillow only supports RGBA with the octree quantizers
+    method = Image.Quantize.FASTOCTREE if mode == "RGBA" else Image.Quantize.MEDIANCUT
+    dither_mode = Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE
+
+    ref = img.reduce(_ERROR_SCALE) if min(img.size) >= 4 * _ERROR_SCALE else img
+    ref = np.asarray(ref, dtype=np.float32)
+
+    candidates = []
+    colors = max(2, min(256, max_colors))
+    for n in sorted({colors, max(2, colors // 2), max(2, colors // 4)}, reverse=True):
+        pal = img.quantize(colors=n, method=method, dither=dither_mode)
+        if _mean_error(ref, pal, mode) > max_error:
+            # Fewer colours will only be worse
+            break
+        candidates.append(pal)
+
+    if not candidates:
+        return None
+
+    pool = _trial_pool()
+    futures = [
+        pool.submit(_encode_png, pal, level, strategy)
+        for pal in candidates
+        for level, strategy in _ZLIB_TRIALS
+    ]
+    return min((f.result() for f in futures), key=len)
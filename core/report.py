@@ -0,0 +1,146 @@
+"""
+core/report.py — Per-file run report, streamed to CSV or JSON Lines.
+The compression and upload jobs hand each file's outcome to a RunReport;
+its writer thread formats and appends the rows, so the jobs' result loops
+only pay for a queue put.
+"""
+
+import csv
+import json
+import os
+import queue
+import threading
+import time
+
+# report extension → display label
+REPORT_FORMATS = {
+    ".csv":   "CSV",
+    ".jsonl": "JSON Lines",
+}
+
+# Stage columns, in pipeline order (see core.timing)
+STAGES = (
+    "queue", "paused", "read", "analyze", "decode", "convert", "encode", "write", "retry",
+    "prepare", "upload",
+)
+
+COLUMNS = (
+    "time", "record", "source", "output", "status", "error",
+    "source_bytes", "output_bytes", "ratio", "width", "height", "format", "quality",
+    *(f"{stage}_ms" for stage in STAGES),
+    "peak_rss_mb", "peak_stage",
+    "settings", "memory",
+)
+
+
+class RunReport(threading.Thread):
+    """
+    Background writer for a run report at `path` (.csv or .jsonl).
+
+    add() takes a record dict and never blocks. Records have a "record" kind:
+        "run"      — once per job: {"settings": {...}} (options, workers, …)
+        "compress" — one per source file: source, output, status, error,
+                     source_bytes, output_bytes, width, height, format,
+                     quality, "spans" (the file's core.timing spans) and, in
+                     memory profiling mode, peak_rss and peak_stage
+        "upload"   — one per uploaded file: source (the uploaded path,
+                     i.e. a compress record's output), status, error, spans
+        "memory"   — memory profiling summary: {"memory": {...}}
+    The writer sums spans into per-stage milliseconds and derives the
+    output / source ratio.
+
+    Rows are written as they arrive and flushed after every batch, straight
+    to `path`: after a crash the report holds every file handled up to the
+    last flush. One report can be shared by the compression and the upload
+    that follows it; close() drains the queue and closes the file.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(daemon=True)
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in REPORT_FORMATS:
+            raise ValueError(f"Unsupported report type: {ext or path}")
+        self.path    = path
+        self._kind   = ext
+        self._queue  = queue.SimpleQueue()
+        self.error: Exception | None = None
+        self.rows    = 0
+        self._closed = False
+
+    # ── Producer side ─────────────────────────────────────────────────────────
+    def add(self, record: dict):
+        """Queue one record; raises if the writer thread has failed."""
+        if self.error:
+            raise self.error
+        record["time"] = time.time()
+        self._queue.put(record)
+
+    def close(self):
+        """Write everything queued so far and close the file."""
+        self._queue.put(None)
+        self.join()
+        if self.error:
+            raise self.error
+
+    # ── Writer thread ─────────────────────────────────────────────────────────
+    def run(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8", newline="") as fh:
+                if self._kind == ".csv":
+                    writer = csv.DictWriter(fh, COLUMNS, extrasaction="ignore")
+                    writer.writeheader()
+                    write = writer.writerow
+                else:
+                    def write(row):
+                        fh.write(json.dumps({k: v for k, v in row.items() if v is not None}) + "\n")
+                for batch in self._batches():
+                    for record in batch:
+                        write(_row(record, self._kind == ".csv"))
+                        self.rows += 1
+                    fh.flush()
+        except Exception as exc:
+            self.error = exc
+            # Keep consuming so close() returns
+            while not self._closed and self._queue.get() is not None:
+                pass
+
+    def _batches(self):
+        """Everything queued, a batch at a time; ends at the close() sentinel."""
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._closed = batch[-1] is None
+            yield batch[:-1] if self._closed else batch
+            if self._closed:
+                return
+
+
+def _row(record: dict, flat: bool) -> dict:
+    row = {k: v for k, v in record.items() if k != "spans"}
+    row["time"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record["time"]))
+    src, out = record.get("source_bytes"), record.get("output_bytes")
+    if src and out is not None:
+        row["ratio"] = round(out / src, 4)
+    totals: dict[str, int] = {}
+    for stage, start_ns, end_ns in record.get("spans") or ():
+        totals[stage] = totals.get(stage, 0) + end_ns - start_ns
+    for stage, ns in totals.items():
+        row[f"{stage}_ms"] = round(ns / 1e6, 2)
+    if row.get("peak_rss") is not None:
+        row["peak_rss_mb"] = round(row.pop("peak_rss") / 2**20, 1)
+    if flat:
+        for key in ("settings", "memory"):
+            if key in row:
+                row[key] = json.dumps(row[key], sort_keys=True)
+    return row
+
+
+def report_path(output: str, ext: str) -> str:
+    """`<output>_report_<timestamp><ext>` next to an output folder, a new one per run."""
+    base = output.rstrip("/\\")
+    return f"{base}_report_{time.strftime('%Y%m%d-%H%M%S')}{ext}"
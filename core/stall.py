@@ -0,0 +1,208 @@
+"""
+core/stall.py — Event-loop stall detector for the GUI thread.
+The GUI thread calls beat() from a short repeating timer; a watchdog thread
+notices when the beats stop, samples the GUI thread's Python stack with
+sys._current_frames() while they do, and attributes each stall to the
+innermost frame in our own code. Nothing runs per event: the only steady
+cost is the timer and a watchdog wake-up every few tens of milliseconds.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+# Frames kept per stack sample
+_STACK_LIMIT = 40
+
+# A stall this long is logged while it is still going on, so a hang leaves a trace
+_HANG_S = 5.0
+
+# The log is rotated (to .1) when it grows past this at start-up
+_LOG_MAX_BYTES = 1 << 20
+
+# Our own code, for attributing a stall to the frame that caused it
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Source used when every sample had the GUI thread inside Qt with no Python
+# frame of ours above the event loop (layout, painting, a huge QTextEdit …)
+EVENT_LOOP = "event loop (native)"
+
+
+def default_log_path() -> str:
+    """stalls.log next to the executable / entry script."""
+    return os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), "stalls.log")
+
+
+class StallMonitor(threading.Thread):
+    """
+    Watchdog for the thread that created it (the GUI thread).
+
+    The owner calls beat() every `interval_ms` on that thread (a QTimer in
+    the app). A gap of more than `threshold_ms` beyond the interval is a
+    stall: while it lasts the watchdog samples the stack every
+    `threshold_ms / 2`, and once beats resume the stall is attributed,
+    counted and appended to `log_path` (when given). summary() ranks the
+    sources by total stalled time.
+    """
+
+    def __init__(self, threshold_ms: int = 50, interval_ms: int = 20, log_path: str | None = None):
+        super().__init__(daemon=True, name="stall-watchdog")
+        self.threshold_ms = threshold_ms
+        self.log_path     = log_path
+        self._interval_ns  = interval_ms * 1_000_000
+        self._threshold_ns = threshold_ms * 1_000_000
+        self._poll         = max(0.005, threshold_ms / 2000)
+        self._gui_ident    = threading.get_ident()
+        self._last         = time.monotonic_ns()
+        self._loop: frozenset | None = None         # frames of the event loop's own call chain
+        self._ended        = queue.SimpleQueue()   # (beat before the stall, lag_ns)
+        self._samples: dict[int, list] = {}         # beat before the stall → stack samples
+        self._sources: dict[str, dict] = {}
+        self._lock  = threading.Lock()
+        self._halt  = threading.Event()
+        self._log   = None
+
+    # ── GUI thread ────────────────────────────────────────────────────────────
+    def beat(self):
+        if self._loop is None:
+            self._loop = frozenset(_key(f) for f, _ in traceback.walk_stack(sys._getframe(1)))
+        now = time.monotonic_ns()
+        lag = now - self._last - self._interval_ns
+        if lag >= self._threshold_ns:
+            self._ended.put((self._last, lag))
+        self._last = now
+
+    # ── Lifetime ──────────────────────────────────────────────────────────────
+    def start(self):
+        if self.log_path:
+            try:
+                if os.path.getsize(self.log_path) > _LOG_MAX_BYTES:
+                    os.replace(self.log_path, self.log_path + ".1")
+            except OSError:
+                pass
+            try:
+                self._log = open(self.log_path, "a", encoding="utf-8")
+                self._write(f"── session started, threshold {self.threshold_ms} ms")
+            except OSError:
+                self._log = None   # read-only install: keep counting, just don't log
+        self._last = time.monotonic_ns()
+        super().start()
+
+    def close(self) -> list[dict]:
+        """Stop watching; logs and returns the ranked summary."""
+        self._halt.set()
+        if self.is_alive():
+            self.join()
+        self._drain()
+        ranked = self.summary()
+        if ranked:
+            self._write("── session summary\n" + format_summary(ranked))
+            for s in ranked[:3]:
+                if s["stack"]:
+                    self._write(f"longest stall in {s['source']} ({s['max_ms']:.0f} ms):\n" + "".join(s["stack"]).rstrip())
+        if self._log:
+            self._log.close()
+            self._log = None
+        return ranked
+
+    # ── Watchdog thread ───────────────────────────────────────────────────────
+    def run(self):
+        hung = None
+        while not self._halt.wait(self._poll):
+            last = self._last
+            stalled = time.monotonic_ns() - last - self._interval_ns
+            if stalled >= self._threshold_ns:
+                stack = self._stack()
+                if stack is not None:
+                    self._samples.setdefault(last, []).append(stack)
+                if hung != last and stalled >= _HANG_S * 1e9:
+                    hung = last
+                    self._write(f"GUI thread stalled for {stalled / 1e9:.1f} s so far, in:\n"
+                                + "".join(stack.format() if stack else ["  (no Python frames)"]).rstrip())
+            self._drain()
+
+    def _stack(self):
+        frame = sys._current_frames().get(self._gui_ident)
+        if frame is None:
+            return None
+        return traceback.StackSummary.extract(traceback.walk_stack(frame), limit=_STACK_LIMIT, lookup_lines=False)
+
+    def _drain(self):
+        """Attribute and record the stalls that have ended."""
+        while True:
+            try:
+                last, lag = self._ended.get_nowait()
+            except queue.Empty:
+                return
+            samples = self._samples.pop(last, [])
+            source, stack = _attribute(samples, self._loop or frozenset())
+            ms = lag / 1e6
+            with self._lock:
+                s = self._sources.setdefault(source, {"source": source, "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                s["count"] += 1
+                s["total_ms"] += ms
+                if ms >= s["max_ms"]:
+                    s["max_ms"] = ms
+                    s["stack"] = stack
+            self._write(f"stall {ms:7.0f} ms  {source}  ({len(samples)} sample(s))")
+        # Samples of a stall whose end was never seen (closing mid-stall) stay until close
+
+    def _write(self, line: str):
+        if self._log:
+            try:
+                self._log.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {line}\n")
+                self._log.flush()
+            except OSError:
+                pass
+
+    # ── Queries (any thread) ──────────────────────────────────────────────────
+    def summary(self) -> list[dict]:
+        """[{source, count, total_ms, max_ms, stack}, …], most stalled time first."""
+        with self._lock:
+            ranked = [dict(s) for s in self._sources.values()]
+        ranked.sort(key=lambda s: s["total_ms"], reverse=True)
+        return ranked
+
+
+def _key(frame) -> tuple:
+    return frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name
+
+
+def _attribute(samples: list, loop: frozenset) -> tuple[str, list[str]]:
+    """The most-sampled source across a stall's samples, and one stack for it."""
+    if not samples:
+        return "unsampled (shorter than the watchdog poll)", []
+    votes: dict[str, int] = {}
+    stacks: dict[str, list[str]] = {}
+    for stack in samples:
+        source = _source(stack, loop)
+        votes[source] = votes.get(source, 0) + 1
+        stacks.setdefault(source, stack.format())
+    source = max(votes, key=votes.get)
+    return source, stacks[source]
+
+
+def _source(stack, loop: frozenset) -> str:
+    """
+    The function of the innermost frame in our code that is not part of the
+    event loop's call chain (line numbers are left to the kept stack).
+    """
+    own = next((
+        f for f in stack
+        if (f.filename, f.lineno, f.name) not in loop
+        and os.path.abspath(f.filename).startswith(_APP_ROOT + os.sep)
+    ), None)
+    if own is None:
+        return EVENT_LOOP
+    return f"{os.path.relpath(os.path.abspath(own.filename), _APP_ROOT)} {own.name}()"
+
+
+def format_summary(ranked: list[dict], limit: int = 10) -> str:
+    """Ranked stall sources, one line each."""
+    return "\n".join(
+        f"{s['total_ms']:9.0f} ms total  {s['count']:5d}×  max {s['max_ms']:7.0f} ms  {s['source']}"
+        for s in ranked[:limit]
+    )
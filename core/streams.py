@@ -0,0 +1,280 @@
+"""
+core/streams.py — Glue between path streams, the worker pools and asyncio.
+Lets the compression and upload jobs consume an open-ended stream of paths
+(sync or async) and be driven from an asyncio event loop, with bounded
+buffering in both directions, and lets an upload run on the output of a
+compression while it is still running (UploadBacklog).
+"""
+
+import asyncio
+import collections
+import multiprocessing
+import os
+import queue
+import threading
+from typing import NamedTuple
+
+_END = object()
+
+
+class TaskFeed:
+    """
+    Pulls from a (possibly blocking) iterator on its own thread and hands the
+    items to a WorkerPool / Coordinator without ever blocking its loop:
+    iterating yields the next item, or None when nothing is ready yet, and
+    `wakeup` becomes readable whenever a new item arrives.
+
+    At most `max_pending` items are buffered, so a slow pool stops the feed
+    from pulling further paths (backpressure).
+    """
+
+    def __init__(self, items, max_pending: int = 8):
+        self._items  = iter(items)
+        self._queue  = queue.Queue(maxsize=max(1, max_pending))
+        self._closed = False
+        self.wakeup, self._wake_w = multiprocessing.Pipe(duplex=False)
+        self.error: BaseException | None = None
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+
+    def __iter__(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                yield None
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def close(self):
+        self._closed = True
+        # Unblock a pump stuck on a full queue
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self.wakeup.close()
+        self._wake_w.close()
+
+    def _put(self, item):
+        while not self._closed:
+            try:
+                self._queue.put(item, timeout=0.25)
+            except queue.Full:
+                continue
+            try:
+                self._wake_w.send_bytes(b"")
+            except OSError:
+                pass
+            return
+
+    def _pump(self):
+        try:
+            for item in self._items:
+                if self._closed:
+                    break
+                self._put(item)
+        except BaseException as exc:
+            self.error = exc
+        finally:
+            # The write end stays open until close(): at EOF `wakeup` would
+            # read as ready forever, and recv_bytes() would raise
+            self._put(_END)
+
+
+class MemoryUpload(NamedTuple):
+    """A compressed file that was never written: uploaded straight from `data`."""
+    path:   str     # where it would have been written; names the asset
+    data:   bytes
+    source: str     # the original, for the asset's dates
+
+
+class UploadBacklog:
+    """
+    Hand-off from a running compression to a concurrent upload: put() each
+    compressed file as it completes (never blocks), give the backlog to an
+    UploadJob as its file list, and close() it once compression is done.
+    Iterating blocks until the next file arrives and ends after close().
+
+    The backlog is the files put but not yet taken by an upload thread.
+    When it reaches `max_files` or `max_bytes` (0 = no limit)
+    `on_pressure(True)` is called, so the producer can pause; once it has
+    drained to half of both (or is closed), `on_pressure(False)`. The
+    callback runs on whichever thread crossed the limit.
+
+    put(…, data=…) hands over a file held in memory instead: iterating
+    yields a MemoryUpload, and its bytes keep counting against `max_bytes`
+    until the uploader calls done() for it, so `max_bytes` bounds the
+    buffers queued and in flight (plus whatever the workers are encoding
+    when compression is held back).
+    """
+
+    def __init__(self, max_files: int = 500, max_bytes: int = 0, on_pressure=None):
+        self.max_files   = max_files
+        self.max_bytes   = max_bytes
+        self.on_pressure = on_pressure or (lambda on: None)
+        self._files: collections.deque = collections.deque()   # (path, size)
+        self._bytes  = 0
+        self._count  = 0
+        self._closed = False
+        self._full   = False
+        self._cond   = threading.Condition()
+        self._notify_lock = threading.Lock()
+
+    def __len__(self):
+        """Files put so far."""
+        return self._count
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def pending(self) -> tuple[int, int]:
+        """(files, bytes) waiting for an upload thread; bytes include in-memory files being uploaded."""
+        with self._cond:
+            return len(self._files), self._bytes
+
+    def put(self, path: str, size: int | None = None, data: bytes | None = None, source: str = ""):
+        if data is not None:
+            item, size = MemoryUpload(path, data, source or path), len(data)
+        else:
+            item = path
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+        with self._cond:
+            if data is not None and self._closed:
+                # Nobody would take it: the bytes would be dropped without a trace
+                raise ValueError("upload backlog is closed")
+            self._files.append((item, size))
+            self._bytes += size
+            self._count += 1
+            self._cond.notify()
+            changed = self._update()
+        if changed:
+            self._notify()
+
+    def close(self):
+        """No more files; releases the producer if it was held back."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            changed = self._full
+            self._full = False
+        if changed:
+            self._notify()
+
+    def __iter__(self):
+        while True:
+            with self._cond:
+                while not self._files and not self._closed:
+                    self._cond.wait()
+                if not self._files:
+                    return
+                item, size = self._files.popleft()
+                if not isinstance(item, MemoryUpload):
+                    self._bytes -= size
+                changed = self._update()
+            if changed:
+                self._notify()
+            yield item
+
+    def done(self, item):
+        """An item from the backlog has been uploaded (or has failed); frees an in-memory file's budget."""
+        if not isinstance(item, MemoryUpload):
+            return
+        with self._cond:
+            self._bytes -= len(item.data)
+            changed = self._update()
+        if changed:
+            self._notify()
+
+    def _notify(self):
+        # Flips from two threads may race; whichever call runs last reports the current state
+        with self._notify_lock:
+            self.on_pressure(self._full)
+
+    def _update(self) -> bool:
+        """Re-evaluate the limits (lock held); True when the pressure state flipped."""
+        files, size = len(self._files), self._bytes
+        if not self._full and not self._closed:
+            full = (self.max_files and files >= self.max_files) or (self.max_bytes and size >= self.max_bytes)
+        elif self._full:
+            full = not ((not self.max_files or files <= self.max_files // 2)
+                        and (not self.max_bytes or size <= self.max_bytes // 2))
+        else:
+            return False
+        full = bool(full)
+        if full != self._full:
+            self._full = full
+            return True
+        return False
+
+
+def iterate_async(aiterable, loop: asyncio.AbstractEventLoop):
+    """
+    Blocking iterator over an async iterable that lives on `loop`; for use
+    from a worker thread while the loop keeps running.
+    """
+    ait = aiterable.__aiter__()
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(ait.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
+
+
+async def run_in_thread(generator_fn, cancel, max_buffered: int = 8):
+    """
+    Run the sync generator `generator_fn()` on a worker thread and yield its
+    items on the event loop.
+
+    Only `max_buffered` items are queued between the two; when the consumer
+    stops awaiting, the thread blocks and, through the pools' lazy task pull,
+    stops taking new work. Leaving the `async for` early — break, an
+    exception, or task cancellation — calls `cancel()` and waits for the
+    thread to wind down. An exception raised by the generator is re-raised
+    here.
+    """
+    loop   = asyncio.get_running_loop()
+    items  = asyncio.Queue(maxsize=max(1, max_buffered))
+    closed = threading.Event()
+
+    def produce():
+        error = None
+        try:
+            for item in generator_fn():
+                if closed.is_set():
+                    break
+                asyncio.run_coroutine_threadsafe(items.put((True, item)), loop).result()
+        except BaseException as exc:
+            error = exc
+        finally:
+            if not closed.is_set():
+                asyncio.run_coroutine_threadsafe(items.put((False, error)), loop).result()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            more, value = await items.get()
+            if not more:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        if thread.is_alive():
+            closed.set()
+            cancel()
+            # Keep draining so a producer blocked on a full queue can see `closed`
+            while thread.is_alive():
+                while not items.empty():
+                    items.get_nowait()
+                await asyncio.sleep(0.05)
@@ -0,0 +1,290 @@
+"""
+core/worker_pool.py — Process pool with worker recycling and a per-task watchdog.
+Qt-free so it can be driven from a QThread or any plain Python caller.
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import time
+
+from core.priority import suspend_process, resume_process
+
+
+# How often the dispatch loop wakes up to check for cancellation when no
+# worker has produced a result yet.
+_POLL_INTERVAL = 0.25
+
+
+def _worker_main(conn, max_tasks: int, initializer, initargs: tuple):
+    """
+    Entry point of every pool process.
+    Runs tasks received over `conn` one at a time and exits on its own after
+    `max_tasks` tasks (0 = never), so the parent can replace it with a fresh
+    process and return its fragmented heap to the OS.
+    """
+    if initializer is not None:
+        initializer(*initargs)
+
+    done = 0
+    while not max_tasks or done < max_tasks:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+
+        fn, args = msg
+        try:
+            result = (True, fn(*args))
+        except Exception as exc:
+            result = (False, f"{type(exc).__name__}: {exc}")
+        try:
+            conn.send(result)
+        except OSError:
+            # Parent is gone (killed); nobody is left to report to
+            break
+        done += 1
+
+    conn.close()
+
+
+def _drain(conn):
+    """Empty a wakeup connection; only its readiness matters."""
+    while conn.poll():
+        conn.recv_bytes()
+
+
+class _Worker:
+    """Parent-side handle for a single pool process."""
+
+    __slots__ = ("process", "conn", "args", "started", "tasks_done")
+
+    def __init__(self, process, conn):
+        self.process    = process
+        self.conn       = conn
+        self.args       = None   # args of the task currently running, or None when idle
+        self.started    = 0.0
+        self.tasks_done = 0
+
+
+class WorkerPool:
+    """
+    Minimal process pool built for long compression runs.
+
+    Unlike ProcessPoolExecutor, every task is handed to a specific process, so
+    the pool knows exactly which worker runs which file and since when:
+
+    - workers are recycled after `max_tasks_per_child` tasks (0 = never);
+    - a task running longer than `task_timeout` seconds gets its worker killed
+      and replaced, and is reported as timed out;
+    - a worker that dies mid-task (segfault, OOM kill) is replaced the same way.
+
+    Tasks are pulled lazily from the iterable given to imap_unordered(), so
+    only `max_workers` tasks are ever in flight. A task source that is fed
+    from elsewhere (e.g. the network) may yield None for "nothing ready yet";
+    the pool then asks again after its next poll instead of stopping.
+
+    pause() stops dispatching and suspends every worker; time spent paused
+    does not count towards the watchdog limit.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_tasks_per_child: int = 0,
+        task_timeout: float | None = None,
+        initializer=None,
+        initargs: tuple = (),
+        mp_context=None,
+    ):
+        self.max_workers         = max(1, max_workers)
+        self.max_tasks_per_child = max_tasks_per_child
+        self.task_timeout        = task_timeout or None
+        self._initializer        = initializer
+        self._initargs           = initargs
+        self._ctx                = mp_context or multiprocessing.get_context()
+        self._workers: list[_Worker] = []
+        self._cancel             = False
+        self._paused_at: float | None = None
+        self.recycled            = 0   # workers retired after max_tasks_per_child
+        self.replaced            = 0   # workers killed by the watchdog or found dead
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cancel(self):
+        """Stop dispatching; safe to call from another thread."""
+        self._cancel = True
+
+    def pause(self):
+        """Stop dispatching and suspend all workers; safe to call from another thread."""
+        if self._paused_at is None:
+            self._paused_at = time.monotonic()
+            for pid in self.pids:
+                suspend_process(pid)
+
+    def resume(self):
+        """Undo pause(); running tasks get their watchdog clock shifted by the pause length."""
+        if self._paused_at is not None:
+            paused_for = time.monotonic() - self._paused_at
+            for w in self._workers:
+                w.started += paused_for
+            for pid in self.pids:
+                resume_process(pid)
+            self._paused_at = None
+
+    @property
+    def paused(self) -> bool:
+        return self._paused_at is not None
+
+    def close(self):
+        """Stop idle workers gracefully and kill busy ones."""
+        if self.paused:
+            self.resume()
+        for w in self._workers:
+            if w.args is None:
+                try:
+                    w.conn.send(None)
+                except (OSError, ValueError):
+                    pass
+            else:
+                w.process.kill()
+        for w in self._workers:
+            w.process.join(timeout=5)
+            if w.process.is_alive():
+                w.process.kill()
+                w.process.join()
+            w.conn.close()
+        self._workers = []
+
+    @property
+    def pids(self) -> list[int]:
+        return [w.process.pid for w in self._workers if w.process.pid]
+
+    def warm(self):
+        """Start every worker now rather than on first use (not while imap_unordered() runs)."""
+        while len(self._workers) < self.max_workers:
+            self._spawn()
+
+    # ── Worker management ─────────────────────────────────────────────────────
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.max_tasks_per_child, self._initializer, self._initargs),
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        w = _Worker(proc, parent_conn)
+        self._workers.append(w)
+        return w
+
+    def _retire(self, w: _Worker, kill: bool):
+        self._workers.remove(w)
+        if kill:
+            w.process.kill()
+        w.process.join(timeout=5)
+        if w.process.is_alive():
+            w.process.kill()
+            w.process.join()
+        w.conn.close()
+
+    # ── Main loop ─────────────────────────────────────────────────────────────
+    def imap_unordered(self, fn, tasks, wakeup=None):
+        """
+        Run fn(*args) for every args tuple in `tasks`.
+        Yields (args, ok, value) as tasks complete; value is fn's return value
+        when ok, otherwise an error message string.
+        `wakeup` is an optional Connection that the producer of a None-yielding
+        task source writes to when new tasks are queued, so they are picked up
+        at once instead of on the next poll.
+        """
+        tasks     = iter(tasks)
+        exhausted = False
+
+        while not self._cancel:
+            if self.paused:
+                time.sleep(_POLL_INTERVAL)
+                continue
+
+            # Dispatch to idle workers, spawning lazily up to max_workers
+            while not exhausted:
+                idle = next((w for w in self._workers if w.args is None), None)
+                if idle is None and len(self._workers) >= self.max_workers:
+                    break
+                try:
+                    args = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if args is None:
+                    break
+                if idle is None:
+                    idle = self._spawn()
+                idle.args    = args
+                idle.started = time.monotonic()
+                idle.conn.send((fn, args))
+
+            busy = [w for w in self._workers if w.args is not None]
+            if not busy:
+                if exhausted:
+                    break
+                if wakeup is None:
+                    time.sleep(_POLL_INTERVAL)
+                elif wakeup.poll(_POLL_INTERVAL):
+                    _drain(wakeup)
+                continue
+
+            wait_for = _POLL_INTERVAL
+            if self.task_timeout:
+                now = time.monotonic()
+                soonest = min(w.started for w in busy) + self.task_timeout
+                wait_for = max(0.0, min(wait_for, soonest - now))
+
+            handles = [w.conn for w in busy] + [w.process.sentinel for w in busy]
+            if wakeup is not None and not exhausted:
+                handles.append(wakeup)
+            ready   = set(multiprocessing.connection.wait(handles, timeout=wait_for))
+            now     = time.monotonic()
+            if wakeup in ready:
+                _drain(wakeup)
+
+            events = []
+            for w in busy:
+                args = w.args
+                if w.conn in ready:
+                    try:
+                        ok, value = w.conn.recv()
+                    except (EOFError, OSError):
+                        self.replaced += 1
+                        self._retire(w, kill=False)
+                        events.append((args, False, f"worker crashed (exit code {w.process.exitcode})"))
+                        continue
+                    w.args = None
+                    w.tasks_done += 1
+                    events.append((args, ok, value))
+                    if self.max_tasks_per_child and w.tasks_done >= self.max_tasks_per_child:
+                        self.recycled += 1
+                        self._retire(w, kill=False)
+                elif w.process.sentinel in ready:
+                    self.replaced += 1
+                    self._retire(w, kill=False)
+                    events.append((args, False, f"worker crashed (exit code {w.process.exitcode})"))
+                elif self.task_timeout and not self.paused and now - w.started >= self.task_timeout:
+                    events.append((args, False, f"timed out after {self.task_timeout:g} s"))
+                    self.replaced += 1
+                    self._retire(w, kill=True)
+
+            yield from events
+
+        if self._cancel:
+            if self.paused:
+                self.resume()
+            for w in [w for w in self._workers if w.args is not None]:
+                self._retire(w, kill=True)
@@ -14,6 +14,7 @@ from PySide6.QtWidgets import (
 )
 
 from core.config         import AppConfig
+from core.stall          import StallMonitor, default_log_path
 from core.binary_manager import (
     DownloadBinaryThread, get_default_binary_path,
 )
@@ -170,8 +171,36 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(900, 600)
         self.resize(1100, 720)
 
+        self._stall: StallMonitor | None = None
+        self._stall_timer = QTimer(self)
+        self._stall_timer.setInterval(20)
+
         self._build_ui()
         self._switch_tab(0)
+        self._apply_stall_monitor()
+
+    def _apply_stall_monitor(self):
+        """(Re)start the GUI stall watchdog with the configured threshold."""
+        threshold = self.config.stall_threshold_ms
+        if self._stall and self._stall.threshold_ms == threshold:
+            return
+        self._stop_stall_monitor()
+        if threshold > 0:
+            self._stall = StallMonitor(threshold, self._stall_timer.interval(), default_log_path())
+            self._stall_timer.timeout.connect(self._stall.beat)
+            self._stall.start()
+            self._stall_timer.start()
+
+    def _stop_stall_monitor(self):
+        if self._stall:
+            self._stall_timer.stop()
+            self._stall_timer.timeout.disconnect(self._stall.beat)
+            self._stall.close()
+            self._stall = None
+
+    def closeEvent(self, event):
+        self._stop_stall_monitor()
+        super().closeEvent(event)
 
     def _build_ui(self):
         root = QWidget()
@@ -229,6 +258,7 @@ class MainWindow(QMainWindow):
                 tab._load_from_config()
             elif hasattr(tab, "_load"):
                 tab._load()
+        self._apply_stall_monitor()
         self.status_bar.set_message("Settings applied to all tabs.", TEXT_SUCCESS)
 
 
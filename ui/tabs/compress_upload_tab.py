@@ -4,18 +4,29 @@ Compresses images locally then optionally uploads to Immich via REST API.
 """
 
 import os
+import time
 
-from PySide6.QtCore    import Qt, QTimer
+from PySide6.QtCore    import Qt, QDate, QTimer, Signal
 from PySide6.QtGui     import QFont, QDragEnterEvent, QDropEvent
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QLabel, QLineEdit, QPushButton, QFileDialog,
     QGroupBox, QProgressBar, QTextEdit, QCheckBox,
     QRadioButton, QButtonGroup, QSlider, QSizePolicy,
-    QScrollArea, QFrame,
+    QScrollArea, QFrame, QComboBox, QSpinBox, QDateEdit,
 )
 
-from core.compressor import CompressorThread, estimate_compressed_size, VALID_IMAGE_EXTENSIONS
+from core.compressor import CompressorThread, EstimateThread
+from core.archive    import ARCHIVE_FORMATS
+from core.dedupe     import DEDUPE_MODES
+from core.filelist   import FileList
+from core.imaging    import JPEG_SUBSAMPLING
+from core.layout     import OUTPUT_LAYOUTS
+from core.memory     import MemorySampler, format_snapshot, format_top_files
+from core.presets    import load_report_presets
+from core.report     import RunReport, report_path
+from core.streams    import UploadBacklog
+from core.timing     import format_summary
 from core.uploader   import UploaderThread, ConnectionTestThread
 from core.config     import AppConfig
 from ui.theme        import (
@@ -35,13 +46,27 @@ def _bytes_to_human(b: int) -> str:
 
 class CompressUploadTab(QWidget):
 
+    # Upload backlog full / drained; emitted from the thread that crossed the limit
+    backpressure = Signal(bool)
+
     def __init__(self, config: AppConfig, parent=None):
         super().__init__(parent)
         self.config = config
         self._compressor: CompressorThread | None = None
         self._uploader:   UploaderThread   | None = None
         self._conn_tester: ConnectionTestThread | None = None
-        self._compressed_files: list[str] = []
+        self._estimator:   EstimateThread | None = None
+        self._report:     RunReport | None = None
+        self._memory:     MemorySampler | None = None
+        self._mem_timer = QTimer(self)
+        self._mem_timer.setInterval(500)
+        self._mem_timer.timeout.connect(self._update_memory)
+        self._compressed_files = FileList()
+        self._backlog:    UploadBacklog | None = None
+        self._compress_finished = False
+        self._upload_finished   = False
+        self._cancelled         = False
+        self.backpressure.connect(self._on_backpressure)
 
         self.setAcceptDrops(True)
 
@@ -125,12 +150,54 @@ class CompressUploadTab(QWidget):
         self.drop_hint.setStyleSheet(f"color: {TEXT_MUTED}; font-size: 11px; font-style: italic;")
         src_v.addWidget(self.drop_hint)
 
+        # Capture-date range
+        date_row = QHBoxLayout()
+        self.use_date_cb = QCheckBox("Only photos taken")
+        self.use_date_cb.setToolTip(
+            "Compress only images whose EXIF capture date falls in this range\n"
+            "(files without one use their modification date)."
+        )
+        self.date_start = QDateEdit()
+        self.date_start.setCalendarPopup(True)
+        self.date_start.setDisplayFormat("yyyy-MM-dd")
+        self.date_start.setDate(QDate(2000, 1, 1))
+        self.date_end = QDateEdit()
+        self.date_end.setCalendarPopup(True)
+        self.date_end.setDisplayFormat("yyyy-MM-dd")
+        self.date_end.setDate(QDate.currentDate())
+        lbl_to = QLabel("to")
+        lbl_to.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
+        self.use_date_cb.toggled.connect(self.date_start.setEnabled)
+        self.use_date_cb.toggled.connect(self.date_end.setEnabled)
+        date_row.addWidget(self.use_date_cb)
+        date_row.addWidget(self.date_start)
+        date_row.addWidget(lbl_to)
+        date_row.addWidget(self.date_end)
+        date_row.addStretch()
+        src_v.addLayout(date_row)
+
+        dedupe_row = QHBoxLayout()
+        dedupe_lbl = QLabel("Burst shots")
+        dedupe_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
+        self.dedupe_combo = QComboBox()
+        for key, label in DEDUPE_MODES.items():
+            self.dedupe_combo.addItem(label, key)
+        self.dedupe_combo.setToolTip(
+            "Find near-identical frames (bursts, retakes) by perceptual hash.\n"
+            "Flag: list them in the log. Skip: keep only the sharpest frame of each group."
+        )
+        dedupe_row.addWidget(dedupe_lbl)
+        dedupe_row.addWidget(self.dedupe_combo, 1)
+        src_v.addLayout(dedupe_row)
+
         col.addWidget(grp_src)
 
         # ── Output folder ──
         grp_out = QGroupBox("OUTPUT FOLDER")
-        out_h = QHBoxLayout(grp_out)
-        out_h.setContentsMargins(10, 6, 10, 10)
+        out_v = QVBoxLayout(grp_out)
+        out_v.setContentsMargins(10, 6, 10, 10)
+        out_v.setSpacing(6)
+        out_h = QHBoxLayout()
         self.output_edit = QLineEdit()
         self.output_edit.setPlaceholderText("Defaults to <source>/_compressed")
         out_btn = QPushButton("Browse")
@@ -138,6 +205,35 @@ class CompressUploadTab(QWidget):
         out_btn.clicked.connect(self._browse_output)
         out_h.addWidget(self.output_edit)
         out_h.addWidget(out_btn)
+        out_v.addLayout(out_h)
+
+        layout_row = QHBoxLayout()
+        layout_lbl = QLabel("Layout")
+        layout_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
+        self.layout_combo = QComboBox()
+        for key, label in OUTPUT_LAYOUTS.items():
+            self.layout_combo.addItem(label, key)
+        self.layout_combo.setToolTip(
+            "Flat: one folder, duplicate names get a numeric suffix.\n"
+            "Mirror: recreate the source sub-folders.\n"
+            "Sharded: spread files over hashed sub-folders (best for very large runs)."
+        )
+        layout_row.addWidget(layout_lbl)
+        layout_row.addWidget(self.layout_combo, 1)
+
+        sink_lbl = QLabel("Write to")
+        sink_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
+        self.sink_combo = QComboBox()
+        self.sink_combo.addItem("Folder", "folder")
+        for ext, label in ARCHIVE_FORMATS.items():
+            self.sink_combo.addItem(label, ext)
+        self.sink_combo.setToolTip(
+            "Archives are written next to the output folder (e.g. _compressed.zip)\n"
+            "as one sequential file — much faster on NAS / USB disks."
+        )
+        layout_row.addWidget(sink_lbl)
+        layout_row.addWidget(self.sink_combo, 1)
+        out_v.addLayout(layout_row)
         col.addWidget(grp_out)
 
         # ── Format ──
@@ -145,32 +241,73 @@ class CompressUploadTab(QWidget):
         fmt_v = QVBoxLayout(grp_fmt)
         fmt_v.setSpacing(8)
 
+        # Saved presets (e.g. Pareto points from `python -m bench.sweep`)
+        preset_row = QHBoxLayout()
+        preset_lbl = QLabel("Preset")
+        preset_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
+        self.preset_combo = QComboBox()
+        self.preset_combo.setToolTip("Apply saved format / quality settings.")
+        self.preset_combo.activated.connect(self._apply_preset)
+        preset_import_btn = QPushButton("Import…")
+        preset_import_btn.setProperty("class", "secondary")
+        preset_import_btn.setToolTip("Load the presets of an encoder sweep report (report.json).")
+        preset_import_btn.clicked.connect(self._import_presets)
+        preset_row.addWidget(preset_lbl)
+        preset_row.addWidget(self.preset_combo, 1)
+        preset_row.addWidget(preset_import_btn)
+        fmt_v.addLayout(preset_row)
+
         # Radio row
         radio_row = QHBoxLayout()
         self.fmt_jpeg = QRadioButton("JPEG")
         self.fmt_png  = QRadioButton("PNG")
+        self.fmt_webp = QRadioButton("WebP")
+        self.fmt_auto = QRadioButton("Auto")
+        self.fmt_auto.setToolTip("Pick JPEG, PNG or WebP per image from a quick content analysis.")
         self.fmt_jpeg.setChecked(True)
         self._fmt_group = QButtonGroup()
-        self._fmt_group.addButton(self.fmt_jpeg)
-        self._fmt_group.addButton(self.fmt_png)
-        self.fmt_jpeg.toggled.connect(self._update_format_visibility)
-        radio_row.addWidget(self.fmt_jpeg)
-        radio_row.addWidget(self.fmt_png)
+        self._fmt_buttons = {
+            "JPEG": self.fmt_jpeg,
+            "PNG":  self.fmt_png,
+            "WEBP": self.fmt_webp,
+            "AUTO": self.fmt_auto,
+        }
+        for btn in self._fmt_buttons.values():
+            self._fmt_group.addButton(btn)
+            btn.toggled.connect(self._update_format_visibility)
+            radio_row.addWidget(btn)
         radio_row.addStretch()
         fmt_v.addLayout(radio_row)
 
         # JPEG quality
-        self.jpeg_quality_lbl = QLabel("JPEG Quality: 85")
+        self.jpeg_quality_lbl = QLabel("Quality: 85")
         self.jpeg_quality_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
         self.jpeg_slider = QSlider(Qt.Horizontal)
         self.jpeg_slider.setRange(10, 95)
         self.jpeg_slider.setValue(85)
         self.jpeg_slider.valueChanged.connect(
-            lambda v: self.jpeg_quality_lbl.setText(f"JPEG Quality: {v}")
+            lambda v: self.jpeg_quality_lbl.setText(f"Quality: {v}")
         )
         fmt_v.addWidget(self.jpeg_quality_lbl)
         fmt_v.addWidget(self.jpeg_slider)
 
+        # JPEG encoder options
+        jpeg_row = QHBoxLayout()
+        self.subsampling_lbl = QLabel("Chroma")
+        self.subsampling_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
+        self.subsampling_combo = QComboBox()
+        for value, label in JPEG_SUBSAMPLING.items():
+            self.subsampling_combo.addItem(label, value)
+        self.subsampling_combo.setToolTip("JPEG chroma subsampling. 4:4:4 keeps fine colour detail at a larger size.")
+        self.progressive_cb = QCheckBox("Progressive")
+        self.progressive_cb.setToolTip("Progressive JPEG: loads coarse-to-fine in browsers, often slightly smaller.")
+        jpeg_row.addWidget(self.subsampling_lbl)
+        jpeg_row.addWidget(self.subsampling_combo)
+        jpeg_row.addWidget(self.progressive_cb)
+        jpeg_row.addStretch()
+        self._jpeg_widgets = (self.subsampling_lbl, self.subsampling_combo, self.progressive_cb)
+        fmt_v.addLayout(jpeg_row)
+
         # PNG compression
         self.png_compress_lbl = QLabel("PNG Compression Level: 6")
         self.png_compress_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
@@ -183,6 +320,32 @@ class CompressUploadTab(QWidget):
         fmt_v.addWidget(self.png_compress_lbl)
         fmt_v.addWidget(self.png_slider)
 
+        # Lossy palette PNG
+        quant_row = QHBoxLayout()
+        self.png_quant_cb = QCheckBox("Quantize PNG to palette")
+        self.png_quant_cb.setToolTip(
+            "Reduce PNGs to an adaptive palette (lossy). Typically halves screenshots and diagrams;\n"
+            "images that would lose visible colour accuracy stay lossless."
+        )
+        self.png_colors_spin = QSpinBox()
+        self.png_colors_spin.setRange(2, 256)
+        self.png_colors_spin.setValue(256)
+        self.png_colors_spin.setSuffix(" colours")
+        self.png_dither_cb = QCheckBox("Dither")
+        self.png_dither_cb.setChecked(True)
+        self.png_quant_cb.toggled.connect(self.png_colors_spin.setEnabled)
+        self.png_quant_cb.toggled.connect(self.png_dither_cb.setEnabled)
+        quant_row.addWidget(self.png_quant_cb)
+        quant_row.addWidget(self.png_colors_spin)
+        quant_row.addWidget(self.png_dither_cb)
+        quant_row.addStretch()
+        self._png_quant_widgets = (self.png_quant_cb, self.png_colors_spin, self.png_dither_cb)
+        fmt_v.addLayout(quant_row)
+
+        self.adaptive_cb = QCheckBox("Adapt quality to image content")
+        self.adaptive_cb.setToolTip("Lower quality on busy, noisy photos where artefacts are masked; raise it slightly on smooth ones.")
+        fmt_v.addWidget(self.adaptive_cb)
+
         # EXIF checkbox
         self.preserve_exif_cb = QCheckBox("Preserve EXIF metadata")
         self.preserve_exif_cb.setChecked(True)
@@ -214,6 +377,30 @@ class CompressUploadTab(QWidget):
         radio_row.addWidget(self.upload_no)
         up_v.addLayout(radio_row)
 
+        self.overlap_cb = QCheckBox("Upload while compressing")
+        self.overlap_cb.setToolTip(
+            "Start uploading each file as soon as it is compressed instead of after the whole run.\n"
+            "Compression pauses whenever the upload falls too far behind (Settings → Advanced)."
+        )
+        up_v.addWidget(self.overlap_cb)
+
+        copies_row = QHBoxLayout()
+        self.copies_lbl = QLabel("Local copies")
+        self.copies_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
+        self.copies_combo = QComboBox()
+        self.copies_combo.addItem("Keep all", "all")
+        self.copies_combo.addItem("Keep failed uploads only", "failed")
+        self.copies_combo.addItem("None", "none")
+        self.copies_combo.setToolTip(
+            "Keep all: write every compressed image to the output folder, then upload it.\n"
+            "Otherwise images go straight from memory to Immich while compressing, and only\n"
+            "failed uploads (or nothing) are written, so a later upload can retry them.\n"
+            "Memory use is capped in Settings → Advanced → In-memory Upload Budget."
+        )
+        copies_row.addWidget(self.copies_lbl)
+        copies_row.addWidget(self.copies_combo, 1)
+        up_v.addLayout(copies_row)
+
         # Server URL
         self.server_url_lbl = QLabel("Server URL")
         self.server_url_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 11px;")
@@ -270,7 +457,26 @@ class CompressUploadTab(QWidget):
         self._sum_failed   = self._make_summary_row(sum_grid, 2, "Failed")
         self._sum_uploaded = self._make_summary_row(sum_grid, 3, "Uploaded")
         self._sum_skipped  = self._make_summary_row(sum_grid, 4, "Skipped (dup)")
+        self._sum_near_dup = self._make_summary_row(sum_grid, 5, "Near-duplicates")
+        self._sum_conns    = self._make_summary_row(sum_grid, 6, "Connections")
+        self._sum_conns.setToolTip("HTTP connections opened for the upload, and uploads sent over one already open")
+
+        self._sum_timing = QLabel("")
+        self._sum_timing.setStyleSheet(f"color: {TEXT_MUTED}; font-family: '{FONT_MONO}'; font-size: 10px;")
+        self._sum_timing.setToolTip("Per-stage time per file: median, 95th percentile, total, and histogram")
+        self._sum_timing.setVisible(False)
+        sum_grid.addWidget(self._sum_timing, 7, 0, 1, 2)
         col.addWidget(grp_sum)
+
+        # ── Memory (profiling mode only) ──
+        self.grp_mem = QGroupBox("MEMORY")
+        mem_v = QVBoxLayout(self.grp_mem)
+        self._mem_lbl = QLabel("")
+        self._mem_lbl.setStyleSheet(f"color: {TEXT_SECONDARY}; font-family: '{FONT_MONO}'; font-size: 10px;")
+        self._mem_lbl.setToolTip("Resident memory now and at its peak; the files whose worker peaked highest below")
+        mem_v.addWidget(self._mem_lbl)
+        self.grp_mem.setVisible(False)
+        col.addWidget(self.grp_mem)
         col.addStretch()
 
         self._toggle_upload_fields()
@@ -319,7 +525,15 @@ class CompressUploadTab(QWidget):
         self.cancel_btn.setEnabled(False)
         self.cancel_btn.clicked.connect(self._cancel)
 
+        self.pause_btn = QPushButton("⏸ Pause")
+        self.pause_btn.setProperty("class", "secondary")
+        self.pause_btn.setFixedHeight(38)
+        self.pause_btn.setCheckable(True)
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.toggled.connect(self._toggle_pause)
+
         btn_row.addWidget(self.run_btn, 3)
+        btn_row.addWidget(self.pause_btn, 1)
         btn_row.addWidget(self.cancel_btn, 1)
         v.addLayout(btn_row)
 
@@ -365,35 +579,84 @@ class CompressUploadTab(QWidget):
             self.config.last_output_folder = folder
 
     def _scan_folder(self, folder: str):
-        count = sum(
-            1 for root, _, names in os.walk(folder)
-            for n in names
-            if os.path.splitext(n)[1].lower() in VALID_IMAGE_EXTENSIONS
-        )
-        self.file_count_lbl.setText(f"{count} image(s) found")
-        self._sum_total.setText(str(count))
+        # The scan and the sample encodes run on a thread; the result comes back by signal
+        self.file_count_lbl.setText("Scanning…")
         self.est_size_lbl.setText("Estimating…")
+        self._estimator = EstimateThread(
+            folder, self._selected_format(), self.jpeg_slider.value(), self.png_slider.value(),
+            self.adaptive_cb.isChecked(), self.png_quant_cb.isChecked(), parent=self,
+        )
+        self._estimator.result.connect(self._on_estimate)
+        self._estimator.start()
 
-        fmt = "JPEG" if self.fmt_jpeg.isChecked() else "PNG"
-        jq  = self.jpeg_slider.value()
-        pc  = self.png_slider.value()
-
-        def _do_estimate():
-            est, _ = estimate_compressed_size(folder, fmt, jq, pc)
-            self.est_size_lbl.setText(f"≈ {_bytes_to_human(est)} compressed")
+    def _on_estimate(self, folder: str, count: int, est: int):
+        if self._estimator is None or folder != self._estimator.folder:
+            return   # superseded by a later scan
+        self.file_count_lbl.setText(f"{count} image(s) found")
+        if self.run_btn.isEnabled():
+            self._sum_total.setText(str(count))   # a running job reports its own total
+        self.est_size_lbl.setText(f"≈ {_bytes_to_human(est)} compressed" if est >= 0 else "")
 
-        QTimer.singleShot(50, _do_estimate)
+    def _selected_format(self) -> str:
+        return next(fmt for fmt, btn in self._fmt_buttons.items() if btn.isChecked())
 
     def _update_format_visibility(self):
-        is_jpeg = self.fmt_jpeg.isChecked()
-        self.jpeg_quality_lbl.setVisible(is_jpeg)
-        self.jpeg_slider.setVisible(is_jpeg)
-        self.png_compress_lbl.setVisible(not is_jpeg)
-        self.png_slider.setVisible(not is_jpeg)
+        fmt = self._selected_format()
+        lossy    = fmt != "PNG"
+        lossless = fmt in ("PNG", "AUTO")
+        self.jpeg_quality_lbl.setVisible(lossy)
+        self.jpeg_slider.setVisible(lossy)
+        self.adaptive_cb.setVisible(lossy)
+        for w in self._jpeg_widgets:
+            w.setVisible(fmt in ("JPEG", "AUTO"))
+        self.png_compress_lbl.setVisible(lossless)
+        self.png_slider.setVisible(lossless)
+        for w in self._png_quant_widgets:
+            w.setVisible(lossless)
+        self.png_colors_spin.setEnabled(self.png_quant_cb.isChecked())
+        self.png_dither_cb.setEnabled(self.png_quant_cb.isChecked())
+
+    def _reload_presets(self):
+        self.preset_combo.clear()
+        self.preset_combo.addItem("Custom", None)
+        for name in sorted(self.config.presets):
+            self.preset_combo.addItem(name, name)
+
+    def _apply_preset(self, index: int):
+        preset = self.config.presets.get(self.preset_combo.itemData(index))
+        if not preset:
+            return
+        self._fmt_buttons.get(preset["output_format"], self.fmt_jpeg).setChecked(True)
+        if "jpeg_quality" in preset:
+            self.jpeg_slider.setValue(preset["jpeg_quality"])
+        if "png_compression" in preset:
+            self.png_slider.setValue(preset["png_compression"])
+        self.png_quant_cb.setChecked(preset.get("png_quantize", False))
+        if "png_colors" in preset:
+            self.png_colors_spin.setValue(preset["png_colors"])
+        idx = self.subsampling_combo.findData(preset.get("jpeg_subsampling", -1))
+        self.subsampling_combo.setCurrentIndex(max(idx, 0))
+        self.progressive_cb.setChecked(preset.get("jpeg_progressive", False))
+        self._update_format_visibility()
+
+    def _import_presets(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Sweep Report", "", "Sweep report (*.json)")
+        if not path:
+            return
+        try:
+            imported = load_report_presets(path)
+        except (OSError, ValueError, TypeError) as exc:
+            self._log(f"⚠ Could not import presets: {exc}", True)
+            return
+        presets = self.config.presets
+        presets.update(imported)
+        self.config.presets = presets
+        self._reload_presets()
+        self._log(f"Imported {len(imported)} preset(s) from {os.path.basename(path)}.")
 
     def _toggle_upload_fields(self):
         enabled = self.upload_yes.isChecked()
-        for w in (self.server_url_lbl, self.server_url_edit,
+        for w in (self.overlap_cb, self.copies_lbl, self.copies_combo, self.server_url_lbl, self.server_url_edit,
                   self.api_key_lbl, self.api_key_edit,
                   self.show_key_btn, self.test_conn_btn, self.conn_status_lbl):
             w.setEnabled(enabled)
@@ -433,51 +696,230 @@ class CompressUploadTab(QWidget):
             return
 
         output = self.output_edit.text().strip() or os.path.join(source, "_compressed")
-        fmt    = "JPEG" if self.fmt_jpeg.isChecked() else "PNG"
+        fmt    = self._selected_format()
         jq     = self.jpeg_slider.value()
         pc     = self.png_slider.value()
+        aq     = self.adaptive_cb.isChecked()
+        pq     = self.png_quant_cb.isChecked()
         exif   = self.preserve_exif_cb.isChecked()
+        layout = self.layout_combo.currentData()
+        sink   = self.sink_combo.currentData()
+        dedupe = self.dedupe_combo.currentData()
+        archive = None if sink == "folder" else output.rstrip("/\\") + sink
+        date_range = None
+        if self.use_date_cb.isChecked():
+            date_range = (self.date_start.date().toPython(), self.date_end.date().toPython())
 
         self.config.output_format     = fmt
         self.config.jpeg_quality      = jq
         self.config.png_compression   = pc
         self.config.preserve_exif     = exif
+        self.config.adaptive_quality  = aq
+        self.config.png_quantize      = pq
+        self.config.png_colors        = self.png_colors_spin.value()
+        self.config.png_dither        = self.png_dither_cb.isChecked()
+        self.config.jpeg_subsampling  = self.subsampling_combo.currentData()
+        self.config.jpeg_progressive  = self.progressive_cb.isChecked()
+        self.config.output_layout     = layout
+        self.config.output_sink       = sink
+        self.config.dedupe_mode       = dedupe
+        self.config.date_filter       = self.use_date_cb.isChecked()
+        self.config.date_start        = self.date_start.date().toString("yyyy-MM-dd")
+        # Leave the end open when it is today, so the filter keeps up with new photos
+        self.config.date_end          = "" if self.date_end.date() == QDate.currentDate() \
+            else self.date_end.date().toString("yyyy-MM-dd")
         self.config.last_output_folder = output
+        self.config.upload_overlap    = self.overlap_cb.isChecked()
+        self.config.upload_local_copies = self.copies_combo.currentData()
         self.config.sync()
 
-        self._compressed_files = []
+        self._compressed_files = FileList()
+        self._compress_finished = False
+        self._upload_finished   = False
+        self._cancelled         = False
         self._ok_count   = 0
         self._fail_count = 0
         self._up_count   = 0
         self._skip_count = 0
+        self._near_dups  = 0
+        self._near_dup_bytes = 0
+        self._sum_near_dup.setText("—")
+        self._sum_conns.setText("—")
+        self._timing_text = {}
+        self._sum_timing.clear()
+        self._sum_timing.setVisible(False)
 
         self.progress_bar.setValue(0)
         self.log_edit.clear()
         self.run_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
-        self._log(f"Starting compression → {output}")
-
-        self._compressor = CompressorThread(source, output, fmt, jq, pc, exif, self)
+        self.pause_btn.setEnabled(True)
+        self._log(f"Starting compression → {archive or output}")
+        if self.config.report_format:
+            self._report = RunReport(report_path(output, self.config.report_format))
+            self._report.start()
+            self._log(f"Per-file report → {self._report.path}")
+        if self.config.memory_profiling:
+            self._memory = MemorySampler(tracemalloc_frames=1 if self.config.memory_tracemalloc else 0)
+            self._memory.watch("app", lambda: [os.getpid()])
+            self._memory.start()
+            self._mem_lbl.clear()
+            self.grp_mem.setVisible(True)
+            self._mem_timer.start()
+
+        self._compressor = CompressorThread(
+            source, output, fmt, jq, pc, exif,
+            adaptive_quality=aq,
+            png_quantize=pq,
+            png_colors=self.png_colors_spin.value(),
+            png_dither=self.png_dither_cb.isChecked(),
+            jpeg_subsampling=self.subsampling_combo.currentData(),
+            jpeg_progressive=self.progressive_cb.isChecked(),
+            max_tasks_per_child=self.config.max_tasks_per_child,
+            task_timeout=self.config.task_timeout,
+            output_layout=layout,
+            archive_path=archive,
+            read_ahead_mb=self.config.read_ahead_mb,
+            background=self.config.background_priority,
+            date_range=date_range,
+            dedupe=dedupe,
+            distributed_port=self.config.distributed_port if self.config.distributed_enabled else 0,
+            distributed_secret=self.config.distributed_secret,
+            distributed_stream=self.config.distributed_stream,
+            trace_path=self._trace_path(output, "compress"),
+            report=self._report,
+            memory=self._memory,
+            parent=self,
+        )
+        self._compressor.status.connect(self._log)
+        self._compressor.scanned.connect(self._on_compress_scanned)
+        self._compressor.duplicates.connect(self._on_compress_duplicates)
         self._compressor.progress.connect(self._on_compress_progress)
         self._compressor.file_done.connect(self._on_compress_file)
+        self._compressor.timing.connect(lambda s: self._on_timing("Compress", s))
         self._compressor.finished.connect(self._on_compress_done)
+
+        # Overlapped mode: uploads start with the first compressed file. Without
+        # local copies, images go from the workers to the upload in memory.
+        self._backlog = None
+        url = self.server_url_edit.text().strip()
+        key = self.api_key_edit.text().strip()
+        copies = self.copies_combo.currentData()
+        in_memory = copies != "all"
+        if self.upload_yes.isChecked() and (self.overlap_cb.isChecked() or in_memory) \
+                and not archive and url and key:
+            job = self._compressor.job
+            budget_mb = self.config.upload_memory_mb if in_memory else self.config.upload_backlog_mb
+            self._backlog = backlog = UploadBacklog(
+                self.config.upload_backlog_files,
+                budget_mb * 1024 * 1024,
+                on_pressure=lambda full: (job.throttle(full), self.backpressure.emit(full)),
+            )
+            if in_memory:
+                job.sink = lambda src, out_path, data: backlog.put(out_path, data=data, source=src)
+                self._log("Uploading straight from memory — "
+                          + ("failed uploads are kept in the output folder." if copies == "failed"
+                             else "no local copies are written."))
+            else:
+                self._log("Uploading while compressing.")
+            self._start_upload(self._backlog, url, key, keep_failed=copies == "failed")
+
         self._compressor.start()
 
+    def _start_upload(self, files, url: str, key: str, keep_failed: bool = False):
+        self._upload_started = time.monotonic()
+        self._uploader = UploaderThread(
+            files, url, key, self,
+            trace_path=self._trace_path(self._compressor.job.output_folder, "upload"),
+            report=self._report,
+            keep_failed=keep_failed,
+            retries=self.config.upload_retries,
+        )
+        self._uploader.progress.connect(self._on_upload_progress)
+        self._uploader.file_done.connect(self._on_upload_file)
+        self._uploader.log.connect(self._log)
+        self._uploader.timing.connect(lambda s: self._on_timing("Upload", s))
+        self._uploader.connections.connect(self._on_connections)
+        self._uploader.finished.connect(self._on_upload_done)
+        if self.pause_btn.isChecked():
+            self._uploader.pause()
+        self._uploader.start()
+
+    def _active_threads(self) -> list:
+        return [t for t in (self._compressor, self._uploader) if t and t.isRunning()]
+
+    def _toggle_pause(self, paused: bool):
+        self.pause_btn.setText("▶ Resume" if paused else "⏸ Pause")
+        threads = self._active_threads()
+        if not threads:
+            return
+        for thread in threads:
+            if paused:
+                thread.pause()
+            else:
+                thread.resume()
+        self._log("Paused — no new files will be started." if paused else "Resumed.")
+
+    def _on_backpressure(self, full: bool):
+        if self._backlog is None:
+            return
+        if full:
+            files, size = self._backlog.pending
+            self._log(f"⏸ {files} file(s) ({_bytes_to_human(size)}) waiting for upload — "
+                      f"compression held back until the upload catches up.")
+        elif not self._compress_finished:
+            self._log("▶ Upload caught up — compression continues.")
+
+    def _reset_pause(self):
+        self.pause_btn.blockSignals(True)
+        self.pause_btn.setChecked(False)
+        self.pause_btn.setText("⏸ Pause")
+        self.pause_btn.blockSignals(False)
+        self.pause_btn.setEnabled(False)
+
     def _cancel(self):
+        self._cancelled = True
+        self._reset_pause()
         if self._compressor and self._compressor.isRunning():
             self._compressor.cancel()
         if self._uploader and self._uploader.isRunning():
             self._uploader.cancel()
         self.cancel_btn.setEnabled(False)
 
+    def _on_compress_scanned(self, total: int, skipped: int):
+        self._sum_total.setText(str(total))
+        if self._compressor.job.date_range:
+            start, end = self._compressor.job.date_range
+            self._log(f"Date filter {start} → {end}: {total} file(s) in range, {skipped} skipped.")
+
+    def _on_compress_duplicates(self, clusters: list, src_bytes: int):
+        self._near_dups = sum(len(dups) for _, dups in clusters)
+        self._sum_near_dup.setText(str(self._near_dups))
+        if not clusters:
+            self._log("No near-duplicate frames found.")
+            return
+
+        skip = self._compressor.job.dedupe == "skip"
+        for kept, dups in clusters[:20]:
+            # A large burst library would flood the log; the summary line covers the rest
+            names = ", ".join(os.path.basename(p) for p in dups[:5])
+            more  = f" (+{len(dups) - 5} more)" if len(dups) > 5 else ""
+            self._log(f"≈ {os.path.basename(kept)} kept — near-duplicates: {names}{more}",
+                      not skip)
+        verb = "skipping" if skip else "flagged"
+        self._log(f"{self._near_dups} near-duplicate frame(s) in {len(clusters)} group(s), "
+                  f"{verb} {_bytes_to_human(src_bytes)} of originals.")
+
     def _on_compress_progress(self, pct: int):
         self.progress_bar.setValue(pct)
 
-    def _on_compress_file(self, filename: str, ok: bool, out_path: str, err_msg: str):
+    def _on_compress_file(self, filename: str, ok: bool, out_path: str, err_msg: str, out_bytes: int):
         if ok:
             self._ok_count += 1
-            # Use the actual output path returned by the worker — no string parsing
-            self._compressed_files.append(out_path)
+            # Use the actual output path and size returned by the worker — no string parsing or stat
+            self._compressed_files.append(out_path, out_bytes)
+            if self._backlog is not None and self._compressor.job.sink is None:
+                self._backlog.put(out_path)   # in-memory files were handed over by the sink
             
             # Since threads can spam the log, we only log every 10th successful file for large batches
             if self._ok_count % 10 == 0 or self._sum_total.text() == "1":
@@ -493,12 +935,32 @@ class CompressUploadTab(QWidget):
             self._sum_failed.setText(str(self._fail_count))
 
     def _on_compress_done(self):
+        if self._compress_finished:
+            return
+        self._compress_finished = True
         self.progress_bar.setValue(100)
         self._sum_success.setText(str(self._ok_count))
         self._sum_failed.setText(str(self._fail_count))
         self._log(f"Compression done. {self._ok_count} OK, {self._fail_count} failed.")
-
-        if self.upload_yes.isChecked() and self._compressed_files:
+        if self._near_dups and self._compressor.job.dedupe == "skip" and self._compressed_files \
+                and not self._compressor.job.archive_path:
+            # Skipped frames would have compressed to about the run's average size
+            avg = self._compressed_files.total_size() / len(self._compressed_files)
+            self._near_dup_bytes = int(avg * self._near_dups)
+            self._log(f"Near-duplicate skipping avoided ≈ {_bytes_to_human(self._near_dup_bytes)} of output.")
+
+        if self._backlog is not None:
+            self._backlog.close()
+            if self._upload_finished:
+                self._finish()
+            else:
+                handled = self._up_count + self._skip_count
+                self.progress_bar.setValue(int(handled / max(len(self._backlog), 1) * 100))
+                self._log("Waiting for the remaining uploads…")
+        elif self.upload_yes.isChecked() and self._compressed_files and self._compressor.job.archive_path:
+            self._log("⚠ Upload skipped — images were written into an archive, not individual files.", True)
+            self._finish()
+        elif self.upload_yes.isChecked() and self._compressed_files:
             url = self.server_url_edit.text().strip()
             key = self.api_key_edit.text().strip()
             if not url or not key:
@@ -507,12 +969,7 @@ class CompressUploadTab(QWidget):
                 return
             self._log(f"Starting upload of {len(self._compressed_files)} file(s)…")
             self.progress_bar.setValue(0)
-            self._uploader = UploaderThread(self._compressed_files, url, key, self)
-            self._uploader.progress.connect(self.progress_bar.setValue)
-            self._uploader.file_done.connect(self._on_upload_file)
-            self._uploader.log.connect(self._log)
-            self._uploader.finished.connect(self._on_upload_done)
-            self._uploader.start()
+            self._start_upload(self._compressed_files, url, key)
         else:
             self._finish()
 
@@ -531,13 +988,95 @@ class CompressUploadTab(QWidget):
             self._sum_uploaded.setText(str(self._up_count))
             self._sum_skipped.setText(str(self._skip_count))
 
+    def _on_upload_progress(self, pct: int):
+        # While both run, the bar follows compression; the upload takes over after it
+        if self._compress_finished:
+            self.progress_bar.setValue(pct)
+
     def _on_upload_done(self):
+        if self._upload_finished:
+            return
+        self._upload_finished = True
         self._sum_uploaded.setText(str(self._up_count))
         self._sum_skipped.setText(str(self._skip_count))
         self._log(f"Upload complete. {self._up_count} uploaded, {self._skip_count} skipped.")
+        if self._near_dup_bytes:
+            elapsed  = time.monotonic() - self._upload_started
+            uploaded = self._compressed_files.total_size()
+            if elapsed > 0 and uploaded:
+                saved = self._near_dup_bytes / (uploaded / elapsed)
+                self._log(f"Near-duplicate skipping saved ≈ {saved:.0f} s of upload time "
+                          f"({_bytes_to_human(self._near_dup_bytes)}).")
+        if self._backlog is not None and not self._compress_finished:
+            # Cancelled or failed mid-run: stop holding compression back and let it finish
+            self._backlog.close()
+            if self._cancelled:
+                return
+            if self._compressor.job.sink is not None:
+                # Nothing would be written locally, so there is no point in compressing on
+                self._compressor.cancel()
+                self._log("⚠ Upload stopped before compression finished; compression cancelled "
+                          "(images are not written locally in this mode).", True)
+            else:
+                self._log("⚠ Upload stopped before compression finished; the rest stays in the output folder.", True)
+            return
         self._finish()
 
+    def _trace_path(self, output: str, kind: str) -> str | None:
+        return output.rstrip("/\\") + f"_{kind}_trace.json" if self.config.trace_enabled else None
+
+    def _on_timing(self, phase: str, summary: dict):
+        self._timing_text[phase] = format_summary(summary)
+        self._sum_timing.setText("\n".join(f"{p} stages\n{t}" for p, t in self._timing_text.items()))
+        self._sum_timing.setVisible(True)
+
+    def _on_connections(self, stats: dict):
+        retries = f", {stats['retries']} retried" if stats["retries"] else ""
+        self._sum_conns.setText(f"{stats['opened']} opened · {stats['reused']} reused{retries}")
+        self._log(f"HTTP: {stats['requests']} request(s) over {stats['opened']} connection(s), "
+                  f"{stats['reused']} reused{retries}.")
+
+    def _update_memory(self):
+        snap = self._memory.snapshot()
+        lines = format_top_files(snap, 3)
+        self._mem_lbl.setText(format_snapshot(snap) + ("\n\nTop files\n" + "\n".join(lines) if lines else ""))
+
+    def _finish_memory(self):
+        """Final panel update, a summary in the log and the report, then stop sampling."""
+        self._mem_timer.stop()
+        self._update_memory()
+        snap = self._memory.snapshot()
+        allocations = self._memory.top_allocations(5)
+        self._memory.close()
+        self._memory = None
+        peaks = ", ".join(f"{g} {v['peak'] / 2**20:.0f} MB" for g, v in snap["groups"].items())
+        self._log(f"Peak memory: {peaks} (total {snap['total_peak'] / 2**20:.0f} MB).")
+        for line in format_top_files(snap):
+            self._log(f"  ▲ {line}")
+        for line in allocations:
+            self._log(f"  py {line}")
+        if self._report:
+            try:
+                self._report.add({"record": "memory", "memory": {
+                    "groups": {g: v["peak"] for g, v in snap["groups"].items()},
+                    "total_peak": snap["total_peak"],
+                    "top_files": snap["top_files"],
+                    "python_allocations": allocations,
+                }})
+            except Exception:
+                pass   # reported by close() below
+
     def _finish(self):
+        if self._memory:
+            self._finish_memory()
+        if self._report:
+            try:
+                self._report.close()
+                self._log(f"Per-file report: {self._report.rows} row(s) written to {self._report.path}")
+            except Exception as exc:
+                self._log(f"⚠ Per-file report incomplete: {exc}", True)
+            self._report = None
+        self._reset_pause()
         self.run_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
         self.progress_bar.setValue(100)
@@ -548,8 +1087,28 @@ class CompressUploadTab(QWidget):
         self.jpeg_slider.setValue(self.config.jpeg_quality)
         self.png_slider.setValue(self.config.png_compression)
         self.preserve_exif_cb.setChecked(self.config.preserve_exif)
-        if self.config.output_format == "PNG":
-            self.fmt_png.setChecked(True)
-        else:
-            self.fmt_jpeg.setChecked(True)
+        idx = self.layout_combo.findData(self.config.output_layout)
+        self.layout_combo.setCurrentIndex(max(idx, 0))
+        idx = self.sink_combo.findData(self.config.output_sink)
+        self.sink_combo.setCurrentIndex(max(idx, 0))
+        self.adaptive_cb.setChecked(self.config.adaptive_quality)
+        self.png_quant_cb.setChecked(self.config.png_quantize)
+        self.png_colors_spin.setValue(self.config.png_colors)
+        self.png_dither_cb.setChecked(self.config.png_dither)
+        idx = self.subsampling_combo.findData(self.config.jpeg_subsampling)
+        self.subsampling_combo.setCurrentIndex(max(idx, 0))
+        self.progressive_cb.setChecked(self.config.jpeg_progressive)
+        self.overlap_cb.setChecked(self.config.upload_overlap)
+        idx = self.copies_combo.findData(self.config.upload_local_copies)
+        self.copies_combo.setCurrentIndex(max(idx, 0))
+        self._reload_presets()
+        self.date_start.setDate(QDate.fromString(self.config.date_start, "yyyy-MM-dd"))
+        if self.config.date_end:
+            self.date_end.setDate(QDate.fromString(self.config.date_end, "yyyy-MM-dd"))
+        self.use_date_cb.setChecked(self.config.date_filter)
+        idx = self.dedupe_combo.findData(self.config.dedupe_mode)
+        self.dedupe_combo.setCurrentIndex(max(idx, 0))
+        self.date_start.setEnabled(self.config.date_filter)
+        self.date_end.setEnabled(self.config.date_filter)
+        self._fmt_buttons.get(self.config.output_format, self.fmt_jpeg).setChecked(True)
         self._update_format_visibility()
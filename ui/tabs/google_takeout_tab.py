@@ -16,6 +16,7 @@ from PySide6.QtWidgets import (
 )
 
 from core.config         import AppConfig
+from core.memory         import MemorySampler, format_snapshot
 from core.binary_manager import (
     RunCommandThread, DownloadBinaryThread, LogFileTailerThread,
     get_default_binary_path,
@@ -32,6 +33,7 @@ class GoogleTakeoutTab(QWidget):
         self.config   = config
         self._runner: RunCommandThread | None = None
         self._tailer: LogFileTailerThread | None = None
+        self._memory: MemorySampler | None = None
         self._spin_idx      = 0
         self._net_sent_prev = 0
         self._net_recv_prev = 0
@@ -196,7 +198,15 @@ class GoogleTakeoutTab(QWidget):
         self.cancel_btn.setEnabled(False)
         self.cancel_btn.clicked.connect(self._cancel)
 
+        self.pause_btn = QPushButton("⏸ Pause")
+        self.pause_btn.setProperty("class", "secondary")
+        self.pause_btn.setFixedHeight(38)
+        self.pause_btn.setCheckable(True)
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.toggled.connect(self._toggle_pause)
+
         btn_row.addWidget(self.run_btn, 3)
+        btn_row.addWidget(self.pause_btn, 1)
         btn_row.addWidget(self.cancel_btn, 1)
         v.addLayout(btn_row)
 
@@ -237,6 +247,11 @@ class GoogleTakeoutTab(QWidget):
         self.speed_label.hide()
         v.addWidget(self.speed_label)
 
+        self.memory_label = QLabel("")
+        self.memory_label.setStyleSheet("color: #4FC3F7; font-size: 10px; font-family: monospace;")
+        self.memory_label.hide()
+        v.addWidget(self.memory_label)
+
         self.log_edit = QTextEdit()
         self.log_edit.setReadOnly(True)
         self.log_edit.setMinimumHeight(130)
@@ -358,7 +373,8 @@ class GoogleTakeoutTab(QWidget):
         self._prev_errors = -1
         self.run_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
-        self._runner = RunCommandThread(cmd, self)
+        self.pause_btn.setEnabled(True)
+        self._runner = RunCommandThread(cmd, background=self.config.background_priority, parent=self)
         self._runner.output_line.connect(self._log)
         self._runner.log_file_detected.connect(self._start_log_tailer)
         self._runner.process_done.connect(self._on_done)
@@ -372,6 +388,14 @@ class GoogleTakeoutTab(QWidget):
         except Exception:
             self._net_sent_prev = self._net_recv_prev = 0
         self.speed_label.show()
+        if self.config.memory_profiling:
+            runner = self._runner
+            self._memory = MemorySampler(tracemalloc_frames=1 if self.config.memory_tracemalloc else 0)
+            self._memory.watch("app", lambda: [os.getpid()])
+            self._memory.watch("immich-go", lambda: [runner.pid] if runner.pid else [], children=True)
+            self._memory.start()
+            self.memory_label.clear()
+            self.memory_label.show()
         self._heartbeat.start()
 
     def _start_log_tailer(self, log_path: str):
@@ -384,7 +408,19 @@ class GoogleTakeoutTab(QWidget):
         self._tailer.start()
         self._last_log_path = log_path  # remember path for Open Log button
 
+    def _toggle_pause(self, paused: bool):
+        self.pause_btn.setText("▶ Resume" if paused else "⏸ Pause")
+        if not self._runner:
+            return
+        if paused:
+            self._runner.pause()
+            self._log("Paused — immich-go is suspended.")
+        else:
+            self._runner.resume()
+            self._log("Resumed.")
+
     def _cancel(self):
+        self._reset_pause()
         if self._runner:
             self._runner.terminate_process()
         if self._tailer:
@@ -393,9 +429,26 @@ class GoogleTakeoutTab(QWidget):
         self.speed_label.hide()
         self.cancel_btn.setEnabled(False)
 
+    def _reset_pause(self):
+        self.pause_btn.blockSignals(True)
+        self.pause_btn.setChecked(False)
+        self.pause_btn.setText("⏸ Pause")
+        self.pause_btn.blockSignals(False)
+        self.pause_btn.setEnabled(False)
+
     def _on_done(self, rc: int):
+        self._reset_pause()
         self._heartbeat.stop()
         self.speed_label.hide()
+        if self._memory:
+            snap = self._memory.snapshot()
+            allocations = self._memory.top_allocations(5)
+            self._memory.close()
+            self._memory = None
+            peaks = ", ".join(f"{g} {v['peak'] / 2**20:.0f} MB" for g, v in snap["groups"].items())
+            self._log(f"Peak memory: {peaks} (total {snap['total_peak'] / 2**20:.0f} MB).")
+            for line in allocations:
+                self._log(f"  py {line}")
         success = (rc == 0)
         color = TEXT_SUCCESS if success else TEXT_ERROR
         msg   = "✓ Upload complete." if success else f"✗ Process exited with code {rc}."
@@ -469,6 +522,8 @@ class GoogleTakeoutTab(QWidget):
             pass
 
         self.speed_label.setText(f"{spin}  ↑ Upload: {up_str}   ↓ Download: {dn_str}")
+        if self._memory:
+            self.memory_label.setText(format_snapshot(self._memory.snapshot()))
 
     # TUI summary line still written to stdout even with --no-ui:
     # e.g. "Immich read 100%, Assets found: 4829, Upload errors: 0, Uploaded 0"
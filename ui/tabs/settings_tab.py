@@ -12,6 +12,7 @@ from PySide6.QtWidgets import (
 )
 
 from core.config  import AppConfig
+from core.report  import REPORT_FORMATS
 from core.uploader import UploaderThread, ConnectionTestThread
 from ui.theme import (
     ACCENT, TEXT_MUTED, TEXT_SUCCESS, TEXT_ERROR, TEXT_WARNING, FONT_MONO,
@@ -144,6 +145,140 @@ class SettingsTab(QWidget):
         self.recursive_cb.setChecked(True)
         form.addRow("", self.recursive_cb)
 
+        self.recycle_spin = QSpinBox()
+        self.recycle_spin.setRange(0, 100000)
+        self.recycle_spin.setValue(200)
+        self.recycle_spin.setSuffix(" files")
+        self.recycle_spin.setSpecialValueText("Never")
+        self.recycle_spin.setToolTip("Restart each compression worker after this many files to cap memory growth.")
+        form.addRow("Recycle Workers After:", self.recycle_spin)
+
+        self.task_timeout_spin = QSpinBox()
+        self.task_timeout_spin.setRange(0, 7200)
+        self.task_timeout_spin.setValue(300)
+        self.task_timeout_spin.setSuffix(" sec")
+        self.task_timeout_spin.setSpecialValueText("No limit")
+        self.task_timeout_spin.setToolTip("A file taking longer than this is reported as timed out and its worker replaced.")
+        form.addRow("Per-file Timeout:", self.task_timeout_spin)
+
+        self.read_ahead_spin = QSpinBox()
+        self.read_ahead_spin.setRange(0, 4096)
+        self.read_ahead_spin.setValue(128)
+        self.read_ahead_spin.setSuffix(" MB")
+        self.read_ahead_spin.setSpecialValueText("Off")
+        self.read_ahead_spin.setToolTip("Prefetch upcoming source files into memory so workers never wait on slow network shares.")
+        form.addRow("Read-ahead Buffer:", self.read_ahead_spin)
+
+        self.background_cb = QCheckBox("Run compression and immich-go at background priority")
+        self.background_cb.setToolTip("Lower CPU and disk priority so long jobs don't slow down other work on this machine.")
+        form.addRow("", self.background_cb)
+
+        self.trace_cb = QCheckBox("Write a timing trace of every run")
+        self.trace_cb.setToolTip(
+            "Saves <output>_compress_trace.json / _upload_trace.json next to the output folder.\n"
+            "Open them in ui.perfetto.dev or chrome://tracing to see every worker's timeline."
+        )
+        form.addRow("", self.trace_cb)
+
+        self.report_combo = QComboBox()
+        self.report_combo.addItem("Off", "")
+        for ext, label in REPORT_FORMATS.items():
+            self.report_combo.addItem(label, ext)
+        self.report_combo.setToolTip(
+            "Write <output>_report_<date>.csv / .jsonl with every file's sizes, settings,\n"
+            "stage timings, upload status and error. Rows are written as files complete."
+        )
+        form.addRow("Per-file Run Report:", self.report_combo)
+
+        self.memory_cb = QCheckBox("Memory profiling (sample RSS of the app, workers and immich-go)")
+        self.memory_cb.setToolTip(
+            "Shows a live memory panel while jobs run, and records each file's peak\n"
+            "worker memory in the run report."
+        )
+        form.addRow("", self.memory_cb)
+
+        self.tracemalloc_cb = QCheckBox("Also trace Python allocations (tracemalloc, slower)")
+        self.memory_cb.toggled.connect(self.tracemalloc_cb.setEnabled)
+        form.addRow("", self.tracemalloc_cb)
+
+        self.backlog_files_spin = QSpinBox()
+        self.backlog_files_spin.setRange(0, 1000000)
+        self.backlog_files_spin.setSingleStep(100)
+        self.backlog_files_spin.setValue(500)
+        self.backlog_files_spin.setSuffix(" files")
+        self.backlog_files_spin.setSpecialValueText("No limit")
+        self.backlog_files_spin.setToolTip(
+            "When uploading while compressing, pause compression while this many\n"
+            "compressed files are still waiting to be uploaded."
+        )
+        form.addRow("Upload Backlog Limit:", self.backlog_files_spin)
+
+        self.backlog_mb_spin = QSpinBox()
+        self.backlog_mb_spin.setRange(0, 1000000)
+        self.backlog_mb_spin.setSingleStep(256)
+        self.backlog_mb_spin.setValue(2048)
+        self.backlog_mb_spin.setSuffix(" MB")
+        self.backlog_mb_spin.setSpecialValueText("No limit")
+        self.backlog_mb_spin.setToolTip("…or while the files waiting to be uploaded take up this much disk space.")
+        form.addRow("", self.backlog_mb_spin)
+
+        self.upload_memory_spin = QSpinBox()
+        self.upload_memory_spin.setRange(16, 65536)
+        self.upload_memory_spin.setSingleStep(64)
+        self.upload_memory_spin.setValue(512)
+        self.upload_memory_spin.setSuffix(" MB")
+        self.upload_memory_spin.setToolTip(
+            "When uploading straight from memory (Local copies other than \"Keep all\"),\n"
+            "compression is held back while the images waiting for or in upload take up this much RAM."
+        )
+        form.addRow("In-memory Upload Budget:", self.upload_memory_spin)
+
+        self.upload_retries_spin = QSpinBox()
+        self.upload_retries_spin.setRange(0, 10)
+        self.upload_retries_spin.setValue(3)
+        self.upload_retries_spin.setSpecialValueText("Off")
+        self.upload_retries_spin.setToolTip(
+            "Retry an upload this many times, with increasing back-off, when the connection\n"
+            "fails or the server answers 429 / 502 / 503 / 504 (e.g. a restarting proxy)."
+        )
+        form.addRow("Upload Retries:", self.upload_retries_spin)
+
+        self.stall_spin = QSpinBox()
+        self.stall_spin.setRange(0, 5000)
+        self.stall_spin.setSingleStep(10)
+        self.stall_spin.setValue(50)
+        self.stall_spin.setSuffix(" ms")
+        self.stall_spin.setSpecialValueText("Off")
+        self.stall_spin.setToolTip(
+            "Log every time the window stops responding for longer than this, with the code\n"
+            "that was running, to stalls.log next to the app. A ranked summary is added on exit."
+        )
+        form.addRow("Log UI Stalls Over:", self.stall_spin)
+
+        self.distributed_cb = QCheckBox("Distribute compression to LAN worker hosts")
+        self.distributed_cb.setToolTip(
+            "Worker hosts run:  python -m core.distributed THIS_HOST:PORT --secret SECRET\n"
+            "They connect to this machine when a compression run starts."
+        )
+        form.addRow("", self.distributed_cb)
+
+        self.dist_port_spin = QSpinBox()
+        self.dist_port_spin.setRange(1024, 65535)
+        self.dist_port_spin.setValue(47800)
+        form.addRow("Coordinator Port:", self.dist_port_spin)
+
+        self.dist_secret_edit = QLineEdit()
+        self.dist_secret_edit.setEchoMode(QLineEdit.Password)
+        self.dist_secret_edit.setPlaceholderText("Shared with every worker host")
+        form.addRow("Worker Secret:", self.dist_secret_edit)
+
+        self.dist_stream_cb = QCheckBox("Send file contents to workers (no shared mount needed)")
+        self.dist_stream_cb.setChecked(True)
+        form.addRow("", self.dist_stream_cb)
+
+        for w in (self.dist_port_spin, self.dist_secret_edit, self.dist_stream_cb):
+            self.distributed_cb.toggled.connect(w.setEnabled)
+
         return grp
 
     def _build_button_row(self) -> QWidget:
@@ -202,6 +337,23 @@ class SettingsTab(QWidget):
         self.config.log_level            = self.log_level_combo.currentText()
         self.config.timeout              = self.timeout_spin.value()
         self.config.recursive_upload     = self.recursive_cb.isChecked()
+        self.config.max_tasks_per_child  = self.recycle_spin.value()
+        self.config.task_timeout         = self.task_timeout_spin.value()
+        self.config.read_ahead_mb        = self.read_ahead_spin.value()
+        self.config.background_priority  = self.background_cb.isChecked()
+        self.config.trace_enabled        = self.trace_cb.isChecked()
+        self.config.report_format        = self.report_combo.currentData()
+        self.config.memory_profiling     = self.memory_cb.isChecked()
+        self.config.memory_tracemalloc   = self.tracemalloc_cb.isChecked()
+        self.config.stall_threshold_ms   = self.stall_spin.value()
+        self.config.upload_backlog_files = self.backlog_files_spin.value()
+        self.config.upload_backlog_mb    = self.backlog_mb_spin.value()
+        self.config.upload_memory_mb     = self.upload_memory_spin.value()
+        self.config.upload_retries       = self.upload_retries_spin.value()
+        self.config.distributed_enabled  = self.distributed_cb.isChecked()
+        self.config.distributed_port     = self.dist_port_spin.value()
+        self.config.distributed_secret   = self.dist_secret_edit.text()
+        self.config.distributed_stream   = self.dist_stream_cb.isChecked()
         self.config.sync()
         QMessageBox.information(self, "Saved", "Settings saved successfully.")
         self.settings_saved.emit()  # notify other tabs to reload their fields
@@ -223,3 +375,23 @@ class SettingsTab(QWidget):
         self.log_level_combo.setCurrentText(self.config.log_level)
         self.timeout_spin.setValue(self.config.timeout)
         self.recursive_cb.setChecked(self.config.recursive_upload)
+        self.recycle_spin.setValue(self.config.max_tasks_per_child)
+        self.task_timeout_spin.setValue(self.config.task_timeout)
+        self.read_ahead_spin.setValue(self.config.read_ahead_mb)
+        self.background_cb.setChecked(self.config.background_priority)
+        self.trace_cb.setChecked(self.config.trace_enabled)
+        self.report_combo.setCurrentIndex(max(0, self.report_combo.findData(self.config.report_format)))
+        self.memory_cb.setChecked(self.config.memory_profiling)
+        self.tracemalloc_cb.setChecked(self.config.memory_tracemalloc)
+        self.tracemalloc_cb.setEnabled(self.config.memory_profiling)
+        self.stall_spin.setValue(self.config.stall_threshold_ms)
+        self.backlog_files_spin.setValue(self.config.upload_backlog_files)
+        self.backlog_mb_spin.setValue(self.config.upload_backlog_mb)
+        self.upload_memory_spin.setValue(self.config.upload_memory_mb)
+        self.upload_retries_spin.setValue(self.config.upload_retries)
+        self.distributed_cb.setChecked(self.config.distributed_enabled)
+        self.dist_port_spin.setValue(self.config.distributed_port)
+        self.dist_secret_edit.setText(self.config.distributed_secret)
+        self.dist_stream_cb.setChecked(self.config.distributed_stream)
+        for w in (self.dist_port_spin, self.dist_secret_edit, self.dist_stream_cb):
+            w.setEnabled(self.config.distributed_enabled)